@@ -5,6 +5,27 @@
 
 from __future__ import absolute_import
 
-from foxpuppet.foxpuppet import FoxPuppet
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from foxpuppet.foxpuppet import FoxPuppet
 
 __all__ = ["FoxPuppet"]
+
+# Attributes imported on first access, to keep importing the package cheap.
+_LAZY_ATTRIBUTES = {"FoxPuppet": "foxpuppet.foxpuppet"}
+
+
+def __getattr__(name: str) -> Any:
+    """Import public attributes on first access."""
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+def __dir__() -> list[str]:
+    """List the public attributes, including the ones not imported yet."""
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,22 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Asynchronous FoxPuppet API for driving many Firefox sessions at once."""
+
+from foxpuppet.aio.foxpuppet import AsyncFoxPuppet
+from foxpuppet.aio.region import AsyncNotification, AsyncPanel, AsyncRegion
+from foxpuppet.aio.transport import AsyncWebDriver, AsyncWebElement
+from foxpuppet.aio.wait import AsyncWait
+from foxpuppet.aio.window import AsyncBrowserWindow, AsyncWindowManager
+
+__all__ = [
+    "AsyncBrowserWindow",
+    "AsyncFoxPuppet",
+    "AsyncNotification",
+    "AsyncPanel",
+    "AsyncRegion",
+    "AsyncWait",
+    "AsyncWebDriver",
+    "AsyncWebElement",
+    "AsyncWindowManager",
+]
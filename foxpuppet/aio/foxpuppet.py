@@ -0,0 +1,61 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""AsyncFoxPuppet object for asynchronous browser interaction."""
+
+from typing import Optional
+
+from foxpuppet.aio.transport import AsyncWebDriver
+from foxpuppet.aio.wait import AsyncWait
+from foxpuppet.aio.window import AsyncBrowserWindow, AsyncWindowManager
+from foxpuppet.wait import WaitPolicy
+
+
+class AsyncFoxPuppet(object):
+    """Set up the asynchronous interface for interacting with Firefox.
+
+    Every method that talks to the browser is a coroutine, so one event
+    loop can drive many sessions at once::
+
+        drivers = [await AsyncWebDriver.start(url) for url in urls]
+        browsers = [await AsyncFoxPuppet(d).browser() for d in drivers]
+        await asyncio.gather(*(b.wait_for_notification() for b in browsers))
+
+    Deadlines, baselines and :py:meth:`~foxpuppet.FoxPuppet.reset` of the
+    blocking API are not mirrored.
+
+    Args:
+        driver (:py:class:`~foxpuppet.aio.transport.AsyncWebDriver`):
+            Firefox session.
+        wait_policy (:py:class:`~foxpuppet.wait.WaitPolicy`, optional):
+            Timeout and polling settings for every wait of the session.
+    """
+
+    def __init__(
+        self, driver: AsyncWebDriver, wait_policy: Optional[WaitPolicy] = None
+    ) -> None:
+        """Create AsyncFoxPuppet object.
+
+        Args:
+            driver (:py:class:`~foxpuppet.aio.transport.AsyncWebDriver`):
+                Firefox session.
+            wait_policy (:py:class:`~foxpuppet.wait.WaitPolicy`, optional):
+                Timeout and polling settings for every wait of the session.
+                Defaults to a 10 second timeout polling every 0.5 seconds.
+        """
+        self.driver = driver
+        self.wait = AsyncWait(wait_policy or WaitPolicy())
+        self.window_manager = AsyncWindowManager(driver, self.wait)
+        self._browser: Optional[AsyncBrowserWindow] = None
+
+    async def browser(self) -> AsyncBrowserWindow:
+        """Return the first browser window, looked up on first call.
+
+        Returns:
+            :py:class:`~foxpuppet.aio.window.AsyncBrowserWindow`: Browser
+                window.
+
+        """
+        if self._browser is None:
+            self._browser = (await self.window_manager.windows())[0]
+        return self._browser
@@ -0,0 +1,129 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Asynchronous regions of a Firefox browser window."""
+
+from typing import TYPE_CHECKING, Optional, Type
+
+from selenium.webdriver.common.by import By
+
+from foxpuppet.aio.transport import AsyncWebDriver, AsyncWebElement
+from foxpuppet.region import Region
+
+if TYPE_CHECKING:
+    from foxpuppet.aio.window import AsyncBrowserWindow
+
+
+class AsyncRegion(object):
+    """A region of an :py:class:`~foxpuppet.aio.AsyncBrowserWindow`.
+
+    The blocking region class the element maps to, for example a
+    notification class registered in
+    :py:data:`~foxpuppet.windows.browser.notifications.NOTIFICATIONS`, is
+    available as :py:attr:`kind`, so waits can check for the same classes
+    as the blocking API.
+
+    Args:
+        window (:py:class:`~foxpuppet.aio.AsyncBrowserWindow`): Window
+            object this region appears in.
+        root (:py:class:`~foxpuppet.aio.transport.AsyncWebElement`): Root
+            element of the region.
+        element_id (str): Id of the root element.
+        kind (type): Blocking region class the root element maps to.
+    """
+
+    def __init__(
+        self,
+        window: "AsyncBrowserWindow",
+        root: AsyncWebElement,
+        element_id: str,
+        kind: Type[Region],
+    ) -> None:
+        """Create AsyncRegion object.
+
+        Args:
+            window (:py:class:`~foxpuppet.aio.AsyncBrowserWindow`): Window
+                object this region appears in.
+            root (:py:class:`~foxpuppet.aio.transport.AsyncWebElement`):
+                Root element of the region.
+            element_id (str): Id of the root element.
+            kind (type): Blocking region class the root element maps to.
+        """
+        self.window = window
+        self.driver: AsyncWebDriver = window.driver
+        self.root = root
+        self.id = element_id
+        self.kind = kind
+
+    def __repr__(self) -> str:
+        """Return a readable representation of the region."""
+        return "<{0} {1} ({2})>".format(type(self).__name__, self.id, self.kind.__name__)
+
+    def is_a(self, region_class: Type[Region]) -> bool:
+        """Check whether the region maps to a blocking region class.
+
+        Args:
+            region_class (type): Blocking region class.
+
+        Returns:
+            bool: True if :py:attr:`kind` is the class or a subclass of it.
+
+        """
+        return issubclass(self.kind, region_class)
+
+    async def click(self) -> None:
+        """Click the root element of the region."""
+        async with self.driver.using_context(self.driver.CONTEXT_CHROME):
+            await self.root.click()
+
+
+class AsyncNotification(AsyncRegion):
+    """A notification displayed in an asynchronous browser window."""
+
+    async def label(self) -> Optional[str]:
+        """Read the notification label.
+
+        Returns:
+            str: The notification label.
+
+        """
+        async with self.driver.using_context(self.driver.CONTEXT_CHROME):
+            return await self.root.get_attribute("label")
+
+    async def origin(self) -> Optional[str]:
+        """Read the notification origin.
+
+        Returns:
+            str: The notification origin.
+
+        """
+        async with self.driver.using_context(self.driver.CONTEXT_CHROME):
+            return await self.root.get_attribute("name")
+
+    async def click_button(self, class_name: str) -> None:
+        """Click a button of the notification.
+
+        Args:
+            class_name (str): Class of the button, for example
+                ``popup-notification-primary-button``.
+        """
+        async with self.driver.using_context(self.driver.CONTEXT_CHROME):
+            button = await self.root.find_element(By.CLASS_NAME, class_name)
+            await button.click()
+
+    async def click_primary(self) -> None:
+        """Click the primary button."""
+        await self.click_button("popup-notification-primary-button")
+
+    async def click_secondary(self) -> None:
+        """Click the secondary button."""
+        await self.click_button("popup-notification-secondary-button")
+
+    async def close(self) -> None:
+        """Close the notification."""
+        await self.click_button("popup-notification-closebutton")
+        await self.window.wait_for_notification(None)
+
+
+class AsyncPanel(AsyncRegion):
+    """A Panel UI item of an asynchronous browser window."""
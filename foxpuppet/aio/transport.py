@@ -0,0 +1,517 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Asynchronous WebDriver client for Firefox."""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+
+#: Key identifying a web element reference in W3C WebDriver payloads.
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+_Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncWebElement(object):
+    """Reference to an element in an :py:class:`AsyncWebDriver` session.
+
+    Args:
+        driver (:py:class:`AsyncWebDriver`): Session the element belongs to.
+        element_id (str): WebDriver element reference.
+    """
+
+    def __init__(self, driver: "AsyncWebDriver", element_id: str) -> None:
+        """Create AsyncWebElement object.
+
+        Args:
+            driver (:py:class:`AsyncWebDriver`): Session the element belongs
+                to.
+            element_id (str): WebDriver element reference.
+        """
+        self.driver = driver
+        self.id = element_id
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, AsyncWebElement) and self.id == other.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    async def click(self) -> None:
+        """Click the element."""
+        await self.driver.execute("POST", f"/element/{self.id}/click")
+
+    async def get_attribute(self, name: str) -> Optional[str]:
+        """Read an attribute of the element.
+
+        Args:
+            name (str): Attribute name.
+
+        Returns:
+            str, optional: Attribute value or `None` if it is not set.
+
+        """
+        value: Optional[str] = await self.driver.execute(
+            "GET", f"/element/{self.id}/attribute/{name}"
+        )
+        return value
+
+    async def get_property(self, name: str) -> Any:
+        """Read a property of the element.
+
+        Args:
+            name (str): Property name.
+
+        Returns:
+            The property value.
+
+        """
+        return await self.driver.execute("GET", f"/element/{self.id}/property/{name}")
+
+    async def find_element(self, by: str, value: str) -> "AsyncWebElement":
+        """Find a descendant of the element.
+
+        Args:
+            by (str): Locator strategy, see
+                :py:class:`~selenium.webdriver.common.by.By`.
+            value (str): Locator value.
+
+        Returns:
+            :py:class:`AsyncWebElement`: First matching element.
+
+        """
+        element: AsyncWebElement = await self.driver.execute(
+            "POST", f"/element/{self.id}/element", {"using": by, "value": value}
+        )
+        return element
+
+
+class AsyncWebDriver(object):
+    """Minimal asynchronous W3C WebDriver client for geckodriver.
+
+    Each command is a single HTTP/1.1 request sent with :py:mod:`asyncio`
+    streams, so many sessions can be driven from one event loop. Commands
+    of a session are sent one at a time over one kept-alive connection,
+    which is opened again if the server closed it. Responses may use a
+    ``Content-Length`` or chunked transfer encoding. Like
+    :py:class:`~foxpuppet.session.Session` for blocking drivers, the client
+    remembers the Marionette context and focused window handle and skips
+    commands that would not change them.
+
+    Errors are raised as the same
+    :py:mod:`selenium exceptions <selenium.common.exceptions>` a blocking
+    driver raises.
+
+    Args:
+        url (str): Address of the WebDriver server.
+        session_id (str): Id of an existing session.
+        capabilities (dict, optional): Capabilities of the session.
+    """
+
+    CONTEXT_CHROME = "chrome"
+    CONTEXT_CONTENT = "content"
+
+    def __init__(
+        self, url: str, session_id: str, capabilities: Optional[dict] = None
+    ) -> None:
+        """Create AsyncWebDriver object.
+
+        Args:
+            url (str): Address of the WebDriver server.
+            session_id (str): Id of an existing session.
+            capabilities (dict, optional): Capabilities of the session.
+        """
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.base_path = parts.path.rstrip("/")
+        self.session_id = session_id
+        self.capabilities = capabilities or {}
+        self.error_handler = ErrorHandler()
+        self._context: Optional[str] = None
+        self._handle: Optional[str] = None
+        self._connection: Optional[_Connection] = None
+        self._lock = asyncio.Lock()
+        # Context blocks in progress, see using_context.
+        self._block_context: ContextVar[Optional[str]] = ContextVar(
+            "block_context", default=None
+        )
+        self._blocks = 0
+        self._blocks_context: Optional[str] = None
+        self._blocks_previous = self.CONTEXT_CONTENT
+        self._blocks_changed = asyncio.Condition()
+
+    @classmethod
+    async def start(
+        cls, url: str, capabilities: Optional[dict] = None
+    ) -> "AsyncWebDriver":
+        """Start a new WebDriver session.
+
+        Args:
+            url (str): Address of the WebDriver server.
+            capabilities (dict, optional): Capabilities to always match.
+
+        Returns:
+            :py:class:`AsyncWebDriver`: Client for the new session.
+
+        """
+        driver = cls(url, "")
+        value = await driver._request(
+            "POST", "/session", {"capabilities": {"alwaysMatch": capabilities or {}}}
+        )
+        driver.session_id = value["sessionId"]
+        driver.capabilities = value.get("capabilities", {})
+        return driver
+
+    async def quit(self) -> None:
+        """End the session, close all of its windows and the connection."""
+        try:
+            await self.execute("DELETE", "")
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Close the connection to the WebDriver server.
+
+        The session keeps running, and the next command opens a new
+        connection.
+        """
+        async with self._lock:
+            await self._disconnect()
+
+    async def execute(self, method: str, path: str, body: Optional[dict] = None) -> Any:
+        """Send a command of the session.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Command path relative to the session.
+            body (dict, optional): Command parameters.
+
+        Returns:
+            The command result, with element references turned into
+            :py:class:`AsyncWebElement` objects.
+
+        """
+        value = await self._request(
+            method, f"/session/{self.session_id}{path}", self._wrap(body)
+        )
+        return self._unwrap(value)
+
+    @property
+    def context(self) -> Optional[str]:
+        """Context the session is known to be in, or `None` if unknown."""
+        return self._context
+
+    async def get_context(self) -> str:
+        """Return the current Marionette context.
+
+        Returns:
+            str: ``chrome`` or ``content``.
+
+        """
+        if self._context is None:
+            self._context = await self.execute("GET", "/moz/context")
+        return self._context
+
+    async def set_context(self, context: str) -> None:
+        """Switch the Marionette context unless it is already current.
+
+        Args:
+            context (str): ``chrome`` or ``content``.
+        """
+        if context != await self.get_context():
+            self._context = None
+            await self.execute("POST", "/moz/context", {"context": context})
+            self._context = context
+
+    @asynccontextmanager
+    async def using_context(self, context: str) -> AsyncIterator[None]:
+        """Run the enclosed block in a Marionette context.
+
+        Blocks of one context may overlap, such as concurrent waits in
+        chrome. A block of the other context waits until all of them
+        exited, and the context found before the first of them is restored
+        after the last one. A block nested in a block of the same coroutine
+        switches straight away, unless other coroutines share the outer
+        block's context.
+
+        Args:
+            context (str): ``chrome`` or ``content``.
+
+        Raises:
+            RuntimeError: If a nested block would switch the context of
+                other coroutines.
+        """
+        outer = self._block_context.get()
+        if outer == context:
+            yield
+            return
+        token = self._block_context.set(context)
+        try:
+            if outer is not None:
+                if self._blocks > 1:
+                    raise RuntimeError(
+                        "Cannot switch to {0} while other coroutines use {1}".format(
+                            context, outer
+                        )
+                    )
+                self._blocks_context = context
+                await self.set_context(context)
+                try:
+                    yield
+                finally:
+                    self._blocks_context = outer
+                    await self.set_context(outer)
+                return
+            async with self._blocks_changed:
+                await self._blocks_changed.wait_for(
+                    lambda: self._blocks == 0 or self._blocks_context == context
+                )
+                self._blocks += 1
+                if self._blocks == 1:
+                    self._blocks_context = context
+                    try:
+                        self._blocks_previous = await self.get_context()
+                        await self.set_context(context)
+                    except BaseException:
+                        self._blocks = 0
+                        self._blocks_context = None
+                        self._blocks_changed.notify_all()
+                        raise
+            try:
+                yield
+            finally:
+                async with self._blocks_changed:
+                    self._blocks -= 1
+                    if self._blocks == 0:
+                        self._blocks_context = None
+                        try:
+                            await self.set_context(self._blocks_previous)
+                        finally:
+                            self._blocks_changed.notify_all()
+        finally:
+            self._block_context.reset(token)
+
+    async def window_handles(self) -> list[str]:
+        """Return the handles of all open windows.
+
+        Returns:
+            :obj:`list` of str: Window handles.
+
+        """
+        handles: list[str] = await self.execute("GET", "/window/handles")
+        return handles
+
+    async def current_window_handle(self) -> str:
+        """Return the handle of the focused window.
+
+        Returns:
+            str: Window handle.
+
+        """
+        if self._handle is None:
+            self._handle = await self.execute("GET", "/window")
+        return self._handle
+
+    async def switch_to_window(self, handle: str) -> None:
+        """Focus a window unless it is already focused.
+
+        Args:
+            handle (str): Window handle.
+        """
+        if handle != self._handle:
+            self._handle = None
+            await self.execute("POST", "/window", {"handle": handle})
+            self._handle = handle
+
+    async def close_window(self) -> list[str]:
+        """Close the focused window.
+
+        Returns:
+            :obj:`list` of str: Handles of the remaining windows.
+
+        """
+        self._handle = None
+        handles: list[str] = await self.execute("DELETE", "/window")
+        return handles
+
+    async def get(self, url: str) -> None:
+        """Load a URL in the focused window.
+
+        Args:
+            url (str): URL to load.
+        """
+        await self.execute("POST", "/url", {"url": url})
+
+    async def find_element(self, by: str, value: str) -> AsyncWebElement:
+        """Find an element in the current context.
+
+        Args:
+            by (str): Locator strategy, see
+                :py:class:`~selenium.webdriver.common.by.By`.
+            value (str): Locator value.
+
+        Returns:
+            :py:class:`AsyncWebElement`: First matching element.
+
+        """
+        element: AsyncWebElement = await self.execute(
+            "POST", "/element", {"using": by, "value": value}
+        )
+        return element
+
+    async def execute_script(self, script: str, *args: Any) -> Any:
+        """Run a synchronous script in the current context.
+
+        Args:
+            script (str): Script body.
+            *args: Arguments available to the script as ``arguments``.
+
+        Returns:
+            The value returned by the script.
+
+        """
+        return await self.execute(
+            "POST", "/execute/sync", {"script": script, "args": list(args)}
+        )
+
+    async def execute_async_script(self, script: str, *args: Any) -> Any:
+        """Run an asynchronous script in the current context.
+
+        Args:
+            script (str): Script body. It resolves by calling the last
+                argument.
+            *args: Arguments available to the script as ``arguments``.
+
+        Returns:
+            The value the script resolved with.
+
+        """
+        return await self.execute(
+            "POST", "/execute/async", {"script": script, "args": list(args)}
+        )
+
+    async def set_script_timeout(self, seconds: float) -> None:
+        """Set how long asynchronous scripts may run.
+
+        Args:
+            seconds (float): Script timeout in seconds.
+        """
+        await self.execute("POST", "/timeouts", {"script": int(seconds * 1000)})
+
+    def _wrap(self, value: Any) -> Any:
+        if isinstance(value, AsyncWebElement):
+            return {ELEMENT_KEY: value.id}
+        if isinstance(value, dict):
+            return {key: self._wrap(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._wrap(item) for item in value]
+        return value
+
+    def _unwrap(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return AsyncWebElement(self, value[ELEMENT_KEY])
+            return {key: self._unwrap(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._unwrap(item) for item in value]
+        return value
+
+    async def _request(self, method: str, path: str, body: Optional[dict] = None) -> Any:
+        if body is None and method == "POST":
+            body = {}
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        head = (
+            f"{method} {self.base_path}{path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Accept: application/json\r\n"
+            "Content-Type: application/json;charset=UTF-8\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n"
+        )
+        async with self._lock:
+            status, data = await self._exchange(head.encode("latin-1") + payload)
+        text = data.decode("utf-8")
+        if status >= 400:
+            # raises the selenium exception matching the W3C error code
+            self.error_handler.check_response({"status": status, "value": text})
+        return json.loads(text)["value"] if text else None
+
+    async def _exchange(self, request: bytes) -> tuple[int, bytes]:
+        reused = self._connection is not None
+        if self._connection is None:
+            self._connection = await asyncio.open_connection(self.host, self.port)
+        reader, writer = self._connection
+        try:
+            try:
+                writer.write(request)
+                await writer.drain()
+                status_line = await reader.readline()
+            except ConnectionError:
+                status_line = b""
+            if not status_line:
+                await self._disconnect()
+                if reused:  # the server closed the idle connection
+                    return await self._exchange(request)
+                raise ConnectionError("WebDriver server closed the connection")
+            status, data, keep_alive = await self._read_response(status_line, reader)
+        except BaseException:
+            await self._disconnect()
+            raise
+        if not keep_alive:
+            await self._disconnect()
+        return status, data
+
+    async def _read_response(
+        self, status_line: bytes, reader: asyncio.StreamReader
+    ) -> tuple[int, bytes, bool]:
+        version, status = status_line.decode("latin-1").split()[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            data = await self._read_chunks(reader)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return int(status), data, keep_alive
+
+    async def _read_chunks(self, reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        # skip trailer fields up to the empty line ending the message
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        return b"".join(chunks)
+
+    async def _disconnect(self) -> None:
+        if self._connection is None:
+            return
+        _, writer = self._connection
+        self._connection = None
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass  # the server already dropped the connection
@@ -0,0 +1,117 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Awaitable waits following a :py:class:`~foxpuppet.wait.WaitPolicy`."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+from foxpuppet.expected import WaitStatistics
+from foxpuppet.wait import WaitPolicy
+
+
+class AsyncWait(object):
+    """Await a condition at the intervals of a wait policy.
+
+    Unlike :py:class:`~foxpuppet.wait.Wait`, sleeping between polls yields
+    to the event loop, so other sessions keep running. Since waits of one
+    object may run concurrently, it keeps no state between them; the
+    statistics of a wait are filled into the object passed by its caller.
+
+    Args:
+        policy (:py:class:`~foxpuppet.wait.WaitPolicy`): Timeout and
+            polling settings.
+    """
+
+    def __init__(self, policy: WaitPolicy) -> None:
+        """Create AsyncWait object.
+
+        Args:
+            policy (:py:class:`~foxpuppet.wait.WaitPolicy`): Timeout and
+                polling settings.
+        """
+        self.policy = policy
+
+    @property
+    def timeout(self) -> float:
+        """Seconds a wait may take."""
+        return self.policy.timeout
+
+    async def until(
+        self,
+        condition: Callable[[], Awaitable[Any]],
+        message: str = "",
+        statistics: Optional[WaitStatistics] = None,
+    ) -> Any:
+        """Await the condition until it returns a truthy value.
+
+        Args:
+            condition (callable): Coroutine function called without
+                arguments.
+            message (str): Message for the timeout exception.
+            statistics (:py:class:`~foxpuppet.expected.WaitStatistics`,
+                optional): Filled with the polls and duration of this wait,
+                also when it times out.
+
+        Returns:
+            The value returned by the condition.
+
+        """
+        return await self._wait_for(condition, message, True, statistics)
+
+    async def until_not(
+        self,
+        condition: Callable[[], Awaitable[Any]],
+        message: str = "",
+        statistics: Optional[WaitStatistics] = None,
+    ) -> Any:
+        """Await the condition until it returns a falsy value.
+
+        Args:
+            condition (callable): Coroutine function called without
+                arguments.
+            message (str): Message for the timeout exception.
+            statistics (:py:class:`~foxpuppet.expected.WaitStatistics`,
+                optional): Filled with the polls and duration of this wait,
+                also when it times out.
+
+        Returns:
+            The value returned by the condition, or True if the element it
+            looked for no longer exists.
+
+        """
+        return await self._wait_for(condition, message, False, statistics)
+
+    async def _wait_for(
+        self,
+        condition: Callable[[], Awaitable[Any]],
+        message: str,
+        expect: bool,
+        statistics: Optional[WaitStatistics],
+    ) -> Any:
+        start = time.monotonic()
+        end_time = start + self.timeout
+        intervals = self.policy.intervals()
+        polls = 0
+        try:
+            while True:
+                polls += 1
+                try:
+                    value = await condition()
+                    if bool(value) is expect:
+                        return value
+                except NoSuchElementException:
+                    if not expect:
+                        return True
+                remaining = end_time - time.monotonic()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(next(intervals), remaining))
+            raise TimeoutException(message)
+        finally:
+            if statistics is not None:
+                statistics.polls = polls
+                statistics.duration = time.monotonic() - start
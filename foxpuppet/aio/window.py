@@ -0,0 +1,295 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Asynchronous browser windows and their manager."""
+
+import time
+from typing import Any, Optional, Type
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from foxpuppet.aio.region import AsyncNotification, AsyncPanel
+from foxpuppet.aio.transport import AsyncWebDriver
+from foxpuppet.aio.wait import AsyncWait
+from foxpuppet.expected import WaitStatistics
+from foxpuppet.windows.browser.notifications import NOTIFICATIONS, BaseNotification
+from foxpuppet.windows.browser.panel_ui.panel_ui import PANEL_ITEMS, PanelUI
+from foxpuppet.windows.browser.snapshot import SNAPSHOT_SCRIPT, WATCH_NOTIFICATION_SCRIPT
+
+
+class AsyncBrowserWindow(object):
+    """Asynchronous representation of a browser window.
+
+    Only the notification and Panel UI parts of
+    :py:class:`~foxpuppet.windows.BrowserWindow` are mirrored.
+    ``open_window``, ``navbar`` with its ``url_bar``, ``bookmark``,
+    ``wait_for_bookmark`` and the actions of the Panel UI regions have no
+    asynchronous version yet; use a blocking
+    :py:class:`~foxpuppet.FoxPuppet` for them.
+
+    Args:
+        driver (:py:class:`~foxpuppet.aio.transport.AsyncWebDriver`):
+            Session the window belongs to.
+        handle (str): WebDriver Firefox window handle.
+        wait (:py:class:`~foxpuppet.aio.wait.AsyncWait`): Wait shared by
+            the windows of the session.
+    """
+
+    #: Wait for notifications with chrome event listeners instead of polling.
+    notification_events: bool = True
+
+    def __init__(self, driver: AsyncWebDriver, handle: str, wait: AsyncWait) -> None:
+        """Create AsyncBrowserWindow object.
+
+        Args:
+            driver (:py:class:`~foxpuppet.aio.transport.AsyncWebDriver`):
+                Session the window belongs to.
+            handle (str): WebDriver Firefox window handle.
+            wait (:py:class:`~foxpuppet.aio.wait.AsyncWait`): Wait shared by
+                the windows of the session.
+        """
+        self.driver = driver
+        self.handle = handle
+        self.wait = wait
+        self.last_wait: Optional[WaitStatistics] = None
+
+    def __repr__(self) -> str:
+        """Return a readable representation of the window."""
+        return "<{0} {1}>".format(type(self).__name__, self.handle)
+
+    async def switch_to(self) -> None:
+        """Switch focus for Selenium commands to this window."""
+        await self.driver.switch_to_window(self.handle)
+
+    async def close(self) -> None:
+        """Close the window."""
+        await self.switch_to()
+        await self.driver.close_window()
+
+    async def snapshot(self) -> dict[str, Any]:
+        """Read the state of the window with a single chrome script.
+
+        See :py:meth:`~foxpuppet.windows.BrowserWindow.snapshot`.
+
+        Returns:
+            dict: State of the window, with elements as
+                :py:class:`~foxpuppet.aio.transport.AsyncWebElement` objects.
+
+        """
+        async with self.driver.using_context(self.driver.CONTEXT_CHROME):
+            snapshot: dict[str, Any] = await self.driver.execute_script(
+                SNAPSHOT_SCRIPT, list(PANEL_ITEMS)
+            )
+        return snapshot
+
+    async def notification(self) -> Optional[AsyncNotification]:
+        """Return the currently displayed notification.
+
+        Returns:
+            :py:class:`~foxpuppet.aio.region.AsyncNotification`: Displayed
+                notification, or `None`.
+
+        """
+        return self._notification((await self.snapshot())["notification"])
+
+    async def panel(self) -> Optional[AsyncPanel]:
+        """Return the currently displayed Panel UI item.
+
+        Returns:
+            :py:class:`~foxpuppet.aio.region.AsyncPanel`: Panel UI item, or
+                `None`.
+
+        """
+        state = (await self.snapshot())["panel"]
+        if state is None:
+            return None
+        kind = PANEL_ITEMS.get(state["id"], PanelUI)
+        return AsyncPanel(self, state["element"], state["id"], kind)
+
+    async def is_private(self) -> bool:
+        """Check whether this is a Private Browsing window.
+
+        Returns:
+            bool: True if this is a Private Browsing window.
+
+        """
+        await self.switch_to()
+        return bool((await self.snapshot())["private"])
+
+    async def wait_for_notification(
+        self, notification_class: Optional[Type[BaseNotification]] = BaseNotification
+    ) -> Optional[AsyncNotification]:
+        """Wait for the specified notification to be displayed.
+
+        See :py:meth:`~foxpuppet.windows.BrowserWindow.wait_for_notification`.
+
+        Args:
+            notification_class (:py:class:`BaseNotification`, optional):
+                The notification class to wait for. If `None` is specified it
+                will wait for any notification to be closed. Defaults to
+                `BaseNotification`.
+
+        Returns:
+            :py:class:`~foxpuppet.aio.region.AsyncNotification`: Displayed
+                notification, or `None`.
+
+        """
+        if notification_class:
+            if notification_class is BaseNotification:
+                message = "No notification was shown."
+            else:
+                message = "{0} was not shown.".format(notification_class.__name__)
+        else:
+            message = "Unexpected notification shown."
+        if self.notification_events:
+            try:
+                return await self._watch_notification(notification_class, message)
+            except TimeoutException:
+                raise
+            except WebDriverException:
+                pass  # chrome listeners are unavailable, poll instead
+
+        async def displayed() -> Optional[AsyncNotification]:
+            notification = await self.notification()
+            if notification_class is None:
+                return notification
+            if notification is not None and notification.is_a(notification_class):
+                return notification
+            return None
+
+        statistics = self.last_wait = WaitStatistics(0, 0.0)
+        if notification_class:
+            result: AsyncNotification = await self.wait.until(
+                displayed, message, statistics
+            )
+            return result
+        await self.wait.until_not(displayed, message, statistics)
+        return None
+
+    async def _watch_notification(
+        self, notification_class: Optional[Type[BaseNotification]], message: str
+    ) -> Optional[AsyncNotification]:
+        ids = None
+        if notification_class and notification_class is not BaseNotification:
+            ids = NOTIFICATIONS.ids_for(notification_class)
+        start = time.monotonic()
+        try:
+            async with self.driver.using_context(self.driver.CONTEXT_CHROME):
+                event = await self.driver.execute_async_script(
+                    WATCH_NOTIFICATION_SCRIPT,
+                    ids,
+                    notification_class is None,
+                    int(self.wait.timeout * 1000),
+                )
+        except TimeoutException:  # the script timeout was shorter
+            raise TimeoutException(message)
+        finally:
+            self.last_wait = WaitStatistics(1, time.monotonic() - start)
+        if event.get("timeout"):
+            raise TimeoutException(message)
+        return self._notification(event.get("notification"))
+
+    async def wait_for_panel(
+        self, panel_ui_class: Optional[Type[PanelUI]] = PanelUI
+    ) -> Optional[AsyncPanel]:
+        """Wait for the specified Panel UI item to be displayed.
+
+        Args:
+            panel_ui_class (:py:class:`PanelUI`, optional): The PanelUI
+                subclass to wait for. If `None` is specified, it will wait
+                for any panel UI to be closed. Defaults to `PanelUI`.
+
+        Returns:
+            :py:class:`~foxpuppet.aio.region.AsyncPanel`: Displayed Panel
+                UI item, or `None`.
+
+        """
+
+        async def displayed() -> Optional[AsyncPanel]:
+            panel = await self.panel()
+            if panel_ui_class is None:
+                return panel
+            if panel is not None and panel.is_a(panel_ui_class):
+                return panel
+            return None
+
+        statistics = self.last_wait = WaitStatistics(0, 0.0)
+        if panel_ui_class:
+            if panel_ui_class is PanelUI:
+                message = "No panel UI was shown."
+            else:
+                message = f"{panel_ui_class.__name__} was not shown."
+            result: AsyncPanel = await self.wait.until(displayed, message, statistics)
+            return result
+        await self.wait.until_not(displayed, "Unexpected panel UI was shown.", statistics)
+        return None
+
+    def _notification(self, state: Optional[dict]) -> Optional[AsyncNotification]:
+        if state is None:
+            return None  # no notification is displayed
+        kind = NOTIFICATIONS.get(state["id"], BaseNotification)
+        return AsyncNotification(self, state["element"], state["id"], kind)
+
+
+class AsyncWindowManager(object):
+    """Keeps one :py:class:`AsyncBrowserWindow` per open window handle.
+
+    Args:
+        driver (:py:class:`~foxpuppet.aio.transport.AsyncWebDriver`):
+            Session the windows belong to.
+        wait (:py:class:`~foxpuppet.aio.wait.AsyncWait`): Wait shared by
+            the windows of the session.
+    """
+
+    def __init__(self, driver: AsyncWebDriver, wait: AsyncWait) -> None:
+        """Create AsyncWindowManager object.
+
+        Args:
+            driver (:py:class:`~foxpuppet.aio.transport.AsyncWebDriver`):
+                Session the windows belong to.
+            wait (:py:class:`~foxpuppet.aio.wait.AsyncWait`): Wait shared by
+                the windows of the session.
+        """
+        self.driver = driver
+        self.wait = wait
+        self._windows: dict[str, AsyncBrowserWindow] = {}
+
+    async def windows(self) -> list[AsyncBrowserWindow]:
+        """Return all open windows.
+
+        Returns:
+            list: List of AsyncBrowserWindow objects in handle order.
+
+        """
+        return self.update(await self.driver.window_handles())
+
+    def get(self, handle: str) -> AsyncBrowserWindow:
+        """Return the window object for a handle, creating it if needed.
+
+        Args:
+            handle (str): WebDriver Firefox window handle.
+
+        Returns:
+            :py:class:`AsyncBrowserWindow`: Window object.
+
+        """
+        window = self._windows.get(handle)
+        if window is None:
+            window = self._windows[handle] = AsyncBrowserWindow(
+                self.driver, handle, self.wait
+            )
+        return window
+
+    def update(self, handles: list[str]) -> list[AsyncBrowserWindow]:
+        """Synchronize the registry with a list of open window handles.
+
+        Args:
+            handles (:obj:`list` of str): Current Firefox window handles.
+
+        Returns:
+            list: List of AsyncBrowserWindow objects in handle order.
+
+        """
+        for handle in set(self._windows).difference(handles):
+            del self._windows[handle]
+        return [self.get(handle) for handle in handles]
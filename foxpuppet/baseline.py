@@ -0,0 +1,139 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Browser state restored by :py:meth:`~foxpuppet.FoxPuppet.reset`.
+
+Classes modelling a part of the browser that tests change define a
+``RESET_SCRIPT`` class attribute: a fragment of an asynchronous chrome
+script that returns that part to the :py:class:`Baseline`. Fragments may
+``await`` promises and throw to fail the reset. They run in a block of
+their own, in the first browser window, and can read the recorded
+``baseline`` and the ids of the registered notifications as
+``notificationIds``. :py:func:`reset_script` lists the fragments it runs.
+"""
+
+import json
+from typing import Any, TypedDict
+
+
+class Baseline(TypedDict):
+    """Prefs, add-ons and bookmarks of a session in its known good state."""
+
+    #: Pref branches restored on reset.
+    branches: list[str]
+    #: User set prefs of the branches by name, as ``[type, value]`` pairs.
+    prefs: dict[str, list[Any]]
+    #: Ids of the installed add-ons.
+    addons: list[str]
+    #: Guids of the bookmarks, folders and separators.
+    bookmarks: list[str]
+
+
+# Shared by the baseline and reset scripts.
+_READ_PREF_SCRIPT = """
+const readPref = (name, type) => {
+    if (type == Services.prefs.PREF_BOOL) {
+        return Services.prefs.getBoolPref(name);
+    }
+    if (type == Services.prefs.PREF_INT) {
+        return Services.prefs.getIntPref(name);
+    }
+    return Services.prefs.getStringPref(name);
+};
+"""
+
+BASELINE_SCRIPT = _READ_PREF_SCRIPT + """
+const [branches] = arguments;
+const resolve = arguments[arguments.length - 1];
+const { AddonManager } = ChromeUtils.importESModule(
+    "resource://gre/modules/AddonManager.sys.mjs"
+);
+const prefs = {};
+for (const branch of branches) {
+    for (const name of Services.prefs.getChildList(branch)) {
+        if (Services.prefs.prefHasUserValue(name)) {
+            const type = Services.prefs.getPrefType(name);
+            prefs[name] = [type, readPref(name, type)];
+        }
+    }
+}
+const bookmarks = [];
+const collect = node => {
+    bookmarks.push(node.guid);
+    for (const child of node.children || []) {
+        collect(child);
+    }
+};
+(async () => {
+    const addons = await AddonManager.getAllAddons();
+    collect(await PlacesUtils.promiseBookmarksTree());
+    return { branches, prefs, addons: addons.map(addon => addon.id), bookmarks };
+})().then(resolve);
+"""
+
+# Prefs outside the captured branches, such as those Firefox writes while
+# it runs, are left alone.
+PREFS_RESET_SCRIPT = """
+for (const branch of baseline.branches) {
+    for (const name of Services.prefs.getChildList(branch)) {
+        if (Services.prefs.prefHasUserValue(name) && !(name in baseline.prefs)) {
+            Services.prefs.clearUserPref(name);
+        }
+    }
+}
+for (const [name, [type, value]] of Object.entries(baseline.prefs)) {
+    if (Services.prefs.getPrefType(name) != type || readPref(name, type) !== value) {
+        Services.prefs.clearUserPref(name);
+        if (type == Services.prefs.PREF_BOOL) {
+            Services.prefs.setBoolPref(name, value);
+        } else if (type == Services.prefs.PREF_INT) {
+            Services.prefs.setIntPref(name, value);
+        } else {
+            Services.prefs.setStringPref(name, value);
+        }
+    }
+}
+"""
+
+
+def reset_script() -> str:
+    """Build the chrome script restoring a baseline.
+
+    The script runs the ``RESET_SCRIPT`` fragments of the notifications,
+    the panels, the history, the bookmarks and the add-ons, then restores
+    the prefs, and resolves with `None` or an error message. It takes the
+    :py:class:`Baseline` as its only argument.
+
+    Returns:
+        str: Asynchronous chrome script.
+
+    """
+    from foxpuppet.windows.browser.bookmarks.bookmark import Bookmark
+    from foxpuppet.windows.browser.notifications import NOTIFICATIONS, BaseNotification
+    from foxpuppet.windows.browser.notifications.addons import AddOnInstallConfirmation
+    from foxpuppet.windows.browser.panel_ui.panel_ui import History, PanelUI
+
+    fragments = [
+        BaseNotification.RESET_SCRIPT,
+        PanelUI.RESET_SCRIPT,
+        History.RESET_SCRIPT,
+        Bookmark.RESET_SCRIPT,
+        AddOnInstallConfirmation.RESET_SCRIPT,
+        PREFS_RESET_SCRIPT,
+    ]
+    body = "\n".join("{" + fragment + "}" for fragment in fragments)
+    return (
+        _READ_PREF_SCRIPT
+        + """
+const [baseline] = arguments;
+const resolve = arguments[arguments.length - 1];
+const notificationIds = """
+        + json.dumps(sorted(NOTIFICATIONS))
+        + """;
+(async () => {
+"""
+        + body
+        + """
+})().then(() => resolve(null), error => resolve(String(error)));
+"""
+    )
@@ -0,0 +1,271 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Replay a corpus of URL bar queries and report their latency.
+
+Run it with a corpus file holding one query per line::
+
+    python -m foxpuppet.benchmark queries.txt --output report.json \\
+        --seed-url http://127.0.0.1:8000/
+
+Firefox runs headless with remote suggestions off and all traffic except
+to localhost sent to a closed proxy port, so no query reaches the network.
+Without ``--profile`` a new profile is built by starting Firefox on it once,
+so the visits added with ``--seed-url`` go into the places database of the
+Firefox version under test.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Sequence, TypedDict
+from urllib.parse import quote
+
+if TYPE_CHECKING:
+    from foxpuppet.windows.browser.urlbar import UrlBar
+
+#: Prefs keeping URL bar queries local.
+OFFLINE_PREFS: dict[str, Any] = {
+    "remote.system-access-check.enabled": False,
+    "browser.search.suggest.enabled": False,
+    "browser.urlbar.suggest.searches": False,
+    "browser.urlbar.quicksuggest.enabled": False,
+    "browser.urlbar.suggest.quicksuggest.sponsored": False,
+    "browser.urlbar.suggest.quicksuggest.nonsponsored": False,
+    "browser.urlbar.merino.endpointURL": "",
+    "browser.urlbar.speculativeConnect.enabled": False,
+    "network.dns.disablePrefetch": True,
+    "network.http.speculative-parallel-limit": 0,
+    "network.proxy.type": 1,
+    "network.proxy.http": "127.0.0.1",
+    "network.proxy.http_port": 9,
+    "network.proxy.ssl": "127.0.0.1",
+    "network.proxy.ssl_port": 9,
+}
+
+#: Percentiles written to the report.
+PERCENTILES = (50, 95, 99)
+
+
+class QuerySample(TypedDict):
+    """Latency of one query of the corpus."""
+
+    #: Text typed into the URL bar.
+    query: str
+    #: Milliseconds to the first results, or None if none arrived.
+    first_result_ms: Optional[float]
+    #: Milliseconds to the end of the query, or None on timeout.
+    final_result_ms: Optional[float]
+    #: Number of results of the finished query.
+    result_count: int
+
+
+def load_corpus(path: str) -> list[str]:
+    """Read queries from a file, skipping blank lines and ``#`` comments.
+
+    Args:
+        path (str): Path of the corpus file.
+
+    Returns:
+        list: Queries in file order.
+
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = [line.rstrip("\r\n") for line in f]
+    return [line for line in lines if line.strip() and not line.startswith("#")]
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Compute a percentile, interpolating between the closest ranks.
+
+    Args:
+        values (sequence of float): Values in any order.
+        q (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile, or None if there are no values.
+
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: Sequence[QuerySample]) -> dict[str, Any]:
+    """Compute percentiles and result counts of benchmark samples.
+
+    Args:
+        samples (sequence of :py:class:`QuerySample`): Samples to summarize.
+
+    Returns:
+        dict: Query and timeout counts, percentiles of both timings and
+            result count statistics.
+
+    """
+    summary: dict[str, Any] = {
+        "queries": len(samples),
+        "timeouts": sum(1 for sample in samples if sample["final_result_ms"] is None),
+    }
+    timings = {
+        "first_result_ms": [sample["first_result_ms"] for sample in samples],
+        "final_result_ms": [sample["final_result_ms"] for sample in samples],
+    }
+    for name, timing in timings.items():
+        values = [value for value in timing if value is not None]
+        summary[name] = {"p{0}".format(q): percentile(values, q) for q in PERCENTILES}
+    counts = [sample["result_count"] for sample in samples]
+    summary["result_count"] = {
+        "total": sum(counts),
+        "mean": sum(counts) / len(counts) if counts else None,
+        "min": min(counts, default=None),
+        "max": max(counts, default=None),
+        "empty": counts.count(0),
+    }
+    return summary
+
+
+def run_benchmark(
+    url_bar: "UrlBar", queries: Iterable[str], batch_size: int = 50
+) -> list[QuerySample]:
+    """Replay queries in the URL bar and time them.
+
+    Args:
+        url_bar (:py:class:`~foxpuppet.windows.browser.urlbar.UrlBar`): URL
+            bar to type into.
+        queries (iterable of str): Queries to replay.
+        batch_size (int): Queries timed per chrome call. Defaults to 50.
+
+    Returns:
+        list: :py:class:`QuerySample` records in query order.
+
+    """
+    iterator = iter(queries)
+    samples: list[QuerySample] = []
+    while batch := list(itertools.islice(iterator, batch_size)):
+        for record in url_bar.measure_queries(batch):
+            samples.append(
+                {
+                    "query": record["text"],
+                    "first_result_ms": record["first_result_ms"],
+                    "final_result_ms": record["finished_ms"],
+                    "result_count": record["result_count"],
+                }
+            )
+    return samples
+
+
+def write_report(
+    path: str, samples: Sequence[QuerySample], **metadata: Any
+) -> dict[str, Any]:
+    """Write samples with their summary to a JSON file.
+
+    Args:
+        path (str): Path of the report.
+        samples (sequence of :py:class:`QuerySample`): Benchmark samples.
+        **metadata: Values stored with the report, e.g. the Firefox version.
+
+    Returns:
+        dict: The report written.
+
+    """
+    report = dict(metadata, summary=summarize(samples), samples=list(samples))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the benchmark from the command line.
+
+    Args:
+        argv (sequence of str, optional): Arguments. Defaults to
+            ``sys.argv``.
+
+    Returns:
+        int: Exit status.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="file with one query per line")
+    parser.add_argument("--output", default="urlbar-benchmark.json")
+    parser.add_argument(
+        "--profile",
+        help="profile directory Firefox started on before, cloned for the run",
+    )
+    parser.add_argument(
+        "--seed-url",
+        help="add a visit to this base URL plus the query for every query",
+    )
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--binary", help="Firefox binary to benchmark")
+    args = parser.parse_args(argv)
+
+    from selenium import webdriver
+    from selenium.webdriver.firefox.options import Options
+
+    from foxpuppet import FoxPuppet
+    from foxpuppet.profile import ProfileTemplate, launch_firefox
+    from foxpuppet.seed import PlacesWriter
+
+    def options() -> Options:
+        options = Options()
+        options.add_argument("-headless")
+        if args.binary:
+            options.binary_location = args.binary
+        return options
+
+    queries = load_corpus(args.corpus)
+    workspace = tempfile.mkdtemp(prefix="foxpuppet-benchmark-")
+    profile = None
+    try:
+        if args.profile:
+            template = ProfileTemplate(args.profile)
+        else:
+            template = ProfileTemplate(
+                os.path.join(workspace, "template"), prefs=OFFLINE_PREFS
+            )
+            template.build(warmup=lambda path: launch_firefox(path, options()))
+        profile = template.clone()
+        with open(os.path.join(profile, "user.js"), "a") as f:
+            f.writelines(
+                "user_pref({0}, {1});\n".format(json.dumps(name), json.dumps(value))
+                for name, value in OFFLINE_PREFS.items()
+            )
+        if args.seed_url:
+            path = os.path.join(profile, "places.sqlite")
+            with PlacesWriter(path, template.path) as places:
+                places.add_visits(
+                    {"url": args.seed_url + quote(query), "title": query}
+                    for query in queries
+                )
+        run_options = options()
+        run_options.add_argument("-profile")
+        run_options.add_argument(profile)
+        driver = webdriver.Firefox(options=run_options)
+        try:
+            url_bar = FoxPuppet(driver).browser.navbar.url_bar
+            samples = run_benchmark(url_bar, queries, batch_size=args.batch_size)
+            version = driver.capabilities.get("browserVersion")
+        finally:
+            driver.quit()
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+        if profile is not None:
+            shutil.rmtree(profile, ignore_errors=True)
+    report = write_report(args.output, samples, firefox=version, corpus=args.corpus)
+    json.dump(report["summary"], sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,34 @@
 
 from __future__ import absolute_import
 from selenium.webdriver.remote.webdriver import WebDriver
-from typing import Any, TYPE_CHECKING, Optional, Type
+from typing import Any, Callable, TYPE_CHECKING, Optional, Type
+
+if TYPE_CHECKING:
+    from foxpuppet.windows import BrowserWindow
+    from foxpuppet.windows.manager import WindowManager
+
+
+class WaitStatistics(object):
+    """Number of polls and time used by a wait.
+
+    Args:
+        polls (int): Number of times the condition was evaluated.
+        duration (float): Seconds spent waiting.
+    """
+
+    def __init__(self, polls: int, duration: float):
+        """Create WaitStatistics object.
+
+        Args:
+            polls (int): Number of times the condition was evaluated.
+            duration (float): Seconds spent waiting.
+        """
+        self.polls = polls
+        self.duration = duration
+
+    def __repr__(self) -> str:
+        """Return a readable representation of the statistics."""
+        return "WaitStatistics(polls={0.polls}, duration={0.duration:.3f})".format(self)
 
 
 class new_browser_window_is_opened(object):
@@ -16,7 +43,12 @@ class new_browser_window_is_opened(object):
 
     """
 
-    def __init__(self, selenium: WebDriver, handles: list[str]):
+    def __init__(
+        self,
+        selenium: WebDriver,
+        handles: list[str],
+        window_manager: Optional["WindowManager"] = None,
+    ):
         """Create new_browser_window_is_opened object.
 
         Args:
@@ -25,12 +57,14 @@ class new_browser_window_is_opened(object):
                 Firefox WebDriver object.
             handles: (:obj:`list` of str): List of current Firefox window
                 handles.
+            window_manager (:py:class:`~foxpuppet.windows.manager.WindowManager`,
+                optional): Manager the opened window is looked up in.
+                Defaults to the manager with the default wait policy.
         """
         self.selenium = selenium
         self.handles = handles
-
-    if TYPE_CHECKING:
-        from foxpuppet.windows import BrowserWindow  # Import for static typing
+        self.window_manager = window_manager
+        self.polls = 0
 
     def __call__(self, *args: Any, **kwargs: Any) -> Optional["BrowserWindow"]:
         """Check to see if a new window has opened.
@@ -39,10 +73,80 @@ class new_browser_window_is_opened(object):
             :py:class:`BrowserWindow`: Opened window.
 
         """
+        self.polls += 1
         handles = list(set(self.selenium.window_handles) - set(self.handles))
         if len(handles) == 1:
-            from foxpuppet.windows import BrowserWindow
+            from foxpuppet.windows.manager import WindowManager
 
-            return BrowserWindow(self.selenium, handles[0])
+            manager = self.window_manager or WindowManager.default(self.selenium)
+            return manager.get(handles[0])
         else:
             return None
+
+
+class region_is_displayed(object):
+    """An expectation for checking that a region of a given class is shown.
+
+    Unlike a lambda returning a boolean, the region object observed by the
+    successful poll is returned, so it does not need to be queried again.
+
+    Returns:
+        :py:class:`~foxpuppet.region.Region`: Displayed region.
+
+    """
+
+    def __init__(self, getter: Callable[[], Any], region_class: Type[Any]):
+        """Create region_is_displayed object.
+
+        Args:
+            getter (callable): Returns the currently displayed region, or
+                `None`.
+            region_class (type): Class the displayed region must be an
+                instance of.
+        """
+        self.getter = getter
+        self.region_class = region_class
+        self.polls = 0
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Check to see if a region of the expected class is displayed.
+
+        Returns:
+            :py:class:`~foxpuppet.region.Region`: Displayed region, or
+                `False`.
+
+        """
+        self.polls += 1
+        region = self.getter()
+        if isinstance(region, self.region_class):
+            return region
+        return False
+
+
+class region_is_closed(object):
+    """An expectation for checking that no region is shown.
+
+    Returns:
+        bool: True once no region is displayed.
+
+    """
+
+    def __init__(self, getter: Callable[[], Any]):
+        """Create region_is_closed object.
+
+        Args:
+            getter (callable): Returns the currently displayed region, or
+                `None`.
+        """
+        self.getter = getter
+        self.polls = 0
+
+    def __call__(self, *args: Any, **kwargs: Any) -> bool:
+        """Check to see if no region is displayed.
+
+        Returns:
+            bool: True if no region is displayed.
+
+        """
+        self.polls += 1
+        return self.getter() is None
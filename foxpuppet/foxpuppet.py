@@ -5,9 +5,19 @@
 
 from __future__ import absolute_import
 
-from foxpuppet.windows import WindowManager
+from typing import TYPE_CHECKING, ContextManager, Optional, Sequence
+
+from selenium.common.exceptions import WebDriverException
+
+from foxpuppet.baseline import BASELINE_SCRIPT, Baseline, reset_script
+from foxpuppet.session import Session
+from foxpuppet.wait import WaitPolicy
+from foxpuppet.windows.manager import WindowManager
 from selenium.webdriver.remote.webdriver import WebDriver
 
+if TYPE_CHECKING:
+    from foxpuppet.windows import BrowserWindow
+
 
 class FoxPuppet(object):
     """Set up the interface for interacting with the Firefox browser.
@@ -16,17 +26,119 @@ class FoxPuppet(object):
         selenium:
             (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
             Firefox WebDriver object.
+        wait_policy (:py:class:`~foxpuppet.wait.WaitPolicy`, optional):
+            Timeout and polling settings for every wait of this object's
+            windows.
     """
 
-    def __init__(self, selenium: WebDriver):
+    def __init__(self, selenium: WebDriver, wait_policy: Optional[WaitPolicy] = None):
         """Create FoxPuppet object.
 
         Args:
             selenium:
                 (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
                 Firefox WebDriver object.
+            wait_policy (:py:class:`~foxpuppet.wait.WaitPolicy`, optional):
+                Timeout and polling settings for every wait of this object's
+                windows. Other FoxPuppet objects of the same WebDriver are
+                not affected. Defaults to a 10 second timeout polling every
+                0.5 seconds.
         """
         self.selenium = selenium
-        self.window_manager = WindowManager(selenium)
-        # Need to ensure the first window is a browser window
-        self.browser = self.window_manager.windows[0]
+        self.session = Session.get(selenium)
+        if wait_policy is None:
+            self.window_manager = WindowManager.default(selenium)
+        else:
+            self.window_manager = WindowManager(selenium, wait_policy)
+        self._browser: Optional["BrowserWindow"] = None
+
+    def deadline(self, seconds: float) -> ContextManager[None]:
+        """Share one time budget between all waits in a block.
+
+        Every FoxPuppet wait started inside the block times out when the
+        budget runs out, even if its own timeout is longer. Composite
+        operations that chain several waits therefore fail after
+        ``seconds`` instead of a multiple of the timeout. Deadlines can be
+        nested; the inner one never extends the outer one.
+
+        Example::
+
+            with foxpuppet.deadline(5):
+                notification.close()
+
+        Args:
+            seconds (float): Seconds the block may spend waiting.
+
+        Returns:
+            Context manager applying the deadline.
+
+        """
+        return self.session.deadline(seconds)
+
+    def save_baseline(self, branches: Sequence[str] = ()) -> Baseline:
+        """Record the current prefs, add-ons and bookmarks as the state to reset to.
+
+        Call it right after the session started, before tests change
+        anything. Otherwise the state found by the first :py:meth:`reset`
+        becomes the baseline.
+
+        Only the prefs of the given branches are restored, so prefs that
+        Firefox writes while it runs keep their values::
+
+            foxpuppet.save_baseline(branches=["browser.urlbar.", "extensions."])
+
+        Args:
+            branches (list, optional): Pref branches restored on reset, or
+                ``[""]`` for all prefs. Defaults to none.
+
+        Returns:
+            :py:class:`~foxpuppet.baseline.Baseline`: Recorded baseline.
+
+        """
+        with self.session.context(self.selenium.CONTEXT_CHROME):
+            baseline: Baseline = self.selenium.execute_async_script(
+                BASELINE_SCRIPT, list(branches)
+            )
+        self.session.baseline = baseline
+        return baseline
+
+    def reset(self) -> None:
+        """Restore the browser to its baseline without restarting it.
+
+        All but the first window are closed through the window manager.
+        A single chrome script then dismisses notifications and panels,
+        clears history, removes the bookmarks and uninstalls the add-ons
+        added since the baseline, and restores the prefs of the baseline
+        branches. Finally the first window loads ``about:blank``.
+
+        Raises:
+            :py:class:`~selenium.common.exceptions.WebDriverException`: If
+                the browser could not be reset.
+
+        """
+        self.session.focus.invalidate()
+        windows = self.window_manager.windows
+        for window in windows[1:]:
+            window.close()
+        self._browser = windows[0]
+        self._browser.switch_to()
+        baseline = self.session.baseline or self.save_baseline()
+        with self.session.context(self.selenium.CONTEXT_CHROME):
+            error = self.selenium.execute_async_script(reset_script(), baseline)
+        if error:
+            raise WebDriverException("Reset failed: {0}".format(error))
+        with self.session.context(self.selenium.CONTEXT_CONTENT):
+            self.selenium.get("about:blank")
+
+    @property
+    def browser(self) -> "BrowserWindow":
+        """First browser window, looked up on first access.
+
+        Returns:
+            :py:class:`BrowserWindow`: FoxPuppet BrowserWindow object.
+
+        """
+        if self._browser is None:
+            # Need to ensure the first window is a browser window
+            self._browser = self.window_manager.windows[0]
+        return self._browser
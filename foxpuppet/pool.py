@@ -0,0 +1,275 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Pool of pre-launched Firefox sessions."""
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from foxpuppet.foxpuppet import FoxPuppet
+from foxpuppet.wait import WaitPolicy
+
+# Resident memory of the parent process and all content processes in bytes.
+MEMORY_SCRIPT = """
+const resolve = arguments[arguments.length - 1];
+ChromeUtils.requestProcInfo().then(
+    info => resolve(
+        info.children.reduce((total, child) => total + child.memory, info.memory)
+    ),
+    () => resolve(null),
+);
+"""
+
+
+class PooledSession(object):
+    """A Firefox session owned by a :py:class:`FoxPuppetPool`.
+
+    Args:
+        foxpuppet (:py:class:`~foxpuppet.FoxPuppet`): FoxPuppet object of
+            the session.
+    """
+
+    def __init__(self, foxpuppet: FoxPuppet) -> None:
+        """Create PooledSession object.
+
+        Args:
+            foxpuppet (:py:class:`~foxpuppet.FoxPuppet`): FoxPuppet object of
+                the session.
+        """
+        self.foxpuppet = foxpuppet
+        self.uses = 0
+
+    def memory_usage(self) -> Optional[int]:
+        """Measure the memory used by all Firefox processes of the session.
+
+        Returns:
+            int, optional: Resident bytes, or `None` if Firefox cannot
+                report it.
+
+        """
+        selenium = self.foxpuppet.selenium
+        with self.foxpuppet.session.context(selenium.CONTEXT_CHROME):
+            memory: Optional[int] = selenium.execute_async_script(MEMORY_SCRIPT)
+        return memory
+
+
+class FoxPuppetPool(object):
+    """Keep warm Firefox sessions ready for tests and workers.
+
+    Sessions are launched in the background with ``factory`` so the browser
+    startup is paid before a test asks for one. A released session is reset
+    and handed out again, until it has been used ``max_uses`` times or its
+    processes use more than ``max_memory`` bytes. It is then quit and a
+    fresh one is launched to replace it. Sessions that fail to reset are
+    replaced as well.
+
+    Each process, for example each ``pytest-xdist`` worker, keeps its own
+    pool::
+
+        pool = FoxPuppetPool(lambda: webdriver.Firefox(options=options), size=2)
+        with pool.session() as foxpuppet:
+            foxpuppet.browser.open_window()
+
+    Args:
+        factory (callable): Launches a new Firefox WebDriver session.
+        size (int): Number of sessions to keep. Defaults to 1.
+        max_uses (int, optional): Uses after which a session is replaced.
+            Defaults to no limit.
+        max_memory (int, optional): Resident bytes after which a session is
+            replaced. Defaults to no limit.
+        reset (callable, optional): Called with the FoxPuppet object of a
+            released session. Defaults to :py:meth:`FoxPuppet.reset
+            <foxpuppet.FoxPuppet.reset>`.
+        wait_policy (:py:class:`~foxpuppet.wait.WaitPolicy`, optional):
+            Wait policy of the sessions.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], WebDriver],
+        size: int = 1,
+        max_uses: Optional[int] = None,
+        max_memory: Optional[int] = None,
+        reset: Optional[Callable[[FoxPuppet], None]] = None,
+        wait_policy: Optional[WaitPolicy] = None,
+    ) -> None:
+        """Create FoxPuppetPool object.
+
+        Args:
+            factory (callable): Launches a new Firefox WebDriver session.
+            size (int): Number of sessions to keep. Defaults to 1.
+            max_uses (int, optional): Uses after which a session is
+                replaced. Defaults to no limit.
+            max_memory (int, optional): Resident bytes after which a session
+                is replaced. Defaults to no limit.
+            reset (callable, optional): Called with the FoxPuppet object of
+                a released session. Defaults to :py:meth:`FoxPuppet.reset
+                <foxpuppet.FoxPuppet.reset>`.
+            wait_policy (:py:class:`~foxpuppet.wait.WaitPolicy`, optional):
+                Wait policy of the sessions.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory = max_memory
+        self.reset = reset or FoxPuppet.reset
+        self.wait_policy = wait_policy
+        self._ready: "queue.Queue[Future[PooledSession]]" = queue.Queue()
+        self._in_use: dict[int, PooledSession] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+
+    def __enter__(self) -> "FoxPuppetPool":
+        """Launch the sessions."""
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Quit all sessions."""
+        self.close()
+
+    def start(self) -> None:
+        """Launch the sessions in the background, if not already started."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.size, thread_name_prefix="foxpuppet-pool"
+            )
+        for _ in range(self.size):
+            self._launch()
+
+    def acquire(self, timeout: Optional[float] = None) -> FoxPuppet:
+        """Take a session out of the pool.
+
+        Blocks until a session has finished launching.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a session.
+                Defaults to waiting forever.
+
+        Returns:
+            :py:class:`~foxpuppet.FoxPuppet`: FoxPuppet object of the session.
+
+        """
+        self.start()
+        try:
+            future = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No Firefox session became available.")
+        try:
+            session = future.result()
+        except Exception:
+            self._launch()  # keep the pool at its size, then report
+            raise
+        with self._lock:
+            self._in_use[id(session.foxpuppet)] = session
+        session.uses += 1
+        return session.foxpuppet
+
+    def release(self, foxpuppet: FoxPuppet) -> None:
+        """Return a session to the pool.
+
+        The session is reset, or replaced if it reached ``max_uses``, uses
+        more than ``max_memory`` or cannot be reset. Errors of the reset
+        other than a
+        :py:class:`~selenium.common.exceptions.WebDriverException` are
+        raised after the session was replaced. Sessions released after
+        :py:meth:`close` were already quit and are ignored.
+
+        Args:
+            foxpuppet (:py:class:`~foxpuppet.FoxPuppet`): FoxPuppet object
+                returned by :py:meth:`acquire`.
+        """
+        with self._lock:
+            session = self._in_use.pop(id(foxpuppet), None)
+        if session is None:
+            return
+        if self._worn_out(session):
+            self._quit(session)
+            self._launch()
+            return
+        try:
+            self.reset(foxpuppet)
+        except Exception as exc:
+            self._quit(session)
+            self._launch()
+            if not isinstance(exc, WebDriverException):
+                raise
+            return
+        future: "Future[PooledSession]" = Future()
+        future.set_result(session)
+        with self._lock:
+            if not self._closed:
+                self._ready.put(future)
+                return
+        self._quit(session)
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None) -> Iterator[FoxPuppet]:
+        """Use a session for the enclosed block.
+
+        Args:
+            timeout (float, optional): Seconds to wait for a session.
+        """
+        foxpuppet = self.acquire(timeout)
+        try:
+            yield foxpuppet
+        finally:
+            self.release(foxpuppet)
+
+    def close(self) -> None:
+        """Quit all sessions, including ones still launching."""
+        with self._lock:
+            self._closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        while not self._ready.empty():
+            future = self._ready.get_nowait()
+            if future.exception() is None:
+                self._quit(future.result())
+        with self._lock:
+            sessions = list(self._in_use.values())
+            self._in_use.clear()
+        for session in sessions:
+            self._quit(session)
+
+    def _launch(self) -> None:
+        with self._lock:
+            if self._closed or self._executor is None:
+                return
+            # queue sessions once launched, so released ones are not stuck behind
+            future = self._executor.submit(self._create)
+        future.add_done_callback(self._ready.put)
+
+    def _create(self) -> PooledSession:
+        foxpuppet = FoxPuppet(self.factory(), self.wait_policy)
+        if self.reset is FoxPuppet.reset:
+            foxpuppet.save_baseline()
+        return PooledSession(foxpuppet)
+
+    def _worn_out(self, session: PooledSession) -> bool:
+        if self.max_uses is not None and session.uses >= self.max_uses:
+            return True
+        if self.max_memory is not None:
+            try:
+                memory = session.memory_usage()
+            except WebDriverException:
+                return True
+            return memory is not None and memory > self.max_memory
+        return False
+
+    def _quit(self, session: PooledSession) -> None:
+        try:
+            session.foxpuppet.selenium.quit()
+        except WebDriverException:
+            pass  # the browser is already gone
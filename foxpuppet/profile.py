@@ -0,0 +1,210 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Firefox profiles built once and cloned for every session."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Any, Callable, Iterable, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+# ioctl request cloning a whole file on Linux filesystems with reflinks.
+_FICLONE = 0x40049409
+
+# Files Firefox never writes to once installed, safe to share by hardlink.
+_SHARED_SUFFIXES = (".xpi",)
+
+# Files that only describe a running Firefox and must not be cloned.
+_SKIPPED_FILES = {"lock", ".parentlock", "parent.lock"}
+
+_MARKER = "foxpuppet-template.json"
+
+
+class ProfileTemplate(object):
+    """A fully initialized Firefox profile that sessions start from.
+
+    :py:meth:`build` writes the prefs, installs the add-ons and copies in
+    seeded places data once, optionally starting Firefox on it so first
+    run work such as profile migration is done. It is skipped when the
+    template on disk was built from the same inputs. :py:meth:`clone`
+    then copies the template for a session, sharing add-ons by hardlink
+    and copying other files with reflinks where the filesystem supports
+    them. By default clones are made in ``/dev/shm`` when it exists.
+
+    Pass the clone to Firefox with the ``-profile`` argument rather than
+    :py:attr:`FirefoxOptions.profile
+    <selenium.webdriver.firefox.options.Options.profile>`, which zips and
+    copies the profile again::
+
+        options.add_argument("-profile")
+        options.add_argument(template.clone())
+
+    Args:
+        path (str): Directory of the template.
+        prefs (dict, optional): Prefs written to ``user.js``.
+        addons (iterable of str, optional): Paths of add-on ``.xpi`` files.
+        places (str, optional): Path of a ``places.sqlite`` database with
+            history and bookmarks.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        prefs: Optional[dict[str, Union[bool, int, str]]] = None,
+        addons: Iterable[str] = (),
+        places: Optional[str] = None,
+    ) -> None:
+        """Create ProfileTemplate object.
+
+        Args:
+            path (str): Directory of the template.
+            prefs (dict, optional): Prefs written to ``user.js``.
+            addons (iterable of str, optional): Paths of add-on ``.xpi``
+                files.
+            places (str, optional): Path of a ``places.sqlite`` database
+                with history and bookmarks.
+        """
+        self.path = path
+        self.prefs = dict(prefs or {})
+        self.addons = list(addons)
+        self.places = places
+
+    def build(self, warmup: Optional[Callable[[str], Any]] = None) -> bool:
+        """Create the template unless it is already up to date.
+
+        Args:
+            warmup (callable, optional): Called with the template path after
+                it was written, for example :py:func:`launch_firefox`.
+
+        Returns:
+            bool: True if the template was (re)built.
+
+        """
+        digest = self._digest(warmup)
+        marker = os.path.join(self.path, _MARKER)
+        try:
+            with open(marker) as f:
+                if json.load(f).get("digest") == digest:
+                    return False
+        except (OSError, ValueError):
+            pass
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(os.path.join(self.path, "extensions"))
+        with open(os.path.join(self.path, "user.js"), "w") as f:
+            for name, value in sorted(self.prefs.items()):
+                f.write(
+                    "user_pref({0}, {1});\n".format(json.dumps(name), json.dumps(value))
+                )
+        for addon in self.addons:
+            target = os.path.join(self.path, "extensions", addon_id(addon) + ".xpi")
+            shutil.copyfile(addon, target)
+        if self.places is not None:
+            shutil.copyfile(self.places, os.path.join(self.path, "places.sqlite"))
+        if warmup is not None:
+            warmup(self.path)
+        with open(marker, "w") as f:
+            json.dump({"digest": digest}, f)
+        return True
+
+    def clone(self, destination: Optional[str] = None) -> str:
+        """Copy the template to a new profile directory.
+
+        Args:
+            destination (str, optional): Directory to create. Defaults to a
+                new directory in ``/dev/shm`` or the temporary directory.
+
+        Returns:
+            str: Path of the new profile.
+
+        """
+        if destination is None:
+            parent = "/dev/shm" if os.access("/dev/shm", os.W_OK) else None
+            destination = tempfile.mkdtemp(prefix="foxpuppet-profile-", dir=parent)
+            os.rmdir(destination)
+        shutil.copytree(
+            self.path,
+            destination,
+            ignore=lambda directory, names: [
+                name for name in names if name in _SKIPPED_FILES or name == _MARKER
+            ],
+            copy_function=_clone_file,
+        )
+        return destination
+
+    def _digest(self, warmup: Optional[Callable[[str], Any]]) -> str:
+        inputs: list[Any] = [sorted(self.prefs.items()), warmup is not None]
+        for path in self.addons + ([self.places] if self.places else []):
+            stat = os.stat(path)
+            inputs.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+        return hashlib.sha256(json.dumps(inputs).encode("utf-8")).hexdigest()
+
+
+def addon_id(path: str) -> str:
+    """Read the id of a WebExtension package.
+
+    Args:
+        path (str): Path of the ``.xpi`` file.
+
+    Returns:
+        str: Add-on id from ``browser_specific_settings`` in the manifest.
+
+    """
+    with zipfile.ZipFile(path) as xpi:
+        manifest = json.loads(xpi.read("manifest.json"))
+    settings = manifest.get("browser_specific_settings") or manifest.get("applications")
+    try:
+        return str(settings["gecko"]["id"])
+    except (KeyError, TypeError):
+        raise ValueError("{0} does not declare an add-on id".format(path))
+
+
+def launch_firefox(
+    path: str, options: Optional[Any] = None, service: Optional[Any] = None
+) -> None:
+    """Start and quit Firefox once on a profile to complete first run work.
+
+    Args:
+        path (str): Profile directory.
+        options (:py:class:`~selenium.webdriver.firefox.options.Options`,
+            optional): Options to start Firefox with. Defaults to headless.
+        service (:py:class:`~selenium.webdriver.firefox.service.Service`,
+            optional): Service starting geckodriver. Defaults to the one
+            found by Selenium.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.firefox.options import Options
+
+    if options is None:
+        options = Options()
+        options.add_argument("-headless")
+    options.add_argument("-profile")
+    options.add_argument(path)
+    webdriver.Firefox(options=options, service=service).quit()
+
+
+def _clone_file(source: str, destination: str) -> str:
+    if source.endswith(_SHARED_SUFFIXES):
+        try:
+            os.link(source, destination)
+            return destination
+        except OSError:
+            pass  # different filesystem
+    if fcntl is not None:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            except OSError:
+                pass  # no reflinks here, copy below
+            else:
+                shutil.copystat(source, destination)
+                return destination
+    shutil.copy2(source, destination)
+    return destination
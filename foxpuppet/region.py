@@ -3,12 +3,17 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 """A Region object model for interacting with different parts of Firefox."""
 
+from typing import TYPE_CHECKING, Optional
+
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.common.action_chains import ActionChains
+from foxpuppet.session import ContextTracker
+from foxpuppet.wait import Wait
 from foxpuppet.windows import BaseWindow
 
+if TYPE_CHECKING:
+    from selenium.webdriver.common.action_chains import ActionChains
+
 
 class Region(object):
     """A region object.
@@ -37,6 +42,31 @@ class Region(object):
         """
         self.root: WebElement = root
         self.selenium: WebDriver = window.selenium
-        self.wait: WebDriverWait = window.wait
         self.window: BaseWindow = window
-        self.actions: ActionChains = ActionChains(self.selenium)
+        self.context: ContextTracker = window.context
+        self._actions: Optional["ActionChains"] = None
+
+    @property
+    def actions(self) -> "ActionChains":
+        """Action chain for this region, created on first use.
+
+        Returns:
+            :py:class:`~selenium.webdriver.common.action_chains.ActionChains`:
+                Action chain object.
+
+        """
+        if self._actions is None:
+            from selenium.webdriver.common.action_chains import ActionChains
+
+            self._actions = ActionChains(self.selenium)
+        return self._actions
+
+    @property
+    def wait(self) -> Wait:
+        """Wait object following the session's wait policy.
+
+        Returns:
+            :py:class:`~foxpuppet.wait.Wait`: Wait object.
+
+        """
+        return self.window.wait
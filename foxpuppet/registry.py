@@ -0,0 +1,89 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Registries mapping Firefox element ids to FoxPuppet classes."""
+
+from importlib.metadata import entry_points
+from typing import Callable, Iterator, Mapping, TypeVar
+
+C = TypeVar("C", bound=type)
+
+
+class Registry(Mapping[str, type]):
+    """Maps element ids to the FoxPuppet class that models the element.
+
+    FoxPuppet's own classes are added with the :py:meth:`register`
+    decorator when their module is imported. Other packages can add classes
+    without patching FoxPuppet by declaring entry points in the registry's
+    group, named after the element id::
+
+        [project.entry-points."foxpuppet.notifications"]
+        my-notification = "my_package.notifications:MyNotification"
+
+    Entry points are loaded once, the first time the registry is read, and
+    do not replace classes registered by FoxPuppet.
+
+    Args:
+        group (str): Entry point group used to discover extra classes.
+    """
+
+    def __init__(self, group: str) -> None:
+        """Create Registry object.
+
+        Args:
+            group (str): Entry point group used to discover extra classes.
+        """
+        self.group = group
+        self._classes: dict[str, type] = {}
+        self._loaded = False
+
+    def register(self, *ids: str) -> Callable[[C], C]:
+        """Class decorator registering a class for one or more element ids.
+
+        Args:
+            ids (str): Ids of the elements modelled by the class.
+
+        Returns:
+            Decorator returning the class unchanged.
+
+        """
+
+        def decorator(cls: C) -> C:
+            for _id in ids:
+                self._classes[_id] = cls
+            return cls
+
+        return decorator
+
+    def ids_for(self, cls: type) -> list[str]:
+        """Return the ids of elements modelled by a class or its subclasses.
+
+        Args:
+            cls (type): FoxPuppet class.
+
+        Returns:
+            list: Element ids.
+
+        """
+        return [_id for _id, registered in self.items() if issubclass(registered, cls)]
+
+    def _load_entry_points(self) -> None:
+        self._loaded = True
+        for entry_point in entry_points(group=self.group):
+            if entry_point.name not in self._classes:
+                self._classes[entry_point.name] = entry_point.load()
+
+    def __getitem__(self, _id: str) -> type:
+        if not self._loaded:
+            self._load_entry_points()
+        return self._classes[_id]
+
+    def __iter__(self) -> Iterator[str]:
+        if not self._loaded:
+            self._load_entry_points()
+        return iter(self._classes)
+
+    def __len__(self) -> int:
+        if not self._loaded:
+            self._load_entry_points()
+        return len(self._classes)
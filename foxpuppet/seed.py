@@ -0,0 +1,471 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Write bookmarks and history into ``places.sqlite`` before Firefox starts."""
+
+import base64
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
+from urllib.parse import quote, urlsplit, urlunsplit
+
+if TYPE_CHECKING:
+    from foxpuppet.windows.browser.bookmarks.bookmark import BookmarkData
+    from foxpuppet.windows.browser.panel_ui.places import VisitData
+
+_TYPE_BOOKMARK = 1
+_TYPE_FOLDER = 2
+_TRANSITION_LINK = 1
+_SYNC_STATUS_NEW = 1
+
+# Visits with these transitions do not count as visits of the page:
+# embed, framed link, reload and download.
+_UNCOUNTED_TRANSITIONS = {4, 7, 8, 9}
+
+_GOLDEN_RATIO = 0x9E3779B9
+
+_DEFAULT_PORTS = {"http": 80, "https": 443, "ftp": 21, "ws": 80, "wss": 443}
+
+# Characters left as they are in the path, query and fragment of a URL.
+_URL_SAFE = "/?#%:@!$&'()*+,;=-._~[]"
+
+
+def hash_string(value: str) -> int:
+    """Hash a string like ``mozilla::HashString`` does for C strings.
+
+    Args:
+        value (str): String to hash, as UTF-8.
+
+    Returns:
+        int: 32 bit hash.
+
+    """
+    return _hash_bytes(value.encode("utf-8"))
+
+
+def url_hash(url: str) -> int:
+    """Compute the ``url_hash`` column of a URL.
+
+    The hash of the scheme goes into the upper 16 of 48 bits, so Firefox
+    can find all URLs of a scheme with a range query.
+
+    Args:
+        url (str): URL to hash.
+
+    Returns:
+        int: Hash as stored by Firefox.
+
+    """
+    head = _hash_bytes(url.encode("utf-8")[:1500])
+    scheme, colon, _ = url.partition(":")
+    if not colon:
+        return head
+    return ((hash_string(scheme) & 0xFFFF) << 32) + head
+
+
+def normalize_url(url: str) -> str:
+    """Write a URL the way Firefox stores it in ``moz_places``.
+
+    The scheme and host are lower cased, the host is IDNA encoded, a
+    default port is dropped, an empty path of a web URL becomes ``/`` and
+    characters not allowed in URLs are percent encoded.
+
+    Args:
+        url (str): URL as typed or linked.
+
+    Returns:
+        str: Normalised URL.
+
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    path = quote(parts.path, safe=_URL_SAFE)
+    query = quote(parts.query, safe=_URL_SAFE)
+    fragment = quote(parts.fragment, safe=_URL_SAFE)
+    if not parts.netloc:
+        return urlunsplit((scheme, "", path, query, fragment))
+    userinfo, at, _ = parts.netloc.rpartition("@")
+    host = (parts.hostname or "").encode("idna").decode("ascii")
+    if ":" in host:
+        host = "[{0}]".format(host)
+    netloc = userinfo + at + host
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc += ":{0}".format(parts.port)
+    if not path and scheme in _DEFAULT_PORTS:
+        path = "/"
+    return urlunsplit((scheme, netloc, path, query, fragment))
+
+
+def rev_host(url: str) -> str:
+    """Compute the reversed host of a URL, as stored in ``rev_host``.
+
+    Args:
+        url (str): URL of the page.
+
+    Returns:
+        str: Host reversed and lower cased, followed by a dot.
+
+    """
+    return (urlsplit(url).hostname or "")[::-1] + "."
+
+
+def make_guid() -> str:
+    """Create a random places GUID.
+
+    Returns:
+        str: 12 URL safe base64 characters.
+
+    """
+    return base64.urlsafe_b64encode(os.urandom(9)).decode("ascii")
+
+
+class PlacesWriter(object):
+    """Writes bookmarks and visits straight into a places database.
+
+    Use it while Firefox is not running on the profile. The schema is
+    taken from a template profile that the Firefox version under test
+    already started on, such as a
+    :py:class:`~foxpuppet.profile.ProfileTemplate` built with
+    :py:func:`~foxpuppet.profile.launch_firefox` as warmup. A missing
+    database is copied from the template, and a database with another
+    schema version than the template is refused.
+
+    Every call writes its records in a single transaction::
+
+        path = os.path.join(profile, "places.sqlite")
+        with PlacesWriter(path, template.path) as places:
+            places.add_bookmarks(bookmarks, folder="toolbar")
+            places.add_visits(visits)
+
+    URLs are normalised like Firefox does before they are stored.
+    Frecencies are estimated from the visit counts and flagged for Firefox
+    to recalculate.
+
+    Args:
+        path (str): Path of ``places.sqlite``.
+        template (str): Profile directory whose ``places.sqlite`` was
+            created by the Firefox version under test.
+    """
+
+    def __init__(self, path: str, template: str) -> None:
+        """Create PlacesWriter object.
+
+        Args:
+            path (str): Path of ``places.sqlite``.
+            template (str): Profile directory whose ``places.sqlite`` was
+                created by the Firefox version under test.
+
+        Raises:
+            ValueError: If the template has no places database, or the
+                database has another schema version than the template.
+        """
+        self.path = path
+        self.schema_version = schema_version(template)
+        if not os.path.exists(path):
+            _copy_database(os.path.join(template, "places.sqlite"), path)
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.schema_version:
+            self.connection.close()
+            raise ValueError(
+                "{0} has places schema {1}, but the template has {2}".format(
+                    path, version, self.schema_version
+                )
+            )
+        self._places: dict[str, int] = {}
+        self._origins: dict[tuple[str, str], int] = {}
+
+    def add_bookmarks(
+        self, bookmarks: Iterable["BookmarkData"], folder: str = "unfiled"
+    ) -> int:
+        """Add bookmarks with their tags and keywords.
+
+        Args:
+            bookmarks (iterable of :py:class:`BookmarkData`): Bookmarks to
+                add.
+            folder (str): ``menu``, ``toolbar``, ``unfiled``, ``mobile`` or
+                the GUID of a folder. Defaults to ``unfiled``.
+
+        Returns:
+            int: Number of bookmarks added.
+
+        """
+        from foxpuppet.windows.browser.bookmarks.places import folder_guid
+
+        now = _now()
+        added = 0
+        with self._transaction():
+            parent = self._folder_id(folder_guid(folder))
+            positions = {parent: self._next_position(parent)}
+            tag_folders: dict[str, int] = {}
+            rows: list[tuple[Any, ...]] = []
+            references: dict[int, int] = {}
+
+            def add(place: int, folder: int, title: Optional[str]) -> None:
+                rows.append(
+                    (_TYPE_BOOKMARK, place, folder, positions[folder], title)
+                    + (now, now, make_guid(), _SYNC_STATUS_NEW)
+                )
+                positions[folder] += 1
+                references[place] = references.get(place, 0) + 1
+
+            for bookmark in bookmarks:
+                place = self._place_id(bookmark["url"], bookmark["name"])
+                add(place, parent, bookmark["name"])
+                added += 1
+                for tag in bookmark.get("tags") or []:
+                    if tag not in tag_folders:
+                        tag_folders[tag] = self._tag_folder_id(tag, now)
+                        positions[tag_folders[tag]] = self._next_position(
+                            tag_folders[tag]
+                        )
+                    add(place, tag_folders[tag], None)
+                if keyword := bookmark.get("keyword"):
+                    previous = self.connection.execute(
+                        "SELECT place_id FROM moz_keywords WHERE keyword = ?", (keyword,)
+                    ).fetchone()
+                    if previous is not None:
+                        references[previous[0]] = references.get(previous[0], 0) - 1
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO moz_keywords (keyword, place_id) "
+                        "VALUES (?, ?)",
+                        (keyword, place),
+                    )
+                    references[place] += 1
+            self.connection.executemany(
+                "INSERT INTO moz_bookmarks (type, fk, parent, position, title, "
+                "dateAdded, lastModified, guid, syncStatus) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.connection.executemany(
+                "UPDATE moz_places SET foreign_count = foreign_count + ? WHERE id = ?",
+                [(count, place) for place, count in references.items()],
+            )
+            self._update_frecency(references)
+        return added
+
+    def add_visits(self, visits: Iterable["VisitData"]) -> int:
+        """Add visits to the history.
+
+        Args:
+            visits (iterable of :py:class:`VisitData`): Visits to add.
+
+        Returns:
+            int: Number of visits added.
+
+        """
+        now = _now()
+        rows: list[tuple[int, int, int]] = []
+        counts: dict[int, int] = {}
+        last: dict[int, int] = {}
+        with self._transaction():
+            for visit in visits:
+                place = self._place_id(visit["url"], visit.get("title"))
+                date = visit.get("date")
+                visited = now if date is None else round(date.timestamp() * 1000000)
+                transition = visit.get("transition", _TRANSITION_LINK)
+                rows.append((place, visited, transition))
+                if transition not in _UNCOUNTED_TRANSITIONS:
+                    counts[place] = counts.get(place, 0) + 1
+                last[place] = max(last.get(place, 0), visited)
+            self.connection.executemany(
+                "INSERT INTO moz_historyvisits "
+                "(from_visit, place_id, visit_date, visit_type, session) "
+                "VALUES (0, ?, ?, ?, 0)",
+                rows,
+            )
+            self.connection.executemany(
+                "UPDATE moz_places SET visit_count = visit_count + ?, "
+                "last_visit_date = MAX(IFNULL(last_visit_date, 0), ?) WHERE id = ?",
+                [(counts.get(place, 0), date, place) for place, date in last.items()],
+            )
+            self._update_frecency(last)
+        return len(rows)
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self) -> "PlacesWriter":
+        """Return the writer for use in a with statement."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the database."""
+        self.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self.connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            self._places.clear()
+            self._origins.clear()
+            raise
+        self.connection.execute("COMMIT")
+
+    def _folder_id(self, guid: str) -> int:
+        row = self.connection.execute(
+            "SELECT id FROM moz_bookmarks WHERE guid = ? AND type = ?",
+            (guid, _TYPE_FOLDER),
+        ).fetchone()
+        if row is None:
+            raise ValueError("No bookmark folder with GUID {0}".format(guid))
+        return int(row[0])
+
+    def _next_position(self, folder: int) -> int:
+        row = self.connection.execute(
+            "SELECT IFNULL(MAX(position) + 1, 0) FROM moz_bookmarks WHERE parent = ?",
+            (folder,),
+        ).fetchone()
+        return int(row[0])
+
+    def _tag_folder_id(self, tag: str, now: int) -> int:
+        tags = self._folder_id("tags________")
+        row = self.connection.execute(
+            "SELECT id FROM moz_bookmarks WHERE parent = ? AND title = ?", (tags, tag)
+        ).fetchone()
+        if row is not None:
+            return int(row[0])
+        cursor = self.connection.execute(
+            "INSERT INTO moz_bookmarks (type, parent, position, title, dateAdded, "
+            "lastModified, guid, syncStatus) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                _TYPE_FOLDER,
+                tags,
+                self._next_position(tags),
+                tag,
+                now,
+                now,
+                make_guid(),
+                _SYNC_STATUS_NEW,
+            ),
+        )
+        return int(cursor.lastrowid or 0)
+
+    def _place_id(self, url: str, title: Optional[str]) -> int:
+        url = normalize_url(url)
+        place = self._places.get(url)
+        if place is None:
+            hashed = url_hash(url)
+            row = self.connection.execute(
+                "SELECT id FROM moz_places WHERE url_hash = ? AND url = ?", (hashed, url)
+            ).fetchone()
+            if row is not None:
+                place = int(row[0])
+            else:
+                cursor = self.connection.execute(
+                    "INSERT INTO moz_places (url, title, rev_host, hidden, frecency, "
+                    "guid, url_hash, origin_id, recalc_frecency) "
+                    "VALUES (?, ?, ?, 0, 0, ?, ?, ?, 1)",
+                    (
+                        url,
+                        title,
+                        rev_host(url),
+                        make_guid(),
+                        hashed,
+                        self._origin_id(url),
+                    ),
+                )
+                place = int(cursor.lastrowid or 0)
+            self._places[url] = place
+        return place
+
+    def _origin_id(self, url: str) -> Optional[int]:
+        parts = urlsplit(url)
+        if not parts.netloc:
+            return None
+        key = (parts.scheme + "://", parts.netloc.rpartition("@")[2].lower())
+        origin = self._origins.get(key)
+        if origin is None:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO moz_origins (prefix, host, frecency, "
+                "recalc_frecency) VALUES (?, ?, 0, 1)",
+                key,
+            )
+            origin = int(
+                self.connection.execute(
+                    "SELECT id FROM moz_origins WHERE prefix = ? AND host = ?", key
+                ).fetchone()[0]
+            )
+            self._origins[key] = origin
+        return origin
+
+    def _update_frecency(self, places: Iterable[int]) -> None:
+        # A rough estimate so the URL bar finds the pages straight away.
+        places = list(places)
+        self.connection.executemany(
+            "UPDATE moz_places SET frecency = 100 * visit_count + "
+            "(CASE WHEN foreign_count > 0 THEN 140 ELSE 0 END), recalc_frecency = 1 "
+            "WHERE id = ?",
+            [(place,) for place in places],
+        )
+        origins = {
+            row[0]
+            for row in self.connection.execute(
+                "SELECT DISTINCT origin_id FROM moz_places "
+                "WHERE recalc_frecency = 1 AND origin_id IS NOT NULL"
+            )
+        }
+        self.connection.executemany(
+            "UPDATE moz_origins SET frecency = (SELECT IFNULL(SUM(frecency), 0) "
+            "FROM moz_places WHERE origin_id = moz_origins.id), recalc_frecency = 1 "
+            "WHERE id = ?",
+            [(origin,) for origin in origins],
+        )
+
+
+def schema_version(profile: str) -> int:
+    """Read the places schema version of a profile.
+
+    Args:
+        profile (str): Profile directory Firefox started on.
+
+    Returns:
+        int: ``user_version`` of its ``places.sqlite``.
+
+    Raises:
+        ValueError: If the profile has no places database.
+
+    """
+    path = os.path.join(profile, "places.sqlite")
+    if not os.path.exists(path):
+        raise ValueError(
+            "{0} has no places.sqlite, start Firefox on it first".format(profile)
+        )
+    connection = sqlite3.connect("file:{0}?mode=ro".format(quote(path)), uri=True)
+    try:
+        version: int = connection.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        connection.close()
+    if not version:
+        raise ValueError("{0} is not a places database".format(path))
+    return version
+
+
+def _copy_database(source: str, destination: str) -> None:
+    # The backup API includes changes still in the write-ahead log.
+    db = sqlite3.connect("file:{0}?mode=ro".format(quote(source)), uri=True)
+    target = sqlite3.connect(destination)
+    try:
+        db.backup(target)
+    finally:
+        target.close()
+        db.close()
+
+
+def _hash_bytes(data: bytes) -> int:
+    result = 0
+    for byte in data:
+        rotated = ((result << 5) | (result >> 27)) & 0xFFFFFFFF
+        result = (_GOLDEN_RATIO * (rotated ^ byte)) & 0xFFFFFFFF
+    return result
+
+
+def _now() -> int:
+    return time.time_ns() // 1000
@@ -0,0 +1,238 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Per-session state shared by all FoxPuppet windows and regions."""
+
+import weakref
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from foxpuppet.wait import Deadlines
+from foxpuppet.windows.events import WindowEvents
+
+if TYPE_CHECKING:
+    from foxpuppet.baseline import Baseline
+    from foxpuppet.windows.manager import WindowManager
+
+
+class ContextTracker(object):
+    """Track the WebDriver context and only switch it when it changes.
+
+    Use it like :py:meth:`~selenium.webdriver.firefox.webdriver.WebDriver.context`.
+    Nested blocks for the context that is already active do not send any
+    command, and the context found before the outermost block is restored
+    when it exits.
+
+    The context is queried again on entry to the outermost block, since
+    code outside FoxPuppet may have switched it with ``selenium.context``
+    or ``set_context`` in the meantime. Inside a block it is cached, so
+    switching the context directly within a FoxPuppet block is not seen by
+    nested blocks.
+
+    Args:
+        selenium:
+            (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+            Firefox WebDriver object.
+    """
+
+    def __init__(self, selenium: WebDriver) -> None:
+        """Create ContextTracker object.
+
+        Args:
+            selenium:
+                (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+                Firefox WebDriver object.
+        """
+        self.selenium = weakref.proxy(selenium)
+        self._current: Optional[str] = None
+        self._depth = 0
+
+    @property
+    def current(self) -> str:
+        """Context WebDriver commands are currently sent to.
+
+        Returns:
+            str: Either ``"chrome"`` or ``"content"``.
+
+        """
+        if self._current is None:
+            self._current = self.selenium.execute("GET_CONTEXT").pop("value")
+        return self._current
+
+    def invalidate(self) -> None:
+        """Forget the cached context so it is queried again on next use."""
+        self._current = None
+
+    @contextmanager
+    def __call__(self, context: str) -> Iterator[None]:
+        """Run the enclosed commands in the given context.
+
+        Args:
+            context (str): Context to use, e.g. ``selenium.CONTEXT_CHROME``.
+        """
+        if self._depth == 0:
+            self._current = None
+        previous = self.current
+        if context != previous:
+            self._set(context)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._current != previous:
+                self._set(previous)
+
+    def _set(self, context: str) -> None:
+        self._current = None
+        self.selenium.set_context(context)
+        self._current = context
+
+
+class FocusTracker(object):
+    """Track the focused window handle and skip no-op window switches.
+
+    The handle is recorded by every switch made through FoxPuppet and
+    trusted until FoxPuppet closes or opens a window or resets the browser,
+    so switching to the focused window sends no command and any other
+    switch sends one. Window handles are the same in the chrome and content
+    contexts. Switches made directly through Selenium are not seen; call
+    :py:meth:`invalidate` after them.
+
+    Args:
+        selenium:
+            (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+            Firefox WebDriver object.
+    """
+
+    def __init__(self, selenium: WebDriver) -> None:
+        """Create FocusTracker object.
+
+        Args:
+            selenium:
+                (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+                Firefox WebDriver object.
+        """
+        self.selenium = weakref.proxy(selenium)
+        self._handle: Optional[str] = None
+
+    @property
+    def current_handle(self) -> str:
+        """Handle of the window that currently has focus.
+
+        Returns:
+            str: WebDriver Firefox window handle.
+
+        """
+        if self._handle is None:
+            self._handle = self.selenium.current_window_handle
+        return self._handle
+
+    def record(self, handle: Optional[str]) -> None:
+        """Record that a window got focus.
+
+        Args:
+            handle: (str, optional): WebDriver Firefox window handle, or
+                `None` if the focused window is not known.
+        """
+        self._handle = handle
+
+    def invalidate(self) -> None:
+        """Forget the focused window so it is looked up on next use."""
+        self._handle = None
+
+    def switch(self, handle: str) -> None:
+        """Switch focus to a window unless it already has focus.
+
+        Args:
+            handle: (str): WebDriver Firefox window handle.
+        """
+        if self._handle != handle:
+            self.selenium.switch_to.window(handle)
+            self._handle = handle
+
+
+class Session(object):
+    """State FoxPuppet keeps for a single WebDriver session.
+
+    Windows and regions are created in many places from just a WebDriver
+    object, so the state is looked up by driver with :py:meth:`get`.
+
+    Args:
+        selenium:
+            (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+            Firefox WebDriver object.
+    """
+
+    _sessions: "weakref.WeakKeyDictionary[WebDriver, Session]" = (
+        weakref.WeakKeyDictionary()
+    )
+
+    def __init__(self, selenium: WebDriver) -> None:
+        """Create Session object.
+
+        Args:
+            selenium:
+                (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+                Firefox WebDriver object.
+        """
+        self.context: ContextTracker = ContextTracker(selenium)
+        self.focus: FocusTracker = FocusTracker(selenium)
+        self.selenium = weakref.proxy(selenium)
+        self._window_manager: Optional["weakref.ref[WindowManager]"] = None
+        self.deadline: Deadlines = Deadlines()
+        self._window_events = WindowEvents(selenium)
+        self._window_events_started = False
+        self.baseline: Optional["Baseline"] = None
+
+    @property
+    def window_manager(self) -> Optional["WindowManager"]:
+        """Window manager with the default wait policy, while one is in use.
+
+        It is referenced weakly, since it references the WebDriver object.
+        See :py:meth:`~foxpuppet.windows.manager.WindowManager.default`.
+
+        Returns:
+            :py:class:`~foxpuppet.windows.manager.WindowManager`: Window
+                manager, or `None`.
+
+        """
+        return self._window_manager() if self._window_manager else None
+
+    @window_manager.setter
+    def window_manager(self, manager: "WindowManager") -> None:
+        self._window_manager = weakref.ref(manager)
+
+    @property
+    def window_events(self) -> WindowEvents:
+        """Window and tab lifecycle events, subscribed to on first use.
+
+        Returns:
+            :py:class:`~foxpuppet.windows.events.WindowEvents`: Lifecycle
+                events. Check ``enabled`` before relying on them.
+
+        """
+        if not self._window_events_started:
+            self._window_events_started = True
+            self._window_events.start()
+        return self._window_events
+
+    @classmethod
+    def get(cls, selenium: WebDriver) -> "Session":
+        """Return the session state for a WebDriver, creating it if needed.
+
+        Args:
+            selenium:
+                (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+                Firefox WebDriver object.
+
+        Returns:
+            :py:class:`Session`: Session state for the WebDriver.
+
+        """
+        session = cls._sessions.get(selenium)
+        if session is None:
+            session = cls._sessions[selenium] = cls(selenium)
+        return session
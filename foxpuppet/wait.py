@@ -0,0 +1,237 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Wait policy and the wait object used by FoxPuppet windows and regions."""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+class WaitPolicy(object):
+    """Timeout and polling settings applied to every FoxPuppet wait.
+
+    The first poll happens immediately. The interval before the next poll
+    starts at ``poll_frequency`` and is multiplied by ``backoff`` after
+    every poll, up to ``max_poll_frequency``. A ``backoff`` of 1 polls at a
+    fixed interval like :py:class:`~selenium.webdriver.support.wait.WebDriverWait`.
+
+    Args:
+        timeout (float): Seconds before a wait gives up. Defaults to 10.
+        poll_frequency (float): Seconds between the first two polls.
+            Defaults to 0.5.
+        backoff (float): Factor applied to the interval after each poll.
+            Defaults to 1.
+        max_poll_frequency (float, optional): Upper bound for the interval.
+            Defaults to no bound.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10,
+        poll_frequency: float = 0.5,
+        backoff: float = 1,
+        max_poll_frequency: Optional[float] = None,
+    ) -> None:
+        """Create WaitPolicy object.
+
+        Args:
+            timeout (float): Seconds before a wait gives up. Defaults to 10.
+            poll_frequency (float): Seconds between the first two polls.
+                Defaults to 0.5.
+            backoff (float): Factor applied to the interval after each poll.
+                Defaults to 1.
+            max_poll_frequency (float, optional): Upper bound for the
+                interval. Defaults to no bound.
+        """
+        if timeout < 0 or poll_frequency <= 0:
+            raise ValueError("timeout must not be negative and poll_frequency positive")
+        if backoff < 1:
+            raise ValueError("backoff must be at least 1")
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.backoff = backoff
+        self.max_poll_frequency = max_poll_frequency
+
+    def intervals(self) -> Iterator[float]:
+        """Yield the sleep intervals between consecutive polls.
+
+        Yields:
+            float: Seconds to sleep before the next poll.
+
+        """
+        interval = self.poll_frequency
+        while True:
+            if self.max_poll_frequency is not None:
+                interval = min(interval, self.max_poll_frequency)
+            yield interval
+            interval *= self.backoff
+
+    def create(
+        self, selenium: WebDriver, deadlines: Optional["Deadlines"] = None
+    ) -> "Wait":
+        """Create a wait object following this policy.
+
+        Args:
+            selenium:
+                (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+                Firefox WebDriver object.
+            deadlines (:py:class:`Deadlines`, optional): Deadlines that can
+                shorten the timeout.
+
+        Returns:
+            :py:class:`Wait`: Wait object.
+
+        """
+        return Wait(selenium, self, deadlines)
+
+
+class Deadlines(object):
+    """Deadlines that bound every wait started while they are active.
+
+    Deadlines nest, and an inner deadline can only shorten the time left by
+    an outer one.
+    """
+
+    def __init__(self) -> None:
+        """Create Deadlines object."""
+        self._stack: list[float] = []
+
+    @contextmanager
+    def __call__(self, seconds: float) -> Iterator[None]:
+        """Bound all waits in the enclosed block to a shared time budget.
+
+        Args:
+            seconds (float): Seconds the whole block may spend waiting.
+        """
+        end_time = time.monotonic() + seconds
+        if self._stack:
+            end_time = min(end_time, self._stack[-1])
+        self._stack.append(end_time)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the innermost deadline.
+
+        Returns:
+            float, optional: Seconds left, at least 0, or `None` if no
+                deadline is active.
+
+        """
+        if not self._stack:
+            return None
+        return max(0.0, self._stack[-1] - time.monotonic())
+
+
+class Wait(object):
+    """Polls conditions at the intervals of a :py:class:`WaitPolicy`.
+
+    It offers the ``until`` and ``until_not`` methods of
+    :py:class:`~selenium.webdriver.support.wait.WebDriverWait`, but runs
+    its own polling loop.
+
+    Args:
+        selenium:
+            (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+            Firefox WebDriver object.
+        policy (:py:class:`WaitPolicy`): Timeout and polling settings.
+        deadlines (:py:class:`Deadlines`, optional): Deadlines that can
+            shorten the timeout.
+        ignored_exceptions (tuple, optional): Exceptions raised by a
+            condition that count as a failed poll. Defaults to
+            :py:class:`~selenium.common.exceptions.NoSuchElementException`.
+    """
+
+    def __init__(
+        self,
+        selenium: WebDriver,
+        policy: WaitPolicy,
+        deadlines: Optional[Deadlines] = None,
+        ignored_exceptions: tuple[type[Exception], ...] = (NoSuchElementException,),
+    ) -> None:
+        """Create Wait object.
+
+        Args:
+            selenium:
+                (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+                Firefox WebDriver object.
+            policy (:py:class:`WaitPolicy`): Timeout and polling settings.
+            deadlines (:py:class:`Deadlines`, optional): Deadlines that can
+                shorten the timeout.
+            ignored_exceptions (tuple, optional): Exceptions raised by a
+                condition that count as a failed poll. Defaults to
+                :py:class:`~selenium.common.exceptions.NoSuchElementException`.
+        """
+        self.selenium = selenium
+        self.policy = policy
+        self.deadlines = deadlines
+        self.ignored_exceptions = ignored_exceptions
+
+    @property
+    def timeout(self) -> float:
+        """Seconds a wait started now may take.
+
+        This is the policy timeout, shortened by an active deadline.
+
+        Returns:
+            float: Timeout in seconds.
+
+        """
+        remaining = self.deadlines.remaining() if self.deadlines else None
+        if remaining is None:
+            return self.policy.timeout
+        return min(self.policy.timeout, remaining)
+
+    def until(self, method: Callable[[Any], Any], message: str = "") -> Any:
+        """Call the method until it returns a truthy value.
+
+        Args:
+            method (callable): Condition called with the WebDriver object.
+            message (str): Message for the timeout exception.
+
+        Returns:
+            The value returned by the method.
+
+        """
+        return self._wait_for(method, message, expect=True)
+
+    def until_not(self, method: Callable[[Any], Any], message: str = "") -> Any:
+        """Call the method until it returns a falsy value.
+
+        Args:
+            method (callable): Condition called with the WebDriver object.
+            message (str): Message for the timeout exception.
+
+        Returns:
+            The value returned by the method, or True if it raised one of
+            the ignored exceptions.
+
+        """
+        return self._wait_for(method, message, expect=False)
+
+    def _wait_for(self, method: Callable[[Any], Any], message: str, expect: bool) -> Any:
+        screen = None
+        stacktrace = None
+        end_time = time.monotonic() + self.timeout
+        intervals = self.policy.intervals()
+        while True:
+            try:
+                value = method(self.selenium)
+                if bool(value) is expect:
+                    return value
+            except self.ignored_exceptions as exc:
+                if not expect:
+                    return True
+                screen = getattr(exc, "screen", None)
+                stacktrace = getattr(exc, "stacktrace", None)
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(next(intervals), remaining))
+        raise TimeoutException(message, screen, stacktrace)
@@ -3,6 +3,32 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 """Package containing the window interaction API."""
 
-from foxpuppet.windows.base import BaseWindow  # noqa: F401
-from foxpuppet.windows.browser.window import BrowserWindow  # noqa: F401
-from foxpuppet.windows.manager import WindowManager  # noqa: F401
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from foxpuppet.windows.base import BaseWindow  # noqa: F401
+    from foxpuppet.windows.browser.window import BrowserWindow  # noqa: F401
+    from foxpuppet.windows.manager import WindowManager  # noqa: F401
+
+# Attributes imported on first access. Importing BrowserWindow pulls in
+# every browser region, so only do it when it is actually used.
+_LAZY_ATTRIBUTES = {
+    "BaseWindow": "foxpuppet.windows.base",
+    "BrowserWindow": "foxpuppet.windows.browser.window",
+    "WindowManager": "foxpuppet.windows.manager",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import public attributes on first access."""
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+def __dir__() -> list[str]:
+    """List the public attributes, including the ones not imported yet."""
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
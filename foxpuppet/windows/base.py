@@ -3,18 +3,37 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 """Handles creation of a base object for interacting with Firefox windows."""
 
+import time
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
 
+from foxpuppet import expected
+from foxpuppet.expected import WaitStatistics
+from foxpuppet.session import ContextTracker, FocusTracker, Session
+from foxpuppet.wait import Wait
+
+if TYPE_CHECKING:
+    from foxpuppet.windows.manager import WindowManager
+
 
 class BaseWindow(object):
-    """A base window model."""
+    """A base window model.
+
+    Statistics of the most recent wait run by the window are kept in
+    ``last_wait`` as a :py:class:`~foxpuppet.expected.WaitStatistics`.
+    """
 
     _document_element = (By.CSS_SELECTOR, ":root")
 
-    def __init__(self, selenium: WebDriver, handle: str) -> None:
+    def __init__(
+        self,
+        selenium: WebDriver,
+        handle: str,
+        window_manager: Optional["WindowManager"] = None,
+    ) -> None:
         """Create a BaseWindow object.
 
         Args:
@@ -22,10 +41,29 @@ class BaseWindow(object):
                 (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
                 Firefox WebDriver object.
             handle: (str): WebDriver Firefox window handle.
+            window_manager (:py:class:`~foxpuppet.windows.manager.WindowManager`,
+                optional): Manager owning the window. Defaults to the
+                manager with the default wait policy.
         """
+        from foxpuppet.windows.manager import WindowManager
+
         self.selenium: WebDriver = selenium
         self.handle: str = handle
-        self.wait: WebDriverWait = WebDriverWait(self.selenium, timeout=10)
+        self.session: Session = Session.get(selenium)
+        self.window_manager = window_manager or WindowManager.default(selenium)
+        self.context: ContextTracker = self.session.context
+        self.focus: FocusTracker = self.session.focus
+        self.last_wait: Optional[WaitStatistics] = None
+
+    @property
+    def wait(self) -> Wait:
+        """Wait object following the wait policy of the window manager.
+
+        Returns:
+            :py:class:`~foxpuppet.wait.Wait`: Wait object.
+
+        """
+        return self.window_manager.wait
 
     @property
     def document_element(self) -> WebElement:
@@ -49,11 +87,66 @@ class BaseWindow(object):
         version: str = self.selenium.capabilities["browserVersion"]
         return int(version.partition(".")[0])
 
+    def _wait_until(self, condition: Callable[[Any], Any], message: str = "") -> Any:
+        """Wait for a condition and record its statistics in ``last_wait``.
+
+        Args:
+            condition (callable): Condition from :py:mod:`foxpuppet.expected`.
+            message (str): Message for the timeout exception.
+
+        Returns:
+            The value returned by the condition.
+
+        """
+        start = time.monotonic()
+        try:
+            return self.wait.until(condition, message=message)
+        finally:
+            self.last_wait = WaitStatistics(
+                getattr(condition, "polls", 0), time.monotonic() - start
+            )
+
+    def _open_window(self, action: Callable[[], Any], message: str = "") -> str:
+        """Run an action that opens a window or tab and wait for it.
+
+        With BiDi lifecycle events the new handle is taken from the
+        ``browsingContext.contextCreated`` event, otherwise
+        ``window_handles`` is polled until it grows.
+
+        Args:
+            action (callable): Opens the window or tab.
+            message (str): Message for the timeout exception.
+
+        Returns:
+            str: WebDriver Firefox window handle of the opened window.
+
+        """
+        events = self.session.window_events
+        self.focus.invalidate()
+        if not events.enabled:
+            condition = expected.new_browser_window_is_opened(
+                self.selenium, self.selenium.window_handles, self.window_manager
+            )
+            action()
+            handle: str = self._wait_until(condition, message=message).handle
+            return handle
+        mark = events.mark()
+        action()
+        start = time.monotonic()
+        try:
+            return events.wait_for_open(mark, self.wait.timeout, message)["handle"]
+        finally:
+            self.last_wait = WaitStatistics(1, time.monotonic() - start)
+
     def close(self) -> None:
         """Close the window."""
         self.switch_to()
         self.selenium.close()
+        self.focus.record(None)
 
     def switch_to(self) -> None:
-        """Switch focus for Selenium commands to this window."""
-        self.selenium.switch_to.window(self.handle)
+        """Switch focus for Selenium commands to this window.
+
+        Nothing is sent if this window already has focus.
+        """
+        self.focus.switch(self.handle)
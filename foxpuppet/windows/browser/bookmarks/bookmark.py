@@ -5,11 +5,23 @@
 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.common.keys import Keys
+from foxpuppet.windows.browser.bookmarks.places import (
+    ADD_BOOKMARKS_SCRIPT,
+    DELETE_BOOKMARKS_SCRIPT,
+    FIND_BOOKMARKS_SCRIPT,
+    PAGE_BOOKMARKS_SCRIPT,
+    BookmarkFilter,
+    BookmarkIndex,
+    BookmarkRecord,
+    folder_guid,
+    query_filter,
+    run_places_script,
+)
 from foxpuppet.windows.browser.navbar import NavBar
-from typing import TYPE_CHECKING, Optional, TypedDict, List
+from foxpuppet.windows.browser.snapshot import read_attribute
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, TypedDict, List
 
 
 class BookmarkData(TypedDict):
@@ -24,6 +36,22 @@ class BookmarkData(TypedDict):
 class Bookmark(NavBar):
     """Handles Bookmark operations in Firefox."""
 
+    #: Reset fragment removing the bookmarks, folders and separators added
+    #: after the baseline. Default bookmarks are kept, even if moved.
+    RESET_SCRIPT = """
+    const kept = new Set(baseline.bookmarks);
+    const removeAdded = async node => {
+        if (!kept.has(node.guid)) {
+            await PlacesUtils.bookmarks.remove(node.guid);
+            return;
+        }
+        for (const child of node.children || []) {
+            await removeAdded(child);
+        }
+    };
+    await removeAdded(await PlacesUtils.promiseBookmarksTree());
+    """
+
     if TYPE_CHECKING:
         from foxpuppet.windows.browser.window import BrowserWindow
 
@@ -38,7 +66,7 @@ class Bookmark(NavBar):
         Returns:
             :py:class:`Bookmark`: Bookmark instance
         """
-        with window.selenium.context(window.selenium.CONTEXT_CHROME):
+        with window.context(window.selenium.CONTEXT_CHROME):
             return Bookmark(window, root)
 
     @property
@@ -48,11 +76,8 @@ class Bookmark(NavBar):
         Returns:
             bool: True if the page is bookmarked, False otherwise.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            star_button_image = self.selenium.find_element(
-                *BookmarkLocators.STAR_BUTTON_IMAGE
-            )
-            return star_button_image.get_attribute("starred") == "true"
+        star = BookmarkLocators.STAR_BUTTON_IMAGE[1]
+        return read_attribute(self.window, star, "starred") == "true"
 
     def add_bookmark(
         self, bookmark_data: Optional[BookmarkData] = None, is_detailed: bool = False
@@ -65,18 +90,18 @@ class Bookmark(NavBar):
             bookmark_data (BookmarkData, optional): Data for the bookmark when using detailed menu.
                 Required when detailed is True.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             if not is_detailed:
                 self.selenium.find_element(*BookmarkLocators.STAR_BUTTON_IMAGE).click()
                 self.selenium.find_element(*BookmarkLocators.FOLDER_MENU).click()
                 self.selenium.find_element(*BookmarkLocators.OTHER_BOOKMARKS_STAR).click()
                 self.selenium.find_element(*BookmarkLocators.SAVE_BUTTON).click()
             else:
-                with self.selenium.context(self.selenium.CONTEXT_CHROME):
+                with self.context(self.selenium.CONTEXT_CHROME):
                     self.actions.context_click(
                         self.selenium.find_element(*BookmarkLocators.NAVIGATOR_TOOLBOX)
                     ).perform()
-                    WebDriverWait(self.selenium, 10).until(
+                    self.wait.until(
                         EC.presence_of_element_located(BookmarkLocators.MENU_BAR)
                     )
                     self.selenium.find_element(*BookmarkLocators.MENU_BAR).click()
@@ -122,6 +147,95 @@ class Bookmark(NavBar):
                         self.selenium.switch_to.frame(folder)
                         self.actions.send_keys(Keys.TAB, Keys.ENTER).perform()
 
+    def add_bookmarks(
+        self, bookmarks: Iterable[BookmarkData], folder: str = "unfiled"
+    ) -> list[str]:
+        """Insert bookmarks with their tags and keywords in one chrome call.
+
+        Unlike :py:meth:`add_bookmark` this does not use the user
+        interface, so it suits seeding many bookmarks.
+
+        Args:
+            bookmarks (iterable of :py:class:`BookmarkData`): Bookmarks to
+                insert.
+            folder (str): ``menu``, ``toolbar``, ``unfiled``, ``mobile`` or
+                the GUID of a folder. Defaults to ``unfiled``.
+
+        Returns:
+            list: GUIDs of the inserted bookmarks, in order.
+
+        """
+        items = list(bookmarks)
+        if not items:
+            return []
+        result = run_places_script(
+            self.window, ADD_BOOKMARKS_SCRIPT, folder_guid(folder), items
+        )
+        guids: list[str] = result["guids"]
+        return guids
+
+    def find_bookmarks(
+        self,
+        label: Optional[str] = None,
+        url: Optional[str] = None,
+        tag: Optional[str] = None,
+        folder: Optional[str] = None,
+    ) -> list[BookmarkRecord]:
+        """Query the places database for bookmarks in one chrome call.
+
+        All given conditions have to match.
+
+        Args:
+            label (str, optional): Text the title contains, ignoring case.
+            url (str, optional): Glob pattern for the URL, e.g.
+                ``https://*.mozilla.org/*``.
+            tag (str, optional): Tag of the bookmark.
+            folder (str, optional): ``menu``, ``toolbar``, ``unfiled``,
+                ``mobile`` or the GUID of the folder directly containing
+                the bookmark.
+
+        Returns:
+            list: Matching :py:class:`BookmarkRecord` objects, oldest first.
+
+        """
+        conditions = query_filter(label=label, url=url, tag=tag, folder=folder)
+        result = run_places_script(self.window, FIND_BOOKMARKS_SCRIPT, conditions)
+        return [BookmarkRecord.from_row(row) for row in result["rows"]]
+
+    def iter_bookmarks(
+        self, folder: Optional[str] = None, page_size: int = 500
+    ) -> Iterator[BookmarkRecord]:
+        """Iterate over bookmarks, fetching them a page at a time.
+
+        Pages continue after the last id seen rather than at an offset, so
+        every page costs the same however large the profile is, and only
+        one page is held in memory.
+
+        Args:
+            folder (str, optional): ``menu``, ``toolbar``, ``unfiled``,
+                ``mobile`` or the GUID of a folder to limit the iteration
+                to, including its subfolders. Defaults to all bookmarks.
+            page_size (int): Number of bookmarks fetched per chrome call.
+                Defaults to 500.
+
+        Yields:
+            :py:class:`BookmarkRecord`: Bookmarks, oldest first.
+
+        """
+        conditions: BookmarkFilter = {}
+        if folder is not None:
+            conditions["within"] = folder_guid(folder)
+        after = 0
+        while True:
+            rows = run_places_script(
+                self.window, PAGE_BOOKMARKS_SCRIPT, conditions, after, page_size
+            )["rows"]
+            for row in rows:
+                yield BookmarkRecord.from_row(row)
+            if len(rows) < page_size:
+                return
+            after = rows[-1][0]
+
     def bookmark_exists(self, label: str) -> bool:
         """
         Check if a bookmark with the given label exists.
@@ -129,22 +243,53 @@ class Bookmark(NavBar):
         Args:
             label (str): The name of the bookmark to search for.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            self.selenium.find_element(*BookmarkLocators.PANEL_MENU).click()
-            self.selenium.find_element(*BookmarkLocators.PANEL_BOOKMARK_MENU).click()
-            panel_bookmarks = self.selenium.find_element(
-                *BookmarkLocators.PANEL_BOOKMARK_TOOLBAR
-            )
-            menu_items = panel_bookmarks.find_elements(
-                By.CSS_SELECTOR, "toolbarbutton.bookmark-item"
-            )
-            if any(
-                label.lower() in item_label.lower()
-                for item in menu_items
-                if (item_label := item.get_attribute("label"))
-            ):
-                return True
-        return False
+        return bool(self.find_bookmarks(label=label))
+
+    def delete_bookmarks(
+        self,
+        label: Optional[str] = None,
+        url: Optional[str] = None,
+        tag: Optional[str] = None,
+        folder: Optional[str] = None,
+    ) -> int:
+        """Remove all matching bookmarks in one places transaction.
+
+        Takes the same conditions as :py:meth:`find_bookmarks`, of which at
+        least one is required.
+
+        Args:
+            label (str, optional): Text the title contains, ignoring case.
+            url (str, optional): Glob pattern for the URL.
+            tag (str, optional): Tag of the bookmark.
+            folder (str, optional): ``menu``, ``toolbar``, ``unfiled``,
+                ``mobile`` or the GUID of the folder directly containing
+                the bookmark.
+
+        Returns:
+            int: Number of bookmarks removed.
+
+        Raises:
+            ValueError: If no condition was given.
+
+        """
+        conditions = query_filter(label=label, url=url, tag=tag, folder=folder)
+        if not conditions:
+            raise ValueError("At least one condition is required")
+        result = run_places_script(self.window, DELETE_BOOKMARKS_SCRIPT, conditions)
+        count: int = result["count"]
+        return count
+
+    def index(self) -> BookmarkIndex:
+        """Load all bookmarks into an index that follows later changes.
+
+        Call :py:meth:`BookmarkIndex.sync` to pick up changes and
+        :py:meth:`BookmarkIndex.stop` when done.
+
+        Returns:
+            :py:class:`BookmarkIndex`: Started index.
+
+        """
+        return BookmarkIndex(self.window).start()
 
     def delete_bookmark(
         self, label: Optional[str] = None, is_detailed: bool = False
@@ -160,7 +305,7 @@ class Bookmark(NavBar):
         Returns:
             bool: True if bookmark was successfully deleted (always True for detailed approach)
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             if not is_detailed:
                 star_button_image = self.selenium.find_element(
                     *BookmarkLocators.STAR_BUTTON_IMAGE
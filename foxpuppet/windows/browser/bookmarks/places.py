@@ -0,0 +1,622 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Chrome scripts working on the bookmarks in the places database."""
+
+import functools
+import re
+import uuid
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Optional, TypedDict
+
+from selenium.common.exceptions import WebDriverException
+
+if TYPE_CHECKING:
+    from foxpuppet.windows import BaseWindow
+
+#: GUIDs of the bookmark roots by name.
+FOLDERS = {
+    "menu": "menu________",
+    "toolbar": "toolbar_____",
+    "unfiled": "unfiled_____",
+    "mobile": "mobile______",
+}
+
+# Wraps the body of an async function, which receives the script arguments
+# and resolves with its return value or an error description.
+_ASYNC_WRAPPER = """
+const resolve = arguments[arguments.length - 1];
+const args = Array.from(arguments).slice(0, -1);
+(async (...args) => {{
+{body}
+}})(...args).then(resolve, error => resolve({{ error: String(error) }}));
+"""
+
+ADD_BOOKMARKS_SCRIPT = """
+const [parentGuid, items] = args;
+const inserted = await PlacesUtils.bookmarks.insertTree({
+    guid: parentGuid,
+    children: items.map(item => ({ title: item.name, url: item.url })),
+});
+// Tag all URLs of a tag at once, while the keywords are inserted.
+const { PlacesTransactions } = ChromeUtils.importESModule(
+    "resource://gre/modules/PlacesTransactions.sys.mjs"
+);
+const urlsByTag = new Map();
+for (const item of items) {
+    for (const tag of item.tags || []) {
+        urlsByTag.set(tag, [...(urlsByTag.get(tag) || []), item.url]);
+    }
+}
+await Promise.all([
+    ...Array.from(urlsByTag, ([tag, urls]) =>
+        PlacesTransactions.Tag({ urls, tags: [tag] }).transact()
+    ),
+    ...items
+        .filter(item => item.keyword)
+        .map(({ keyword, url }) => PlacesUtils.keywords.insert({ keyword, url })),
+]);
+return { guids: inserted.map(info => info.guid) };
+"""
+
+
+# Defines queryBookmarks(filter, after, limit), resolving with bookmark rows
+# ordered by id. Tag entries, which are bookmarks too, are left out. Each
+# row ends with the tags of the bookmark URL.
+QUERY_PRELUDE = """
+const queryBookmarks = async (filter, after = 0, limit = -1) => {
+    const conditions = [
+        "b.type = 1",
+        "b.id > :after",
+        "p.parent <> (SELECT id FROM moz_bookmarks WHERE guid = 'tags________')",
+    ];
+    const params = { after, limit };
+    if (filter.label != null) {
+        conditions.push("instr(lower(b.title), lower(:label)) > 0");
+        params.label = filter.label;
+    }
+    if (filter.url != null) {
+        conditions.push("h.url GLOB :url");
+        params.url = filter.url;
+    }
+    if (filter.folder != null) {
+        conditions.push("p.guid = :folder");
+        params.folder = filter.folder;
+    }
+    if (filter.within != null) {
+        conditions.push(`b.parent IN (
+            WITH RECURSIVE tree(id) AS (
+                SELECT id FROM moz_bookmarks WHERE guid = :within
+                UNION ALL
+                SELECT c.id FROM moz_bookmarks c JOIN tree ON c.parent = tree.id
+                WHERE c.type = 2)
+            SELECT id FROM tree)`);
+        params.within = filter.within;
+    }
+    if (filter.tag != null) {
+        conditions.push(`b.fk IN (
+            SELECT t.fk FROM moz_bookmarks t
+            JOIN moz_bookmarks f ON f.id = t.parent
+            JOIN moz_bookmarks r ON r.id = f.parent
+            WHERE r.guid = 'tags________' AND f.title = :tag)`);
+        params.tag = filter.tag;
+    }
+    const db = await PlacesUtils.promiseDBConnection();
+    const rows = await db.executeCached(
+        `SELECT b.id, b.guid, b.title, h.url, p.guid AS parent, b.dateAdded,
+             (SELECT json_group_array(f.title) FROM moz_bookmarks t
+              JOIN moz_bookmarks f ON f.id = t.parent
+              JOIN moz_bookmarks r ON r.id = f.parent
+              WHERE t.fk = b.fk AND r.guid = 'tags________') AS tags
+         FROM moz_bookmarks b
+         JOIN moz_places h ON h.id = b.fk
+         JOIN moz_bookmarks p ON p.id = b.parent
+         WHERE ${conditions.join(" AND ")}
+         ORDER BY b.id LIMIT :limit`,
+        params
+    );
+    return rows.map(row => [
+        row.getResultByName("id"),
+        row.getResultByName("guid"),
+        row.getResultByName("title"),
+        row.getResultByName("url"),
+        row.getResultByName("parent"),
+        row.getResultByName("dateAdded"),
+        JSON.parse(row.getResultByName("tags")),
+    ]);
+};
+"""
+
+FIND_BOOKMARKS_SCRIPT = QUERY_PRELUDE + """
+const [filter] = args;
+return { rows: await queryBookmarks(filter) };
+"""
+
+PAGE_BOOKMARKS_SCRIPT = QUERY_PRELUDE + """
+const [filter, after, limit] = args;
+return { rows: await queryBookmarks(filter, after, limit) };
+"""
+
+DELETE_BOOKMARKS_SCRIPT = QUERY_PRELUDE + """
+const [filter] = args;
+const guids = (await queryBookmarks(filter)).map(row => row[1]);
+if (guids.length) {
+    await PlacesUtils.bookmarks.remove(guids);
+}
+return { count: guids.length };
+"""
+
+# Keeps a journal of bookmark changes per index id on the chrome window. A
+# journal longer than its limit is dropped, and the next sync reloads all
+# bookmarks instead.
+START_INDEX_SCRIPT = QUERY_PRELUDE + """
+const [id, limit] = args;
+const journals = window.foxpuppetBookmarkJournals ??= new Map();
+const journal = { events: [], overflowed: false };
+const tagsOf = url =>
+    url ? PlacesUtils.tagging.getTagsForURI(Services.io.newURI(url)) : [];
+journal.listener = events => {
+    for (const event of events) {
+        if (journal.overflowed ||
+            event.itemType != PlacesUtils.bookmarks.TYPE_BOOKMARK || event.isTagging) {
+            continue;
+        }
+        journal.events.push({
+            type: event.type,
+            guid: event.guid,
+            title: event.title ?? null,
+            url: event.url ?? null,
+            parent: event.parentGuid ?? null,
+            // Events carry milliseconds, the database microseconds.
+            dateAdded: event.dateAdded ? event.dateAdded * 1000 : null,
+            tags: event.tags ?? tagsOf(event.url),
+        });
+        if (journal.events.length > limit) {
+            journal.events = [];
+            journal.overflowed = true;
+        }
+    }
+};
+PlacesObservers.addListener(
+    ["bookmark-added", "bookmark-removed", "bookmark-moved",
+     "bookmark-title-changed", "bookmark-url-changed", "bookmark-tags-changed"],
+    journal.listener
+);
+journals.set(id, journal);
+return { rows: await queryBookmarks({}) };
+"""
+
+SYNC_INDEX_SCRIPT = QUERY_PRELUDE + """
+const [id] = args;
+const journal = window.foxpuppetBookmarkJournals?.get(id);
+if (!journal) {
+    throw new Error("The bookmark index is not running in this window");
+}
+if (journal.overflowed) {
+    journal.overflowed = false;
+    return { rows: await queryBookmarks({}) };
+}
+return { events: journal.events.splice(0) };
+"""
+
+STOP_INDEX_SCRIPT = """
+const [id] = args;
+const journal = window.foxpuppetBookmarkJournals?.get(id);
+if (journal) {
+    PlacesObservers.removeListener(
+        ["bookmark-added", "bookmark-removed", "bookmark-moved",
+         "bookmark-title-changed", "bookmark-url-changed", "bookmark-tags-changed"],
+        journal.listener
+    );
+    window.foxpuppetBookmarkJournals.delete(id);
+}
+return {};
+"""
+
+
+class BookmarkFilter(TypedDict, total=False):
+    """Conditions a bookmark has to match."""
+
+    #: Text the title contains, ignoring the case of ASCII letters.
+    label: Optional[str]
+    #: SQLite ``GLOB`` pattern for the URL, e.g. ``https://*.mozilla.org/*``.
+    url: Optional[str]
+    #: Tag of the bookmark.
+    tag: Optional[str]
+    #: Root name or GUID of the folder directly containing the bookmark.
+    folder: Optional[str]
+    #: GUID of a folder containing the bookmark at any depth.
+    within: Optional[str]
+
+
+class BookmarkRecord(object):
+    """A bookmark read from the places database.
+
+    Records only hold plain values, so millions of them stay cheap.
+
+    Args:
+        guid (str): GUID of the bookmark.
+        title (str): Title of the bookmark.
+        url (str): URL of the bookmark.
+        parent (str): GUID of the folder containing the bookmark.
+        date_added (:py:class:`~datetime.datetime`): Time the bookmark was
+            added.
+        tags (list of str, optional): Tags of the bookmark URL.
+    """
+
+    __slots__ = ("guid", "title", "url", "parent", "date_added", "tags")
+
+    def __init__(
+        self,
+        guid: str,
+        title: Optional[str],
+        url: str,
+        parent: str,
+        date_added: Optional[datetime],
+        tags: Optional[list[str]] = None,
+    ) -> None:
+        """Create BookmarkRecord object.
+
+        Args:
+            guid (str): GUID of the bookmark.
+            title (str): Title of the bookmark.
+            url (str): URL of the bookmark.
+            parent (str): GUID of the folder containing the bookmark.
+            date_added (:py:class:`~datetime.datetime`): Time the bookmark
+                was added.
+            tags (list of str, optional): Tags of the bookmark URL.
+        """
+        self.guid = guid
+        self.title = title
+        self.url = url
+        self.parent = parent
+        self.date_added = date_added
+        self.tags = sorted(tags or [])
+
+    def __repr__(self) -> str:
+        """Return a readable representation of the record."""
+        return "BookmarkRecord(guid={0.guid!r}, title={0.title!r}, url={0.url!r})".format(
+            self
+        )
+
+    def __eq__(self, other: object) -> bool:
+        """Compare records by value."""
+        if not isinstance(other, BookmarkRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def matches(self, conditions: BookmarkFilter) -> bool:
+        """Check the record against filter conditions, except for ``within``.
+
+        Conditions are matched like ``queryBookmarks`` does in SQLite.
+
+        Args:
+            conditions (:py:class:`BookmarkFilter`): Conditions to check.
+
+        Returns:
+            bool: True if the record matches.
+
+        """
+        label = conditions.get("label")
+        if label is not None and ascii_lower(label) not in ascii_lower(self.title or ""):
+            return False
+        url = conditions.get("url")
+        if url is not None and not glob_match(url, self.url):
+            return False
+        tag = conditions.get("tag")
+        if tag is not None and tag not in self.tags:
+            return False
+        folder = conditions.get("folder")
+        return folder is None or self.parent == folder_guid(folder)
+
+    @classmethod
+    def from_row(cls, row: list[Any]) -> "BookmarkRecord":
+        """Create a record from a row returned by ``queryBookmarks``.
+
+        Args:
+            row (list): Id, GUID, title, URL, parent GUID, time added and
+                tags.
+
+        Returns:
+            :py:class:`BookmarkRecord`: Bookmark record.
+
+        """
+        return cls(row[1], row[2], row[3], row[4], from_prtime(row[5]), row[6])
+
+
+def ascii_lower(text: str) -> str:
+    """Lower the case of ASCII letters only, like SQLite's ``lower()``.
+
+    Args:
+        text (str): Text to convert.
+
+    Returns:
+        str: Converted text.
+
+    """
+    return text.translate(_ASCII_LOWER)
+
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def glob_match(pattern: str, text: str) -> bool:
+    """Match text against a pattern like SQLite's ``GLOB`` operator.
+
+    ``*`` matches any text, ``?`` one character and ``[...]`` one of a
+    class of characters, negated by a leading ``^``. Matching is case
+    sensitive and a ``[`` without a closing ``]`` matches nothing.
+
+    Args:
+        pattern (str): GLOB pattern.
+        text (str): Text to match.
+
+    Returns:
+        bool: True if the whole text matches.
+
+    """
+    return _compile_glob(pattern).fullmatch(text) is not None
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_glob(pattern: str) -> "re.Pattern[str]":
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        i += 1
+        if char == "*":
+            parts.append(".*")
+        elif char == "?":
+            parts.append(".")
+        elif char != "[":
+            parts.append(re.escape(char))
+        else:
+            negate = pattern.startswith("^", i)
+            start = i + negate
+            # A ] right after the opening bracket is part of the class.
+            end = pattern.find("]", start + 1)
+            if start >= len(pattern) or end < 0:
+                return re.compile("(?!)")
+            body = pattern[start:end]
+            items = []
+            k = 0
+            while k < len(body):
+                if k + 2 < len(body) and body[k + 1] == "-":
+                    items.append(re.escape(body[k]) + "-" + re.escape(body[k + 2]))
+                    k += 3
+                else:
+                    items.append(re.escape(body[k]))
+                    k += 1
+            parts.append("[{0}{1}]".format("^" if negate else "", "".join(items)))
+            i = end + 1
+    return re.compile("".join(parts), re.DOTALL)
+
+
+def folder_guid(folder: str) -> str:
+    """Resolve a bookmark root name to its GUID.
+
+    Args:
+        folder (str): One of the names in :py:data:`FOLDERS`, or a GUID.
+
+    Returns:
+        str: Folder GUID.
+
+    """
+    return FOLDERS.get(folder, folder)
+
+
+def run_places_script(window: "BaseWindow", body: str, *args: Any) -> Any:
+    """Run the body of an async function in chrome and return its result.
+
+    Args:
+        window (:py:class:`BaseWindow`): Window used to send the script.
+        body (str): Function body. The arguments are available as ``args``.
+        *args: Arguments of the function.
+
+    Returns:
+        The value returned by the function.
+
+    Raises:
+        :py:class:`~selenium.common.exceptions.WebDriverException`: If the
+            function threw.
+
+    """
+    with window.context(window.selenium.CONTEXT_CHROME):
+        result = window.selenium.execute_async_script(
+            _ASYNC_WRAPPER.format(body=body), *args
+        )
+    if isinstance(result, dict) and "error" in result:
+        raise WebDriverException("Places script failed: {0}".format(result["error"]))
+    return result
+
+
+def query_filter(
+    label: Optional[str] = None,
+    url: Optional[str] = None,
+    tag: Optional[str] = None,
+    folder: Optional[str] = None,
+) -> BookmarkFilter:
+    """Build the filter passed to ``queryBookmarks``.
+
+    Args:
+        label (str, optional): Text the title contains, ignoring case.
+        url (str, optional): Glob pattern for the URL.
+        tag (str, optional): Tag of the bookmark.
+        folder (str, optional): Root name or GUID of the folder.
+
+    Returns:
+        :py:class:`BookmarkFilter`: Filter with the given conditions and
+            the folder resolved to a GUID.
+
+    """
+    result: BookmarkFilter = {}
+    if label is not None:
+        result["label"] = label
+    if url is not None:
+        result["url"] = url
+    if tag is not None:
+        result["tag"] = tag
+    if folder is not None:
+        result["folder"] = folder_guid(folder)
+    return result
+
+
+class BookmarkIndex(object):
+    """Bookmarks kept in memory and updated from a chrome journal.
+
+    :py:meth:`start` loads all bookmarks and registers a ``PlacesObservers``
+    listener that records every later change in chrome. :py:meth:`sync`
+    fetches only those changes, so its cost does not grow with the number
+    of bookmarks, and lookups with :py:meth:`find` and :py:meth:`exists`
+    never send a command. The journal lives in the chrome window the index
+    was started in and is emptied by every sync. If it grows past
+    ``journal_limit`` changes it is dropped, and the next sync reloads all
+    bookmarks instead.
+
+    Args:
+        window (:py:class:`BaseWindow`): Window used to send the scripts.
+        journal_limit (int): Changes kept in chrome between syncs. Defaults
+            to 10000.
+    """
+
+    def __init__(self, window: "BaseWindow", journal_limit: int = 10000) -> None:
+        """Create BookmarkIndex object.
+
+        Args:
+            window (:py:class:`BaseWindow`): Window used to send the
+                scripts.
+            journal_limit (int): Changes kept in chrome between syncs.
+                Defaults to 10000.
+        """
+        self.window = window
+        self.journal_limit = journal_limit
+        self.id = uuid.uuid4().hex
+        self.records: dict[str, BookmarkRecord] = {}
+
+    def start(self) -> "BookmarkIndex":
+        """Register the chrome listener and load all bookmarks.
+
+        Returns:
+            :py:class:`BookmarkIndex`: This index.
+
+        """
+        result = run_places_script(
+            self.window, START_INDEX_SCRIPT, self.id, self.journal_limit
+        )
+        self._load(result["rows"])
+        return self
+
+    def sync(self) -> int:
+        """Apply the changes recorded in chrome since the last sync.
+
+        Returns:
+            int: Number of changes applied, or of bookmarks if they were
+                reloaded.
+
+        """
+        result = run_places_script(self.window, SYNC_INDEX_SCRIPT, self.id)
+        if "rows" in result:
+            self._load(result["rows"])
+            return len(self.records)
+        events = result["events"]
+        for event in events:
+            record = self.records.get(event["guid"])
+            if event["type"] == "bookmark-added":
+                self.records[event["guid"]] = BookmarkRecord(
+                    event["guid"],
+                    event["title"],
+                    event["url"],
+                    event["parent"],
+                    from_prtime(event["dateAdded"]),
+                    event["tags"],
+                )
+            elif event["type"] == "bookmark-removed":
+                self.records.pop(event["guid"], None)
+            elif record is None:
+                continue
+            elif event["type"] == "bookmark-title-changed":
+                record.title = event["title"]
+            elif event["type"] == "bookmark-url-changed":
+                record.url = event["url"]
+                record.tags = sorted(event["tags"])
+            elif event["type"] == "bookmark-tags-changed":
+                record.tags = sorted(event["tags"])
+            elif event["type"] == "bookmark-moved":
+                record.parent = event["parent"]
+        return len(events)
+
+    def stop(self) -> None:
+        """Unregister the chrome listener."""
+        run_places_script(self.window, STOP_INDEX_SCRIPT, self.id)
+
+    def find(
+        self,
+        label: Optional[str] = None,
+        url: Optional[str] = None,
+        tag: Optional[str] = None,
+        folder: Optional[str] = None,
+    ) -> list[BookmarkRecord]:
+        """Look up bookmarks in memory.
+
+        Args:
+            label (str, optional): Text the title contains, ignoring the
+                case of ASCII letters.
+            url (str, optional): SQLite ``GLOB`` pattern for the URL.
+            tag (str, optional): Tag of the bookmark.
+            folder (str, optional): Root name or GUID of the folder directly
+                containing the bookmark.
+
+        Returns:
+            list: Matching :py:class:`BookmarkRecord` objects.
+
+        """
+        conditions = query_filter(label=label, url=url, tag=tag, folder=folder)
+        return [record for record in self.records.values() if record.matches(conditions)]
+
+    def exists(self, label: str) -> bool:
+        """Check in memory whether a bookmark title contains a label.
+
+        Args:
+            label (str): Text the title contains, ignoring case.
+
+        Returns:
+            bool: True if such a bookmark exists.
+
+        """
+        return any(record.matches({"label": label}) for record in self.records.values())
+
+    def _load(self, rows: list[list[Any]]) -> None:
+        self.records = {}
+        for row in rows:
+            record = BookmarkRecord.from_row(row)
+            self.records[record.guid] = record
+
+
+def from_prtime(value: Optional[int]) -> Optional[datetime]:
+    """Convert a places timestamp to a datetime.
+
+    Args:
+        value (int): Microseconds since the epoch, as stored by places.
+
+    Returns:
+        :py:class:`~datetime.datetime`: Time in UTC, or None.
+
+    """
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1000000, timezone.utc)
+
+
+def to_prtime(value: datetime) -> int:
+    """Convert a datetime to a places timestamp.
+
+    Args:
+        value (:py:class:`~datetime.datetime`): Time to convert. Naive
+            values are taken as local time.
+
+    Returns:
+        int: Microseconds since the epoch.
+
+    """
+    return round(value.timestamp() * 1000000)
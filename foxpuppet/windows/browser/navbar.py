@@ -5,6 +5,7 @@
 
 from selenium.webdriver.common.by import By
 from foxpuppet.region import Region
+from foxpuppet.windows.browser.snapshot import read_attribute
 from foxpuppet.windows.browser.urlbar import UrlBar
 
 
@@ -33,10 +34,10 @@ class NavBar(Region):
             bool: True or False if the Tracking Shield is displayed.
 
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            if self.window.firefox_version >= 63:  # Bug 1471713, 1476218
-                el = self.root.find_element(*self._tracking_protection_shield_locator)
-                return el.get_attribute("active") is not None
+        if self.window.firefox_version >= 63:  # Bug 1471713, 1476218
+            shield = self._tracking_protection_shield_locator[1]
+            return read_attribute(self.window, shield, "active") is not None
+        with self.context(self.selenium.CONTEXT_CHROME):
             el = self.root.find_element(By.ID, "tracking-protection-icon")
             return bool(el.get_attribute("state"))
 
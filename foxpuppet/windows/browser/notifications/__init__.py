@@ -3,4 +3,8 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 """Contains the notification interaction API and supporting files."""
 
-from foxpuppet.windows.browser.notifications.base import BaseNotification  # noqa: F401
+from foxpuppet.windows.browser.notifications.base import (  # noqa: F401
+    NOTIFICATIONS,
+    BaseNotification,
+)
+from foxpuppet.windows.browser.notifications import addons  # noqa: F401, E402
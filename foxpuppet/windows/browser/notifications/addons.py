@@ -5,22 +5,40 @@
 
 from selenium.webdriver.common.by import By
 
-from foxpuppet.windows.browser.notifications import BaseNotification
+from foxpuppet.windows.browser.notifications import NOTIFICATIONS, BaseNotification
 from selenium.webdriver.remote.webelement import WebElement
 
 
+@NOTIFICATIONS.register("addon-install-blocked-notification")
 class AddOnInstallBlocked(BaseNotification):
     """Add-on install blocked notification."""
 
     def allow(self) -> None:
         """Allow the add-on to be installed."""
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             self.find_primary_button().click()
 
 
+@NOTIFICATIONS.register(
+    "addon-install-confirmation-notification",
+    "addon-webext-permissions-notification",
+)
 class AddOnInstallConfirmation(BaseNotification):
     """Add-on install confirmation notification."""
 
+    #: Reset fragment uninstalling the add-ons missing from the baseline,
+    #: except system and built-in ones.
+    RESET_SCRIPT = """
+    const { AddonManager } = ChromeUtils.importESModule(
+        "resource://gre/modules/AddonManager.sys.mjs"
+    );
+    for (const addon of await AddonManager.getAllAddons()) {
+        if (!addon.isSystem && !addon.isBuiltin && !baseline.addons.includes(addon.id)) {
+            await addon.uninstall();
+        }
+    }
+    """
+
     @property
     def addon_name(self) -> str:
         """Provide access to the add-on name.
@@ -29,27 +47,34 @@ class AddOnInstallConfirmation(BaseNotification):
             str: Add-on name.
 
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             el: WebElement = self.find_description()
             return el.find_element(By.CSS_SELECTOR, "b").text
 
     def cancel(self) -> None:
         """Cancel add-on install."""
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             self.find_secondary_button().click()
 
     def install(self) -> None:
         """Confirm add-on install."""
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             self.find_primary_button().click()
 
 
+# Clean up of these notifications will happen once Firefox ESR is past version 63
+# https://github.com/mozilla/FoxPuppet/issues/212
+@NOTIFICATIONS.register(
+    "addon-install-complete-notification",
+    "appMenu-addon-installed-notification",
+    "addon-installed-notification",
+)
 class AddOnInstallComplete(BaseNotification):
     """Add-on install complete notification."""
 
     def close(self) -> None:
         """Close the notification."""
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             if self.window.firefox_version > 63:
                 self.find_primary_button().click()
                 self.window.wait_for_notification(None)
@@ -57,6 +82,7 @@ class AddOnInstallComplete(BaseNotification):
                 BaseNotification.close(self)
 
 
+@NOTIFICATIONS.register("addon-install-failed-notification")
 class AddOnInstallFailed(BaseNotification):
     """Add-on install failed notification."""
 
@@ -67,15 +93,16 @@ class AddOnInstallFailed(BaseNotification):
         Returns:
             str: The error message explaining why the installation failed.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             return self.find_description().text
 
     def close(self):
         """Close the failed installation notification."""
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             self.find_primary_button().click()
 
 
+@NOTIFICATIONS.register("addon-progress-notification")
 class AddOnProgress(BaseNotification):
     """Add-on progress notification."""
 
@@ -86,19 +113,5 @@ class AddOnProgress(BaseNotification):
         Returns:
             bool: True if the download and verification is in progress.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             return "Downloading and verifying add-on…" in self.find_description().text
-
-
-# Clean up of these notifications will happen once Firefox ESR is past version 63
-# https://github.com/mozilla/FoxPuppet/issues/212
-NOTIFICATIONS = {
-    "addon-install-blocked-notification": AddOnInstallBlocked,
-    "addon-install-confirmation-notification": AddOnInstallConfirmation,
-    "addon-install-complete-notification": AddOnInstallComplete,
-    "appMenu-addon-installed-notification": AddOnInstallComplete,
-    "addon-install-failed-notification": AddOnInstallFailed,
-    "addon-installed-notification": AddOnInstallComplete,
-    "addon-progress-notification": AddOnProgress,
-    "addon-webext-permissions-notification": AddOnInstallConfirmation,
-}
@@ -8,20 +8,46 @@ from abc import ABCMeta
 from selenium.webdriver.common.by import By
 
 from foxpuppet.region import Region
+from foxpuppet.registry import Registry
 from selenium.webdriver.remote.webelement import WebElement
 from typing import Type, Any, TYPE_CHECKING, Optional
 
+#: Notification classes by the id of their ``popupnotification`` element.
+NOTIFICATIONS = Registry("foxpuppet.notifications")
+
 
 class BaseNotification(Region):
     """Abstract base class for any kind of notification."""
 
+    #: Reset fragment removing the shown notifications and those of the
+    #: registered classes in every tab.
+    RESET_SCRIPT = """
+    const notifications = new Set(
+        Array.from(PopupNotifications.panel.children, element => element.notification)
+    );
+    for (const browser of gBrowser.browsers) {
+        for (const id of notificationIds) {
+            const name = id.replace(/-notification$/, "");
+            notifications.add(PopupNotifications.getNotification(name, browser));
+        }
+    }
+    for (const notification of notifications) {
+        if (notification) {
+            PopupNotifications.remove(notification);
+        }
+    }
+    AppMenuNotifications.removeNotification(/.*/);
+    """
+
     __metaclass__ = ABCMeta
     if TYPE_CHECKING:
         from foxpuppet.windows import BrowserWindow
 
     @staticmethod
     def create(
-        window: Optional["BrowserWindow"], root: WebElement
+        window: Optional["BrowserWindow"],
+        root: WebElement,
+        notification_id: Optional[str] = None,
     ) -> Type["BaseNotification"] | Any:
         """Create a notification object.
 
@@ -32,17 +58,17 @@ class BaseNotification(Region):
                 (:py:class:`~selenium.webdriver.remote.webelement.WebElement`):
                 WebDriver element object that serves as the root for the
                 notification.
+            notification_id (str, optional): Id of the root element, if
+                already known.
 
         Returns:
             :py:class:`BaseNotification`: Firefox notification.
 
         """
-        notifications: dict = {}
-        _id: str | bool | WebElement | dict = root.get_property("id")
-        from foxpuppet.windows.browser.notifications import addons
-
-        notifications.update(addons.NOTIFICATIONS)
-        return notifications.get(_id, BaseNotification)(window, root)
+        _id: str | bool | WebElement | dict | None = notification_id
+        if _id is None:
+            _id = root.get_property("id")
+        return NOTIFICATIONS.get(str(_id), BaseNotification)(window, root)
 
     @property
     def label(self) -> str | None:
@@ -52,7 +78,7 @@ class BaseNotification(Region):
             str: The notification label
 
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             return self.root.get_attribute("label")
 
     @property
@@ -63,7 +89,7 @@ class BaseNotification(Region):
             str: The notification origin.
 
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             return self.root.get_attribute("name")
 
     def find_primary_button(self) -> WebElement | Any:
@@ -98,6 +124,6 @@ class BaseNotification(Region):
 
     def close(self) -> None:
         """Close the notification."""
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             self.find_close_button().click()
         self.window.wait_for_notification(None)
@@ -4,22 +4,61 @@
 """Contains classes for handling Firefox Panel UI (Hamburger menu)."""
 
 from selenium.webdriver.common.by import By
-import time
+import itertools
+from datetime import datetime, timedelta
+from foxpuppet.registry import Registry
+from foxpuppet.windows.browser.bookmarks.places import run_places_script, to_prtime
 from foxpuppet.windows.browser.navbar import NavBar
+from foxpuppet.windows.browser.panel_ui.places import (
+    INSERT_VISITS_SCRIPT,
+    QUERY_HISTORY_SCRIPT,
+    SANITIZE_SCRIPT,
+    SANITIZED_SCRIPT,
+    UNWATCH_SANITIZE_SCRIPT,
+    WATCH_SANITIZE_SCRIPT,
+    HistoryFilter,
+    HistoryRecord,
+    VisitData,
+)
 from selenium.webdriver.remote.webelement import WebElement
-from typing import Type, Any, TYPE_CHECKING, Optional
+from typing import (
+    Type,
+    Any,
+    TYPE_CHECKING,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    Union,
+)
 from selenium.webdriver.support import expected_conditions as EC
 
+#: Panel UI classes by the id of the element they are created from.
+PANEL_ITEMS = Registry("foxpuppet.panel_items")
 
+
+@PANEL_ITEMS.register("PanelUI-menu-button")
 class PanelUI(NavBar):
     """Handles interaction with Panel UI."""
 
+    #: Reset fragment hiding the app menu and every open panel or popup.
+    RESET_SCRIPT = """
+    PanelUI.hide();
+    for (const popup of document.querySelectorAll("panel, menupopup")) {
+        if (popup.state == "open" || popup.state == "showing") {
+            popup.hidePopup();
+        }
+    }
+    """
+
     if TYPE_CHECKING:
         from foxpuppet.windows import BrowserWindow
 
     @staticmethod
     def create(
-        window: Optional["BrowserWindow"], root: WebElement
+        window: Optional["BrowserWindow"],
+        root: WebElement,
+        panel_id: Optional[str] = None,
     ) -> Type["PanelUI"] | Any:
         """Create a Panel UI object.
 
@@ -30,16 +69,17 @@ class PanelUI(NavBar):
                 (:py:class:`~selenium.webdriver.remote.webelement.WebElement`):
                 WebDriver element object that serves as the root for the
                 Panel UI.
+            panel_id (str, optional): Id of the root element, if already
+                known.
 
         Returns:
             :py:class:`PanelUI`: Firefox Panel UI.
 
         """
-        panel_items: dict = {}
-        _id: str | bool | WebElement | dict = root.get_property("id")
-
-        panel_items.update(PANEL_ITEMS)
-        return panel_items.get(_id, PanelUI)(window, root)
+        _id: str | bool | WebElement | dict | None = panel_id
+        if _id is None:
+            _id = root.get_property("id")
+        return PANEL_ITEMS.get(str(_id), PanelUI)(window, root)
 
     @property
     def is_update_available(self) -> bool:
@@ -49,7 +89,7 @@ class PanelUI(NavBar):
         Returns:
             bool: True if an update notification (barge) is present, False otherwise.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             update_status = self.selenium.find_element(
                 *PanelUILocators.PANEL_UI_BUTTON
             ).get_attribute("barged")
@@ -59,7 +99,7 @@ class PanelUI(NavBar):
         """
         Opens the Panel UI menu.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             self.selenium.find_element(*PanelUILocators.PANEL_UI_BUTTON).click()
             self.wait.until(
                 EC.presence_of_element_located(*PanelUILocators.PANEL_POPUP),
@@ -70,31 +110,25 @@ class PanelUI(NavBar):
         """
         Opens a new tab using the Panel UI menu.
         """
-        initial_handles = set(self.selenium.window_handles)
         self.open_panel_menu()
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            self.selenium.find_element(*PanelUILocators.NEW_TAB).click()
-            self.wait.until(
-                lambda _: set(self.selenium.window_handles) - initial_handles,
+        with self.context(self.selenium.CONTEXT_CHROME):
+            new_tab = self.window._open_window(
+                self.selenium.find_element(*PanelUILocators.NEW_TAB).click,
                 message="New Tab did not open",
             )
-            new_tab = (set(self.selenium.window_handles) - initial_handles).pop()
-            self.selenium.switch_to.window(new_tab)
+            self.window.focus.switch(new_tab)
 
     def open_new_window(self) -> None:
         """
         Opens a new window using the Panel UI menu.
         """
-        initial_handles = set(self.selenium.window_handles)
         self.open_panel_menu()
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            self.selenium.find_element(*PanelUILocators.NEW_WINDOW).click()
-            self.wait.until(
-                lambda _: set(self.selenium.window_handles) - initial_handles,
+        with self.context(self.selenium.CONTEXT_CHROME):
+            new_window = self.window._open_window(
+                self.selenium.find_element(*PanelUILocators.NEW_WINDOW).click,
                 message="New window did not open",
             )
-            new_window = (set(self.selenium.window_handles) - initial_handles).pop()
-            self.selenium.switch_to.window(new_window)
+            self.window.focus.switch(new_window)
             self.wait.until(
                 lambda _: self.selenium.execute_script("return document.readyState")
                 == "complete",
@@ -105,23 +139,18 @@ class PanelUI(NavBar):
         """
         Opens a new window in private browsing mode using the Panel UI menu.
         """
-        initial_handles = set(self.selenium.window_handles)
         self.open_panel_menu()
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            self.selenium.find_element(*PanelUILocators.PRIVATE_WINDOW).click()
-            self.wait.until(
-                lambda _: set(self.selenium.window_handles) - initial_handles,
+        with self.context(self.selenium.CONTEXT_CHROME):
+            new_private_window = self.window._open_window(
+                self.selenium.find_element(*PanelUILocators.PRIVATE_WINDOW).click,
                 message="Private window did not open",
             )
-            from foxpuppet.windows.browser.window import BrowserWindow
-
-            new_private_window = self.selenium.window_handles[-1]
             try:
-                private_window = BrowserWindow(
-                    self.selenium, new_private_window
+                private_window = self.window.window_manager.get(
+                    new_private_window
                 ).is_private
                 if private_window:
-                    self.selenium.switch_to.window(new_private_window)
+                    self.window.focus.switch(new_private_window)
             except Exception as e:
                 raise Exception(f"The new window is not private: {str(e)}")
 
@@ -129,7 +158,7 @@ class PanelUI(NavBar):
         """
         Opens the History in Panel UI Menu
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             self.selenium.find_element(*PanelUILocators.HISTORY).click()
             self.wait.until(
                 lambda _: self.selenium.find_element(
@@ -139,7 +168,11 @@ class PanelUI(NavBar):
             )
 
 
+@PANEL_ITEMS.register("appMenu-history-button")
 class History(PanelUI):
+    #: Reset fragment clearing the whole browsing history.
+    RESET_SCRIPT = "await PlacesUtils.history.clear();"
+
     def history_items(self) -> list[WebElement]:
         """
         Retrieves all history items from the Panel UI history menu.
@@ -148,36 +181,213 @@ class History(PanelUI):
             list[WebElement]: List of WebElement objects representing history items.
                 Returns an empty list if no history items are found.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             history_items = self.selenium.find_elements(
                 *PanelUILocators.RECENT_HISTORY_ITEMS
             )
             return history_items
 
-    def clear_history(self):
+    def query(
+        self,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        host: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[HistoryRecord]:
+        """Query the history in the places database in one chrome call.
+
+        Unlike :py:meth:`history_items` this does not need the menu open
+        and is not capped by it.
+
+        Args:
+            text (str, optional): Text the title or URL contains, ignoring
+                case.
+            since (:py:class:`~datetime.datetime`, optional): Earliest last
+                visit.
+            until (:py:class:`~datetime.datetime`, optional): Last visit
+                before this time.
+            host (str, optional): Exact host of the URL.
+            limit (int): Maximum number of records. Defaults to 100.
+            offset (int): Number of records to skip. Defaults to 0.
+
+        Returns:
+            list: :py:class:`HistoryRecord` objects, most recently visited
+                first.
+
+        """
+        conditions = self._history_filter(text, since, until, host)
+        result = run_places_script(
+            self.window, QUERY_HISTORY_SCRIPT, conditions, None, limit, offset
+        )
+        return [HistoryRecord.from_row(row) for row in result["rows"]]
+
+    def iter_history(
+        self,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        host: Optional[str] = None,
+        page_size: int = 500,
+    ) -> Iterator[HistoryRecord]:
+        """Iterate over the history, fetching it a page at a time.
+
+        Pages continue before the last record seen rather than at an
+        offset, so every page costs the same however large the history is.
+
+        Args:
+            text (str, optional): Text the title or URL contains, ignoring
+                case.
+            since (:py:class:`~datetime.datetime`, optional): Earliest last
+                visit.
+            until (:py:class:`~datetime.datetime`, optional): Last visit
+                before this time.
+            host (str, optional): Exact host of the URL.
+            page_size (int): Number of records fetched per chrome call.
+                Defaults to 500.
+
+        Yields:
+            :py:class:`HistoryRecord`: Pages, most recently visited first.
+
+        """
+        conditions = self._history_filter(text, since, until, host)
+        cursor = None
+        while True:
+            rows = run_places_script(
+                self.window, QUERY_HISTORY_SCRIPT, conditions, cursor, page_size, 0
+            )["rows"]
+            for row in rows:
+                yield HistoryRecord.from_row(row)
+            if len(rows) < page_size:
+                return
+            cursor = [rows[-1][4], rows[-1][0]]
+
+    def insert_visits(
+        self,
+        visits: Iterable[VisitData],
+        chunk_size: int = 1000,
+        progress: Optional[Callable[[int], Any]] = None,
+    ) -> int:
+        """Add visits to the history, streaming them in chunks.
+
+        Each chunk is one ``PlacesUtils.history.insertMany`` call. Only one
+        chunk is held in memory, so generators of any size can be passed.
+
+        Args:
+            visits (iterable of :py:class:`VisitData`): Visits to add.
+            chunk_size (int): Number of visits per chrome call. Defaults to
+                1000.
+            progress (callable, optional): Called with the number of visits
+                added so far after every chunk.
+
+        Returns:
+            int: Number of visits added. Invalid URLs are skipped.
+
+        """
+        iterator = iter(visits)
+        inserted = 0
+        while chunk := list(itertools.islice(iterator, chunk_size)):
+            items = [
+                dict(
+                    visit,
+                    date=(
+                        to_prtime(date) // 1000
+                        if (date := visit.get("date")) is not None
+                        else None
+                    ),
+                )
+                for visit in chunk
+            ]
+            result = run_places_script(self.window, INSERT_VISITS_SCRIPT, items)
+            inserted += result["inserted"]
+            if progress is not None:
+                progress(inserted)
+        return inserted
+
+    @staticmethod
+    def _history_filter(
+        text: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        host: Optional[str],
+    ) -> HistoryFilter:
+        conditions: HistoryFilter = {}
+        if text is not None:
+            conditions["text"] = text
+        if host is not None:
+            conditions["host"] = host
+        if since is not None:
+            conditions["since"] = to_prtime(since)
+        if until is not None:
+            conditions["until"] = to_prtime(until)
+        return conditions
+
+    def clear_history(
+        self, timespan: Union[None, str, timedelta, tuple[datetime, datetime]] = None
+    ) -> None:
         """
         Clears the browsing history.
+
+        Without a timespan this drives the Clear Recent History dialog and
+        waits for the Sanitizer to report completion. The dialog path always
+        selects "Everything", whatever time range the dialog offers. With a
+        timespan the Sanitizer is called directly, which returns once the
+        data is gone.
+
+        Args:
+            timespan (optional): ``"everything"``, a
+                :py:class:`~datetime.timedelta` reaching back from now, or a
+                pair of :py:class:`~datetime.datetime` objects. Defaults to
+                clearing everything through the dialog.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            self.selenium.find_element(*PanelUILocators.CLEAR_RECENT_HISTORY).click()
-            self.selenium.switch_to.frame(
-                self.selenium.find_element(*PanelUILocators.HISTORY_IFRAME)
-            )
-            with self.selenium.context(self.selenium.CONTEXT_CONTENT):
-                self.selenium.find_element(*PanelUILocators.DROPDOWN_HISTORY).click()
-                self.selenium.find_element(
-                    *PanelUILocators.CLEAR_HISTORY_EVERYTHING
-                ).click()
-                self.selenium.execute_script(
-                    """
-                const shadowHost = arguments[0];
-                    const shadowRoot = shadowHost.shadowRoot;
-                    const clearRecentHistoryButton = shadowRoot.querySelector('button[dlgtype="accept"]');
-                    clearRecentHistoryButton.click();
-                """,
-                    self.selenium.find_element(*PanelUILocators.HISTORY_DIALOG_BUTTON),
+        if timespan is not None:
+            run_places_script(self.window, SANITIZE_SCRIPT, self._clear_range(timespan))
+            return
+        with self.context(self.selenium.CONTEXT_CHROME):
+            self.selenium.execute_script(WATCH_SANITIZE_SCRIPT)
+            try:
+                self.selenium.find_element(*PanelUILocators.CLEAR_RECENT_HISTORY).click()
+                self.selenium.switch_to.frame(
+                    self.selenium.find_element(*PanelUILocators.HISTORY_IFRAME)
                 )
-        time.sleep(1)
+                with self.context(self.selenium.CONTEXT_CONTENT):
+                    self.selenium.find_element(*PanelUILocators.DROPDOWN_HISTORY).click()
+                    self.selenium.find_element(
+                        *PanelUILocators.CLEAR_HISTORY_EVERYTHING
+                    ).click()
+                    self.selenium.execute_script(
+                        """
+                    const shadowHost = arguments[0];
+                        const shadowRoot = shadowHost.shadowRoot;
+                        const clearRecentHistoryButton = shadowRoot.querySelector('button[dlgtype="accept"]');
+                        clearRecentHistoryButton.click();
+                    """,
+                        self.selenium.find_element(
+                            *PanelUILocators.HISTORY_DIALOG_BUTTON
+                        ),
+                    )
+                self.selenium.switch_to.default_content()
+                self.window._wait_until(
+                    lambda _: self.selenium.execute_script(SANITIZED_SCRIPT),
+                    message="History was not cleared",
+                )
+            finally:
+                self.selenium.switch_to.default_content()
+                self.selenium.execute_script(UNWATCH_SANITIZE_SCRIPT)
+
+    @staticmethod
+    def _clear_range(
+        timespan: Union[str, timedelta, tuple[datetime, datetime]],
+    ) -> Optional[list[int]]:
+        if timespan == "everything":
+            return None
+        if isinstance(timespan, str):
+            raise ValueError("Unknown timespan {0!r}".format(timespan))
+        if isinstance(timespan, timedelta):
+            now = datetime.now()
+            timespan = (now - timespan, now)
+        return [to_prtime(timespan[0]), to_prtime(timespan[1])]
 
 
 class PanelUILocators:
@@ -198,9 +408,3 @@ class PanelUILocators:
         By.CSS_SELECTOR,
         "#appMenu_historyMenu toolbarbutton.subviewbutton",
     )
-
-
-PANEL_ITEMS = {
-    "PanelUI-menu-button": PanelUI,
-    "appMenu-history-button": History,
-}
@@ -0,0 +1,199 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Chrome scripts working on the history in the places database."""
+
+from datetime import datetime
+from typing import Any, Optional, TypedDict
+
+from foxpuppet.windows.browser.bookmarks.places import from_prtime
+
+# Resolves with history rows ordered by last visit, newest first. Pages
+# continue before the cursor, a [lastVisit, id] pair, or at an offset.
+QUERY_HISTORY_SCRIPT = """
+const [filter, cursor, limit, offset] = args;
+const conditions = ["h.last_visit_date IS NOT NULL"];
+const params = { limit, offset };
+if (filter.text != null) {
+    conditions.push(`(instr(lower(h.title), lower(:text)) > 0
+                      OR instr(lower(h.url), lower(:text)) > 0)`);
+    params.text = filter.text;
+}
+if (filter.host != null) {
+    conditions.push("h.rev_host = :revHost");
+    params.revHost = Array.from(filter.host.toLowerCase()).reverse().join("") + ".";
+}
+if (filter.since != null) {
+    conditions.push("h.last_visit_date >= :since");
+    params.since = filter.since;
+}
+if (filter.until != null) {
+    conditions.push("h.last_visit_date < :until");
+    params.until = filter.until;
+}
+if (cursor != null) {
+    conditions.push("(h.last_visit_date, h.id) < (:cursorVisit, :cursorId)");
+    [params.cursorVisit, params.cursorId] = cursor;
+}
+const db = await PlacesUtils.promiseDBConnection();
+const rows = await db.executeCached(
+    `SELECT h.id, h.url, h.title, h.visit_count, h.last_visit_date
+     FROM moz_places h
+     WHERE ${conditions.join(" AND ")}
+     ORDER BY h.last_visit_date DESC, h.id DESC
+     LIMIT :limit OFFSET :offset`,
+    params
+);
+return {
+    rows: rows.map(row => [
+        row.getResultByName("id"),
+        row.getResultByName("url"),
+        row.getResultByName("title"),
+        row.getResultByName("visit_count"),
+        row.getResultByName("last_visit_date"),
+    ]),
+};
+"""
+
+INSERT_VISITS_SCRIPT = """
+const [visits] = args;
+const transitions = Object.values(PlacesUtils.history.TRANSITIONS);
+const pages = visits.map(visit => ({
+    url: visit.url,
+    title: visit.title ?? undefined,
+    visits: [{
+        date: visit.date == null ? new Date() : new Date(visit.date),
+        transition: transitions.includes(visit.transition)
+            ? visit.transition : PlacesUtils.history.TRANSITIONS.LINK,
+    }],
+}));
+let failed = 0;
+try {
+    await PlacesUtils.history.insertMany(pages, null, () => failed++);
+} catch (error) {
+    // insertMany rejects when none of the pages were valid.
+    if (failed < pages.length) {
+        throw error;
+    }
+}
+return { inserted: pages.length - failed };
+"""
+
+# Flags the window once the Sanitizer reports that it finished clearing.
+# Removes the observer of WATCH_SANITIZE_SCRIPT, unless it already fired.
+UNWATCH_SANITIZE_SCRIPT = """
+const observer = window.foxpuppetSanitizeObserver;
+if (observer) {
+    Services.obs.removeObserver(observer, "sanitizer-sanitization-complete");
+    delete window.foxpuppetSanitizeObserver;
+}
+"""
+
+WATCH_SANITIZE_SCRIPT = UNWATCH_SANITIZE_SCRIPT + """
+window.foxpuppetSanitized = false;
+window.foxpuppetSanitizeObserver = () => {
+    window.foxpuppetSanitized = true;
+    Services.obs.removeObserver(
+        window.foxpuppetSanitizeObserver, "sanitizer-sanitization-complete"
+    );
+    delete window.foxpuppetSanitizeObserver;
+};
+Services.obs.addObserver(
+    window.foxpuppetSanitizeObserver, "sanitizer-sanitization-complete"
+);
+"""
+
+SANITIZED_SCRIPT = "return window.foxpuppetSanitized === true;"
+
+# Clears history, form data and downloads in a [start, end] timespan of
+# microseconds since the epoch, or everything when the timespan is null.
+SANITIZE_SCRIPT = """
+const [timespan] = args;
+const { Sanitizer } = ChromeUtils.importESModule(
+    "resource:///modules/Sanitizer.sys.mjs"
+);
+const items = "historyFormDataAndDownloads" in Sanitizer.items
+    ? ["historyFormDataAndDownloads"]
+    : ["history", "formdata", "downloads"];
+const options = timespan == null ? { ignoreTimespan: true } : { range: timespan };
+await Sanitizer.sanitize(items, options);
+return {};
+"""
+
+
+class HistoryFilter(TypedDict, total=False):
+    """Conditions a history entry has to match."""
+
+    #: Text the title or URL contains, ignoring case.
+    text: str
+    #: Exact host of the URL.
+    host: str
+    #: Earliest last visit, in microseconds since the epoch.
+    since: int
+    #: Last visit before this time, in microseconds since the epoch.
+    until: int
+
+
+class VisitData(TypedDict, total=False):
+    """A visit inserted by :py:meth:`History.insert_visits`."""
+
+    #: URL of the visited page. Required.
+    url: str
+    #: Title of the page.
+    title: Optional[str]
+    #: Time of the visit. Defaults to now.
+    date: Optional[datetime]
+    #: ``PlacesUtils.history.TRANSITIONS`` value. Defaults to a link.
+    transition: int
+
+
+class HistoryRecord(object):
+    """A page in the history read from the places database.
+
+    Args:
+        url (str): URL of the page.
+        title (str): Title of the page.
+        visit_count (int): Number of visits.
+        last_visit (:py:class:`~datetime.datetime`): Time of the last
+            visit.
+    """
+
+    __slots__ = ("url", "title", "visit_count", "last_visit")
+
+    def __init__(
+        self,
+        url: str,
+        title: Optional[str],
+        visit_count: int,
+        last_visit: Optional[datetime],
+    ) -> None:
+        """Create HistoryRecord object.
+
+        Args:
+            url (str): URL of the page.
+            title (str): Title of the page.
+            visit_count (int): Number of visits.
+            last_visit (:py:class:`~datetime.datetime`): Time of the last
+                visit.
+        """
+        self.url = url
+        self.title = title
+        self.visit_count = visit_count
+        self.last_visit = last_visit
+
+    def __repr__(self) -> str:
+        """Return a readable representation of the record."""
+        return "HistoryRecord(url={0.url!r}, visit_count={0.visit_count!r})".format(self)
+
+    @classmethod
+    def from_row(cls, row: list[Any]) -> "HistoryRecord":
+        """Create a record from a row returned by the history query.
+
+        Args:
+            row (list): Id, URL, title, visit count and last visit time.
+
+        Returns:
+            :py:class:`HistoryRecord`: History record.
+
+        """
+        return cls(row[1], row[2], row[3], from_prtime(row[4]))
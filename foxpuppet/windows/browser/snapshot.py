@@ -0,0 +1,238 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Reads the state of a browser window with single chrome scripts."""
+
+from typing import TYPE_CHECKING, Iterable, Optional, TypedDict, Union
+
+from selenium.webdriver.remote.webelement import WebElement
+
+if TYPE_CHECKING:
+    from foxpuppet.windows import BaseWindow
+
+
+class NotificationState(TypedDict):
+    """Currently displayed notification."""
+
+    id: str
+    label: Optional[str]
+    origin: Optional[str]
+    element: WebElement
+
+
+class PanelState(TypedDict):
+    """Panel UI item the panel property resolves to."""
+
+    id: str
+    element: WebElement
+
+
+class WindowSnapshot(TypedDict):
+    """State of a browser window."""
+
+    notification: Optional[NotificationState]
+    panel: Optional[PanelState]
+    panel_view: Optional[str]
+    starred: bool
+    tracking_shield: bool
+    url: Optional[str]
+    private: bool
+
+
+# Shared with scripts that need to find the displayed notification, it
+# mirrors the lookup done by BrowserWindow.notification.
+FIND_NOTIFICATION_SCRIPT = """
+const isVisible = el => {
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+};
+const findNotification = () => (
+    document.querySelector("#notification-popup popupnotification") ||
+    Array.from(
+        document.querySelectorAll("#appMenu-notification-popup popupnotification")
+    ).find(isVisible) ||
+    null
+);
+const describeNotification = el => el && {
+    id: el.id,
+    label: el.getAttribute("label"),
+    origin: el.getAttribute("name"),
+    element: el,
+};
+"""
+
+SNAPSHOT_SCRIPT = FIND_NOTIFICATION_SCRIPT + """
+const panelIds = arguments[0];
+const win = document.defaultView;
+const { PrivateBrowsingUtils } = ChromeUtils.importESModule(
+    "resource://gre/modules/PrivateBrowsingUtils.sys.mjs"
+);
+
+const menuButton = document.getElementById("PanelUI-menu-button");
+let panel = menuButton && { id: menuButton.id, element: menuButton };
+const items = document.querySelectorAll(
+    "#appMenu-mainView .panel-subview-body toolbarbutton"
+);
+for (const item of items) {
+    if (panelIds.includes(item.id) && isVisible(item)) {
+        panel = { id: item.id, element: item };
+    }
+}
+const appMenu = document.getElementById("appMenu-popup");
+const view = appMenu && appMenu.state == "open" &&
+    appMenu.querySelector("panelview[current]");
+
+const star = document.getElementById("star-button");
+const shield = document.getElementById("tracking-protection-icon-box");
+const urlbar = document.getElementById("urlbar-input");
+
+return {
+    notification: describeNotification(findNotification()),
+    panel: panel || null,
+    panel_view: view ? view.id : null,
+    starred: !!star && star.getAttribute("starred") == "true",
+    tracking_shield: !!shield && shield.hasAttribute("active"),
+    url: urlbar ? urlbar.value : null,
+    private: PrivateBrowsingUtils.isWindowPrivate(win),
+};
+"""
+
+
+WATCH_NOTIFICATION_SCRIPT = FIND_NOTIFICATION_SCRIPT + """
+const [ids, closed, timeout] = arguments;
+const resolve = arguments[arguments.length - 1];
+const win = document.defaultView;
+
+const check = () => {
+    const el = findNotification();
+    if (closed) {
+        return el ? null : { notification: null };
+    }
+    if (el && (ids === null || ids.includes(el.id))) {
+        return { notification: describeNotification(el) };
+    }
+    return null;
+};
+
+const popups = ["notification-popup", "appMenu-notification-popup"]
+    .map(id => document.getElementById(id))
+    .filter(Boolean);
+const observer = new win.MutationObserver(() => onChange());
+let timer = null;
+
+const finish = result => {
+    observer.disconnect();
+    for (const popup of popups) {
+        popup.removeEventListener("popupshown", onChange);
+        popup.removeEventListener("popuphidden", onChange);
+    }
+    win.clearTimeout(timer);
+    resolve(result);
+};
+const onChange = () => {
+    const result = check();
+    if (result) {
+        finish(result);
+    }
+};
+
+const result = check();
+if (result) {
+    resolve(result);
+} else {
+    for (const popup of popups) {
+        popup.addEventListener("popupshown", onChange);
+        popup.addEventListener("popuphidden", onChange);
+        observer.observe(popup, { childList: true, subtree: true, attributes: true });
+    }
+    timer = win.setTimeout(() => finish({ timeout: true }), timeout);
+}
+"""
+
+# Reads one attribute of a chrome element, for properties that need a
+# single field rather than a full snapshot.
+ATTRIBUTE_SCRIPT = """
+const [id, name] = arguments;
+const el = document.getElementById(id);
+return el ? el.getAttribute(name) : null;
+"""
+
+
+class NotificationEvent(TypedDict, total=False):
+    """Result of watching the notification popups."""
+
+    notification: Optional[NotificationState]
+    timeout: bool
+
+
+def watch_notification(
+    window: "BaseWindow",
+    ids: Optional[Iterable[str]],
+    closed: bool,
+    timeout: Union[int, float],
+) -> NotificationEvent:
+    """Wait in chrome for a notification to be shown or closed.
+
+    Listeners for ``popupshown`` and ``popuphidden`` and a mutation
+    observer on the notification popups re-check the displayed
+    notification whenever it may have changed, so nothing is polled.
+
+    Args:
+        window (:py:class:`BaseWindow`): Window used to send the script.
+        ids (iterable of str, optional): Notification ids to wait for, or
+            `None` for any notification.
+        closed (bool): Wait for no notification to be displayed instead.
+        timeout (int or float): Seconds to wait before giving up.
+
+    Returns:
+        :py:class:`NotificationEvent`: The displayed notification, `None`
+            for a closed notification, or a ``timeout`` flag.
+
+    """
+    with window.context(window.selenium.CONTEXT_CHROME):
+        event: NotificationEvent = window.selenium.execute_async_script(
+            WATCH_NOTIFICATION_SCRIPT,
+            None if ids is None else list(ids),
+            closed,
+            int(timeout * 1000),
+        )
+    return event
+
+
+def take_snapshot(window: "BaseWindow", panel_ids: Iterable[str] = ()) -> WindowSnapshot:
+    """Read the state of the focused browser window in one round-trip.
+
+    Args:
+        window (:py:class:`BaseWindow`): Window used to send the script.
+        panel_ids (iterable of str): Ids of the app menu items that map to
+            a Panel UI class.
+
+    Returns:
+        :py:class:`WindowSnapshot`: State of the window.
+
+    """
+    with window.context(window.selenium.CONTEXT_CHROME):
+        snapshot: WindowSnapshot = window.selenium.execute_script(
+            SNAPSHOT_SCRIPT, list(panel_ids)
+        )
+    return snapshot
+
+
+def read_attribute(window: "BaseWindow", element_id: str, name: str) -> Optional[str]:
+    """Read an attribute of a chrome element in one round-trip.
+
+    Args:
+        window (:py:class:`BaseWindow`): Window used to send the script.
+        element_id (str): Id of the chrome element.
+        name (str): Name of the attribute.
+
+    Returns:
+        str: Value of the attribute, or `None` if the element or the
+            attribute is missing.
+
+    """
+    with window.context(window.selenium.CONTEXT_CHROME):
+        value: Optional[str] = window.selenium.execute_script(
+            ATTRIBUTE_SCRIPT, element_id, name
+        )
+    return value
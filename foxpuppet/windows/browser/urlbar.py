@@ -3,47 +3,291 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 """Creates Navbar object to interact with Firefox URL Bar."""
 
+from typing import Optional, Sequence, TypedDict
+
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.support.wait import WebDriverWait
 from foxpuppet.region import Region
 
+# Defines readResults(context, rows), describing the results of a finished
+# query context with the rows that show them, and viewRows().
+READ_RESULTS_SCRIPT = """
+const { UrlbarUtils } = ChromeUtils.importESModule(
+    "resource:///modules/UrlbarUtils.sys.mjs"
+);
+const resultTypes = Object.fromEntries(
+    Object.entries(UrlbarUtils.RESULT_TYPE).map(([name, value]) => [value, name])
+);
+const readResults = (context, rows) => context.results.map((result, index) => {
+    const row = rows.find(row => row.result === result);
+    const url = row && row.querySelector(".urlbarView-url");
+    const payload = result.payload;
+    return {
+        url: payload.url ?? null,
+        title: payload.title ?? payload.suggestion ?? payload.query ?? null,
+        type: (resultTypes[result.type] ?? "unknown").toLowerCase(),
+        heuristic: !!result.heuristic,
+        index,
+        // Only the visible text, as Selenium would read it from the row.
+        display_url: (url && url.checkVisibility() ? url.innerText.trim() : "") || null,
+    };
+});
+const viewRows = () => Array.from(
+    gURLBar.view.panel.querySelectorAll(".urlbarView-row")
+).filter(row => row.result && row.style.display != "none");
+"""
+
+SUGGESTIONS_SCRIPT = READ_RESULTS_SCRIPT + """
+const [timeout] = arguments;
+const resolve = arguments[arguments.length - 1];
+const end = Date.now() + timeout;
+(async () => {
+    const context = await gURLBar.lastQueryContextPromise;
+    // The view renders the rows of the last results after they arrived.
+    let rows = viewRows();
+    while (context.results.some(result => !rows.some(row => row.result === result)) &&
+           Date.now() < end) {
+        await new Promise(done => window.requestAnimationFrame(done));
+        rows = viewRows();
+    }
+    return readResults(context, rows);
+})().then(resolve, error => resolve({ error: String(error) }));
+"""
+
+# Enters each text with the same input event as a user, after the query of
+# the previous one ended, and times its query from the input event in
+# milliseconds. Rendering ends at the first animation frame, that is right
+# before the paint, in which the view shows every result of the query.
+LATENCY_SCRIPT = """
+const [texts, timeout] = arguments;
+const resolve = arguments[arguments.length - 1];
+const controller = gURLBar.controller;
+const input = gURLBar.inputField;
+
+const measure = async searchString => {
+    const record = {
+        text: searchString,
+        first_result_ms: null,
+        finished_ms: null,
+        rendered_ms: null,
+        result_count: 0,
+    };
+    let start = null;
+    let context = null;
+    let listener;
+    const finished = new Promise(done => {
+        const finish = queryContext => {
+            if (queryContext === context) {
+                done();
+            }
+        };
+        listener = {
+            onQueryStarted(queryContext) {
+                context ??= queryContext;
+            },
+            onQueryResults(queryContext) {
+                if (queryContext === context && record.first_result_ms === null) {
+                    record.first_result_ms = ChromeUtils.now() - start;
+                }
+            },
+            onQueryFinished(queryContext) {
+                if (queryContext === context) {
+                    record.finished_ms = ChromeUtils.now() - start;
+                    record.result_count = queryContext.results.length;
+                }
+                finish(queryContext);
+            },
+            onQueryCancelled: finish,
+        };
+    });
+    controller.addQueryListener(listener);
+    input.addEventListener("input", () => {
+        start = ChromeUtils.now();
+    }, { once: true, capture: true });
+    try {
+        input.setUserInput(searchString);
+        await Promise.race([
+            finished,
+            new Promise(done => window.setTimeout(done, timeout)),
+        ]);
+    } finally {
+        controller.removeQueryListener(listener);
+    }
+    if (record.finished_ms !== null) {
+        const shown = () => context.results.every(
+            result => gURLBar.view.visibleResults.includes(result)
+        );
+        do {
+            await new Promise(done => window.requestAnimationFrame(done));
+        } while (!shown() && ChromeUtils.now() - start < timeout);
+        if (shown()) {
+            record.rendered_ms = ChromeUtils.now() - start;
+        }
+    }
+    return record;
+};
+
+(async () => {
+    gURLBar.focus();
+    gURLBar.value = "";
+    const records = [];
+    for (const text of texts) {
+        records.push(await measure(text));
+    }
+    return records;
+})().then(resolve, error => resolve({ error: String(error) }));
+"""
+
+
+class QueryLatency(TypedDict):
+    """Time the URL bar took to answer a query."""
+
+    #: Text in the URL bar.
+    text: str
+    #: Milliseconds from the input event to the first results, if any.
+    first_result_ms: Optional[float]
+    #: Milliseconds from the input event to the end of the query.
+    finished_ms: Optional[float]
+    #: Milliseconds from the input event to the first frame in which the
+    #: view shows all results of the finished query.
+    rendered_ms: Optional[float]
+    #: Number of results of the finished query.
+    result_count: int
+
+
+class KeystrokeLatency(QueryLatency):
+    """Time the URL bar took to answer one keystroke."""
+
+    #: Character typed.
+    key: str
+
+
+class Suggestion(TypedDict):
+    """A result shown in the URL bar view."""
+
+    #: URL the result opens, if any.
+    url: Optional[str]
+    #: Title, search suggestion or query of the result.
+    title: Optional[str]
+    #: Lower case name of the ``UrlbarUtils.RESULT_TYPE``, e.g. ``url``.
+    type: str
+    #: Whether the result is the heuristic first result.
+    heuristic: bool
+    #: Position in the view.
+    index: int
+    #: Visible URL text of the row, or `None` if the row shows no URL.
+    display_url: Optional[str]
+
 
 class UrlBar(Region):
-    def suggestions(self, url: str) -> list[str]:
-        """
-        Get all URL suggestions shown in the URL bar.
+    def results(self, text: str) -> list[Suggestion]:
+        """Type into the URL bar and read the results of the query.
+
+        The results are read from the query context and the rows of the
+        view in one chrome script, whatever their number.
 
         Args:
-            url (str): The URL to type into the URL bar
+            text (str): Text to type into the URL bar.
 
         Returns:
-            list[str]: List of suggested URLs that appear in the URL bar
+            list: :py:class:`Suggestion` records in view order.
+
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             url_bar = self.selenium.find_element(*URLBarLocators.INPUT_FIELD)
             url_bar.clear()
-            url_bar.send_keys(url)
-
-            self.wait.until(
-                lambda _: self.selenium.find_elements(*URLBarLocators.SEARCH_RESULTS)
+            url_bar.send_keys(text)
+            results = self.selenium.execute_async_script(
+                SUGGESTIONS_SCRIPT, self.wait.timeout * 1000
+            )
+        if isinstance(results, dict):
+            raise WebDriverException(
+                "Reading URL bar results failed: {0}".format(results["error"])
             )
+        suggestions: list[Suggestion] = results
+        return suggestions
+
+    def measure_latency(self, text: str) -> list[KeystrokeLatency]:
+        """Type text in chrome and time the results of every keystroke.
 
-            search_results = self.selenium.find_elements(
-                *URLBarLocators.SEARCH_RESULT_ITEMS
+        Each character is entered with the same input event a user
+        produces, and the next one only after the query of the previous one
+        finished, so every record measures a complete query. Times missing
+        from a record mean the query did not get that far within the wait
+        timeout.
+
+        Args:
+            text (str): Text to type into the URL bar.
+
+        Returns:
+            list: :py:class:`KeystrokeLatency` records, one per character.
+
+        """
+        prefixes = [text[: i + 1] for i in range(len(text))]
+        latencies: list[KeystrokeLatency] = [
+            {"key": key, **record}
+            for key, record in zip(text, self.measure_queries(prefixes))
+        ]
+        return latencies
+
+    def measure_queries(self, texts: Sequence[str]) -> list[QueryLatency]:
+        """Enter texts in chrome one after another and time their queries.
+
+        All texts are entered by one chrome script. Each is entered with the
+        same input event as typing it, once the query of the previous text
+        ended or the wait timeout passed.
+
+        ``rendered_ms`` is taken in the first animation frame after the
+        query finished in which ``gURLBar.view.visibleResults`` holds every
+        result of the query, so it includes updating the rows and ends
+        right before that frame is painted. It is None if the view did not
+        show all results within the wait timeout.
+
+        Args:
+            texts (sequence of str): Texts to enter into the URL bar.
+
+        Returns:
+            list: :py:class:`QueryLatency` records, one per text.
+
+        """
+        timeout = self.wait.timeout
+        # Every query may take up to the wait timeout.
+        needed = timeout * (len(texts) + 1)
+        with self.context(self.selenium.CONTEXT_CHROME):
+            script_timeout = self.selenium.timeouts.script
+            if script_timeout < needed:
+                self.selenium.set_script_timeout(needed)
+            try:
+                records = self.selenium.execute_async_script(
+                    LATENCY_SCRIPT, list(texts), timeout * 1000
+                )
+            finally:
+                if script_timeout < needed:
+                    self.selenium.set_script_timeout(script_timeout)
+        if isinstance(records, dict):
+            raise WebDriverException(
+                "Measuring URL bar latency failed: {0}".format(records["error"])
             )
+        latencies: list[QueryLatency] = records
+        return latencies
 
-            suggested_urls = [
-                result.find_element(*URLBarLocators.SEARCH_RESULT_ITEM).text
-                for result in search_results
-                if result.find_element(*URLBarLocators.SEARCH_RESULT_ITEM).text
-            ]
+    def suggestions(self, url: str) -> list[str]:
+        """
+        Get all URL suggestions shown in the URL bar.
 
-            return suggested_urls
+        Args:
+            url (str): The URL to type into the URL bar
+
+        Returns:
+            list[str]: List of suggested URLs that appear in the URL bar,
+                as the visible text of the rows that show one.
+        """
+        return [
+            suggestion["display_url"]
+            for suggestion in self.results(url)
+            if suggestion["display_url"]
+        ]
 
 
 class URLBarLocators:
     INPUT_FIELD = (By.ID, "urlbar-input")
-    SEARCH_RESULTS = (By.ID, "urlbar-results")
-    SEARCH_RESULT_ITEM = (By.CSS_SELECTOR, "span.urlbarView-url")
-    SEARCH_RESULT_ITEMS = (By.CSS_SELECTOR, "div.urlbarView-row[role='presentation']")
@@ -3,15 +3,22 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 """Contains BrowserWindow object representing the Firefox browser."""
 
-from selenium.common.exceptions import NoSuchElementException
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 
 from foxpuppet import expected
 from foxpuppet.windows import BaseWindow
 from foxpuppet.windows.browser.navbar import NavBar
-from foxpuppet.windows.browser.notifications import BaseNotification
+from foxpuppet.windows.browser.notifications import NOTIFICATIONS, BaseNotification
 from foxpuppet.windows.browser.bookmarks.bookmark import Bookmark
-from foxpuppet.windows.browser.panel_ui.panel_ui import PanelUI
+from foxpuppet.windows.browser.panel_ui.panel_ui import PANEL_ITEMS, PanelUI
+from foxpuppet.windows.browser.snapshot import (
+    WindowSnapshot,
+    take_snapshot,
+    watch_notification,
+)
 from selenium.webdriver.remote.webelement import WebElement
 from typing import Any, Optional, Union, TypeVar, Type
 
@@ -27,18 +34,11 @@ class BrowserWindow(BaseWindow):
     _file_menu_private_window_locator = (By.ID, "menu_newPrivateWindow")
     _file_menu_new_window_button_locator = (By.ID, "menu_newNavigator")
     _nav_bar_locator = (By.ID, "nav-bar")
-    _notification_locator = (By.CSS_SELECTOR, "#notification-popup popupnotification")
-    _panel_ui_locator = (By.ID, "PanelUI-menu-button")
-    _app_menu_notification_locator = (
-        By.CSS_SELECTOR,
-        "#appMenu-notification-popup popupnotification",
-    )
-    _app_menu_panel_ui_locator = (
-        By.CSS_SELECTOR,
-        "#appMenu-mainView .panel-subview-body toolbarbutton",
-    )
     _tab_browser_locator = (By.ID, "tabbrowser-tabs")
 
+    #: Wait for notifications with chrome event listeners instead of polling.
+    notification_events: bool = True
+
     @property
     def navbar(self) -> NavBar:
         """Provide access to the Navigation Bar.
@@ -47,8 +47,8 @@ class BrowserWindow(BaseWindow):
             :py:class:`NavBar`: FoxPuppet NavBar object.
 
         """
-        window = BaseWindow(self.selenium, self.selenium.current_window_handle)
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        window = BaseWindow(self.selenium, self.focus.current_handle, self.window_manager)
+        with self.context(self.selenium.CONTEXT_CHROME):
             el: WebElement = self.selenium.find_element(*self._nav_bar_locator)
             return NavBar(window, el)
 
@@ -60,21 +60,10 @@ class BrowserWindow(BaseWindow):
             :py:class:`BaseNotification`: FoxPuppet BaseNotification object.
 
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            try:
-                root = self.selenium.find_element(*self._notification_locator)
-                return BaseNotification.create(self, root)
-            except NoSuchElementException:
-                pass
-            try:
-                notifications = self.selenium.find_elements(
-                    *self._app_menu_notification_locator
-                )
-                root = next(n for n in notifications if n.is_displayed())
-                return BaseNotification.create(self, root)
-            except StopIteration:
-                pass
-        return None  # no notification is displayed
+        state = self.snapshot()["notification"]
+        if state is None:
+            return None  # no notification is displayed
+        return BaseNotification.create(self, state["element"], state["id"])
 
     @property
     def bookmark(self) -> Bookmark:
@@ -84,26 +73,35 @@ class BrowserWindow(BaseWindow):
             :py:class:`BaseBookmark`: FoxPuppet BasicBookmark object.
 
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
+        with self.context(self.selenium.CONTEXT_CHROME):
             root = self.selenium.find_element(*self._bookmark_locator)
             return Bookmark.create(self, root)
 
     @property
     def panel(self) -> PanelUI | Any:
-        panel_root = None
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            root = self.selenium.find_element(*self._panel_ui_locator)
-            panel_root = PanelUI.create(self, root)
+        """Provide access to the currently displayed Panel UI item.
 
-            panel_items = self.selenium.find_elements(*self._app_menu_panel_ui_locator)
-            for item in panel_items:
-                _id = item.get_property("id")
-                from foxpuppet.windows.browser.panel_ui.panel_ui import PANEL_ITEMS
+        Returns:
+            :py:class:`PanelUI`: FoxPuppet PanelUI object.
 
-                if _id in PANEL_ITEMS and item.is_displayed():
-                    panel_root = PANEL_ITEMS[_id].create(self, item)  # type: ignore
+        """
+        state = self.snapshot()["panel"]
+        if state is None:
+            return None
+        return PanelUI.create(self, state["element"], state["id"])
 
-        return panel_root
+    def snapshot(self) -> WindowSnapshot:
+        """Read the state of the window with a single chrome script.
+
+        The snapshot holds the displayed notification, the Panel UI item,
+        the open app menu view, the bookmark star and tracking shield
+        state, the URL bar value and whether the window is private.
+
+        Returns:
+            :py:class:`WindowSnapshot`: State of the window.
+
+        """
+        return take_snapshot(self, PANEL_ITEMS)
 
     def wait_for_notification(
         self,
@@ -111,6 +109,11 @@ class BrowserWindow(BaseWindow):
     ) -> Optional[T]:
         """Wait for the specified notification to be displayed.
 
+        By default this listens for the notification popups to change in
+        chrome instead of polling. Polling is used when
+        :py:attr:`notification_events` is `False` or the listeners cannot be
+        installed.
+
         Args:
             notification_class (:py:class:`BaseNotification`, optional):
                 The notification class to wait for. If `None` is specified it
@@ -126,17 +129,51 @@ class BrowserWindow(BaseWindow):
                 message = "No notification was shown."
             else:
                 message = "{0} was not shown.".format(notification_class.__name__)
-            self.wait.until(
-                lambda _: isinstance(self.notification, notification_class),
+        else:
+            message = "Unexpected notification shown."
+        if self.notification_events:
+            try:
+                return self._watch_notification(notification_class, message)
+            except TimeoutException:
+                raise
+            except WebDriverException:
+                pass  # chrome listeners are unavailable, poll instead
+        if notification_class:
+            notification: T = self._wait_until(
+                expected.region_is_displayed(
+                    lambda: self.notification, notification_class
+                ),
                 message=message,
             )
-            return self.notification  # type: ignore
-        else:
-            self.wait.until(
-                lambda _: self.notification is None,
-                message="Unexpected notification shown.",
+            return notification
+        self._wait_until(
+            expected.region_is_closed(lambda: self.notification), message=message
+        )
+        return None
+
+    def _watch_notification(
+        self, notification_class: Optional[Type[T]], message: str
+    ) -> Optional[T]:
+        ids = None
+        if notification_class and notification_class is not BaseNotification:
+            ids = NOTIFICATIONS.ids_for(notification_class)
+        start = time.monotonic()
+        try:
+            event = watch_notification(
+                self, ids, notification_class is None, self.wait.timeout
             )
+        except TimeoutException:  # the script timeout was shorter
+            raise TimeoutException(message)
+        finally:
+            self.last_wait = expected.WaitStatistics(1, time.monotonic() - start)
+        if event.get("timeout"):
+            raise TimeoutException(message)
+        state = event.get("notification")
+        if state is None:
             return None
+        return BaseNotification.create(  # type: ignore
+            self, state["element"], state["id"]
+        )
 
     def wait_for_bookmark(self) -> Bookmark:
         """Wait for the bookmark panel to be displayed.
@@ -144,14 +181,11 @@ class BrowserWindow(BaseWindow):
         Returns:
             Optional[Bookmark]: The Bookmark object if found, or None if not found.
         """
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            message = "Bookmark panel was not shown."
-
-            self.wait.until(
-                lambda _: self.bookmark is not None,
-                message=message,
-            )
-            return self.bookmark
+        bookmark: Bookmark = self._wait_until(
+            expected.region_is_displayed(lambda: self.bookmark, Bookmark),
+            message="Bookmark panel was not shown.",
+        )
+        return bookmark
 
     def wait_for_panel(
         self, panel_ui_class: Optional[Type[P]] = PanelUI  # type: ignore
@@ -171,20 +205,19 @@ class BrowserWindow(BaseWindow):
                 message = "No panel UI was shown."
             else:
                 message = f"{panel_ui_class.__name__} was not shown."
-            self.wait.until(
-                lambda _: isinstance(self.panel, panel_ui_class),
+            panel: P = self._wait_until(
+                expected.region_is_displayed(lambda: self.panel, panel_ui_class),
                 message=message,
             )
-            return self.panel  # type: ignore
-        else:
-            self.wait.until(
-                lambda _: self.panel is None,
-                message="Unexpected panel UI was shown.",
-            )
-            return None
+            return panel
+        self._wait_until(
+            expected.region_is_closed(lambda: self.panel),
+            message="Unexpected panel UI was shown.",
+        )
+        return None
 
     @property
-    def is_private(self) -> bool | Any:
+    def is_private(self) -> bool:
         """Property that checks if the specified window is private or not.
 
         Returns:
@@ -192,27 +225,15 @@ class BrowserWindow(BaseWindow):
 
         """
         self.switch_to()
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            return self.selenium.execute_async_script(
-                """
-                let callback = arguments[arguments.length - 1];
-                (async () => {
-                    try {
-                        const mod = await import("resource://gre/modules/PrivateBrowsingUtils.sys.mjs");
-                        let chromeWindow = arguments[0].ownerDocument.defaultView;
-
-                        callback(mod.PrivateBrowsingUtils.isWindowPrivate(chromeWindow));
-                    } catch (e) {
-                        callback({error: e.message});
-                    }
-                })();
-                """,
-                self.document_element,
-            )
+        return self.snapshot()["private"]
 
     def open_window(self, private: bool = False) -> Union["BrowserWindow", Any]:
         """Open a new browser window.
 
+        If the session was started with WebDriver BiDi enabled, the window
+        is taken from the ``browsingContext.contextCreated`` event instead
+        of polling the window handles.
+
         Args:
             private (bool): Optional parameter to open a private browsing
                 window. Defaults to False.
@@ -221,22 +242,22 @@ class BrowserWindow(BaseWindow):
             :py:class:`BrowserWindow`: Opened window.
 
         """
-        handles_before: list[str] = self.selenium.window_handles
         self.switch_to()
 
-        with self.selenium.context(self.selenium.CONTEXT_CHROME):
-            # Opens private or non-private window
-            self.selenium.find_element(*self._file_menu_button_locator).click()
-            if private:
-                self.selenium.find_element(
-                    *self._file_menu_private_window_locator
-                ).click()
-            else:
-                self.selenium.find_element(
-                    *self._file_menu_new_window_button_locator
-                ).click()
-
-        return self.wait.until(
-            expected.new_browser_window_is_opened(self.selenium, handles_before),
-            message="No new browser window opened",
+        def click_menu_item() -> None:
+            with self.context(self.selenium.CONTEXT_CHROME):
+                # Opens private or non-private window
+                self.selenium.find_element(*self._file_menu_button_locator).click()
+                if private:
+                    self.selenium.find_element(
+                        *self._file_menu_private_window_locator
+                    ).click()
+                else:
+                    self.selenium.find_element(
+                        *self._file_menu_new_window_button_locator
+                    ).click()
+
+        handle = self._open_window(
+            click_menu_item, message="No new browser window opened"
         )
+        return self.window_manager.get(handle)
@@ -0,0 +1,159 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this file,
+# You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Window and tab lifecycle events received over WebDriver BiDi."""
+
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Optional, TypedDict
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+
+class ContextEvent(TypedDict):
+    """A top-level browsing context that was opened or closed."""
+
+    handle: str
+    client_window: Optional[str]
+    url: Optional[str]
+    timestamp: float
+    monotonic: float
+
+
+class WindowEvents(object):
+    """Record windows and tabs opened and closed in a WebDriver session.
+
+    When the session was started with BiDi enabled (the ``webSocketUrl``
+    capability), :py:meth:`start` subscribes to
+    ``browsingContext.contextCreated`` and ``browsingContext.contextDestroyed``.
+    Code that opens a window can then wait for the event instead of polling
+    ``window_handles``. Without BiDi :py:attr:`enabled` stays `False` and
+    callers keep polling.
+
+    Every event records the wall clock ``timestamp`` and ``monotonic`` time
+    it was received at. Only the last ``max_events`` events of each kind are
+    kept, so long sessions do not grow without bound.
+
+    Args:
+        selenium:
+            (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+            Firefox WebDriver object.
+        max_events (int): Number of events of each kind that are kept.
+    """
+
+    def __init__(self, selenium: WebDriver, max_events: int = 100) -> None:
+        """Create WindowEvents object.
+
+        Args:
+            selenium:
+                (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+                Firefox WebDriver object.
+            max_events (int): Number of events of each kind that are kept.
+                Defaults to 100.
+        """
+        self.selenium = weakref.proxy(selenium)
+        self.enabled = False
+        self.opened: deque[ContextEvent] = deque(maxlen=max_events)
+        self.closed: deque[ContextEvent] = deque(maxlen=max_events)
+        self._opened_count = 0
+        self._changed = threading.Condition()
+        self._handlers: list[tuple[str, int]] = []
+
+    def start(self) -> bool:
+        """Subscribe to the lifecycle events if the session supports BiDi.
+
+        Returns:
+            bool: True if events are received.
+
+        """
+        if self.enabled:
+            return True
+        if not getattr(self.selenium, "caps", {}).get("webSocketUrl"):
+            return False
+        try:
+            browsing_context = self.selenium.browsing_context
+            for event, callback in (
+                ("context_created", self._on_created),
+                ("context_destroyed", self._on_destroyed),
+            ):
+                self._handlers.append(
+                    (event, browsing_context.add_event_handler(event, callback))
+                )
+        except WebDriverException:
+            self.stop()
+            return False
+        self.enabled = True
+        return True
+
+    def stop(self) -> None:
+        """Unsubscribe from the lifecycle events."""
+        self.enabled = False
+        while self._handlers:
+            event, callback_id = self._handlers.pop()
+            try:
+                self.selenium.browsing_context.remove_event_handler(event, callback_id)
+            except (ReferenceError, WebDriverException):
+                pass  # the session is already gone
+
+    def mark(self) -> int:
+        """Return a position to wait for windows opened after it.
+
+        Returns:
+            int: Number of windows opened so far.
+
+        """
+        with self._changed:
+            return self._opened_count
+
+    def wait_for_open(self, mark: int, timeout: float, message: str = "") -> ContextEvent:
+        """Wait for a window or tab to be opened after a mark.
+
+        Args:
+            mark (int): Position returned by :py:meth:`mark` before the
+                window was opened.
+            timeout (float): Seconds to wait.
+            message (str): Message for the timeout exception.
+
+        Returns:
+            :py:class:`ContextEvent`: The first window opened after the mark,
+                or the oldest one kept if more than ``max_events`` windows
+                were opened since.
+
+        """
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._opened_count > mark, timeout):
+                raise TimeoutException(message)
+            dropped = self._opened_count - len(self.opened)
+            return self.opened[max(mark - dropped, 0)]
+
+    def _on_created(self, info: Any) -> None:
+        self._record(self.opened, info)
+
+    def _on_destroyed(self, info: Any) -> None:
+        self._record(self.closed, info)
+
+    def _record(self, events: deque[ContextEvent], info: Any) -> None:
+        if _field(info, "parent", "parent"):
+            return  # frames are not windows
+        event: ContextEvent = {
+            "handle": _field(info, "context", "context"),
+            "client_window": _field(info, "client_window", "clientWindow"),
+            "url": _field(info, "url", "url"),
+            "timestamp": time.time(),
+            "monotonic": time.monotonic(),
+        }
+        with self._changed:
+            events.append(event)
+            if events is self.opened:
+                self._opened_count += 1
+            self._changed.notify_all()
+
+
+def _field(info: Any, attribute: str, key: str) -> Any:
+    # Depending on the Selenium version events are dataclasses or dicts.
+    if isinstance(info, dict):
+        return info.get(key)
+    return getattr(info, attribute, None)
@@ -3,39 +3,124 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 """Window Management for FoxPuppet."""
 
+from typing import TYPE_CHECKING, Optional
+
 from selenium.webdriver.remote.webdriver import WebDriver
-from foxpuppet.windows import BrowserWindow
+
+from foxpuppet.session import Session
+from foxpuppet.wait import Wait, WaitPolicy
+
+if TYPE_CHECKING:
+    from foxpuppet.windows import BrowserWindow
 
 
 class WindowManager(object):
     """A window manager that controls the creation of window objects.
 
+    Window objects are kept in a registry keyed by their handle, so reading
+    :py:attr:`windows` repeatedly returns the same objects for windows that
+    are still open. Its windows wait according to its wait policy.
+
     Args:
         selenium: (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
             Firefox WebDriver object.
+        wait_policy (:py:class:`~foxpuppet.wait.WaitPolicy`, optional):
+            Timeout and polling settings for every wait of its windows.
     """
 
-    def __init__(self, selenium: WebDriver) -> None:
+    def __init__(self, selenium: WebDriver, wait_policy: Optional[WaitPolicy] = None):
         """Create WindowManager Object.
 
         Args:
             selenium:
                 (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
                 Firefox WebDriver object.
+            wait_policy (:py:class:`~foxpuppet.wait.WaitPolicy`, optional):
+                Timeout and polling settings for every wait of its windows.
+                Defaults to a 10 second timeout polling every 0.5 seconds.
         """
         self.selenium = selenium
+        self.wait_policy = wait_policy or WaitPolicy()
+        self._wait: Optional[Wait] = None
+        self._windows: dict[str, "BrowserWindow"] = {}
+
+    @classmethod
+    def default(cls, selenium: WebDriver) -> "WindowManager":
+        """Return the window manager with the default wait policy.
+
+        Windows created without a window manager, and FoxPuppet objects
+        created without a wait policy, share this manager, so one handle
+        maps to one window object between them.
+
+        Args:
+            selenium:
+                (:py:class:`~selenium.webdriver.remote.webdriver.WebDriver`):
+                Firefox WebDriver object.
+
+        Returns:
+            :py:class:`WindowManager`: Window manager of the session.
+
+        """
+        session = Session.get(selenium)
+        manager = session.window_manager
+        if manager is None:
+            manager = session.window_manager = cls(selenium)
+        return manager
+
+    @property
+    def wait(self) -> Wait:
+        """Wait object following the wait policy of the manager.
+
+        Returns:
+            :py:class:`~foxpuppet.wait.Wait`: Wait object.
+
+        """
+        if self._wait is None:
+            deadline = Session.get(self.selenium).deadline
+            self._wait = self.wait_policy.create(self.selenium, deadline)
+        return self._wait
 
     @property
-    def windows(self) -> list[BrowserWindow]:
+    def windows(self) -> list["BrowserWindow"]:
         """Return a list of all open windows.
 
         Returns:
             list: List of FoxPuppet BrowserWindow objects.
 
+        """
+        return self.update(self.selenium.window_handles)
+
+    def get(self, handle: str) -> "BrowserWindow":
+        """Return the window object for a handle, creating it if needed.
+
+        Args:
+            handle: (str): WebDriver Firefox window handle.
+
+        Returns:
+            :py:class:`BrowserWindow`: FoxPuppet BrowserWindow object.
+
         """
         from foxpuppet.windows import BrowserWindow
 
-        return [
-            BrowserWindow(self.selenium, handle)
-            for handle in self.selenium.window_handles
-        ]
+        window = self._windows.get(handle)
+        if window is None:
+            window = self._windows[handle] = BrowserWindow(self.selenium, handle, self)
+        return window
+
+    def update(self, handles: list[str]) -> list["BrowserWindow"]:
+        """Synchronize the registry with a list of open window handles.
+
+        Windows whose handles are no longer open are dropped and new handles
+        get a window object. Known handles keep their existing object.
+
+        Args:
+            handles: (:obj:`list` of str): List of current Firefox window
+                handles.
+
+        Returns:
+            list: List of FoxPuppet BrowserWindow objects in handle order.
+
+        """
+        for handle in set(self._windows).difference(handles):
+            del self._windows[handle]
+        return [self.get(handle) for handle in handles]
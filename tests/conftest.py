@@ -3,18 +3,31 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 """Configuration files for pytest."""
 
-import os
+import copy
+import shutil
 
 import pytest
 from _pytest.nodes import Item
 
 from foxpuppet import FoxPuppet
+from foxpuppet.profile import ProfileTemplate, launch_firefox
 from foxpuppet.windows import BrowserWindow
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from typing import Any, Generator
+from selenium.webdriver.firefox.service import Service
+from typing import Any, Generator, Optional
 from tests.webserver import WebServer
 
 
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the option starting tests from a profile template."""
+    parser.addoption(
+        "--profile-template",
+        action="store_true",
+        default=False,
+        help="start every test from a clone of a Firefox profile built once",
+    )
+
+
 @pytest.mark.hookwrapper
 def pytest_runtest_makereport(item: Item, call) -> Generator[None, Any, None]:
     """Add a report to the generated html report."""
@@ -49,14 +62,46 @@ def browser(foxpuppet: FoxPuppet) -> BrowserWindow:
     return foxpuppet.browser
 
 
+@pytest.fixture(scope="session")
+def profile_template(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> Optional[ProfileTemplate]:
+    """Firefox profile cloned for every test with ``--profile-template``.
+
+    The template is built by the first test, with its Firefox options.
+    """
+    if not request.config.getoption("profile_template"):
+        return None
+    if request.config.getoption("driver") != "Firefox":
+        raise pytest.UsageError("--profile-template requires --driver Firefox")
+    return ProfileTemplate(
+        str(tmp_path_factory.mktemp("profile") / "template"),
+        prefs={"remote.system-access-check.enabled": False},
+    )
+
+
 @pytest.fixture
-def firefox_options(firefox_options: FirefoxOptions) -> FirefoxOptions:
+def firefox_options(
+    firefox_options: FirefoxOptions,
+    profile_template: Optional[ProfileTemplate],
+    driver_path: Optional[str],
+) -> Generator[FirefoxOptions, None, None]:
     """Fixture for configuring Firefox."""
     firefox_options.log.level = "trace"  # type: ignore
     firefox_options.set_preference("remote.system-access-check.enabled", False)
-    # firefox_options.set_preference('devtools.chrome.enabled', True)
-    # firefox_options.set_preference('devtools.debugger.remote-enabled', True)
-    return firefox_options
+    if profile_template is None:
+        yield firefox_options
+        return
+    options = copy.deepcopy(firefox_options)
+    service = Service(executable_path=driver_path) if driver_path else None
+    profile_template.build(
+        warmup=lambda path: launch_firefox(path, options=options, service=service)
+    )
+    profile = profile_template.clone()
+    firefox_options.add_argument("-profile")
+    firefox_options.add_argument(profile)
+    yield firefox_options
+    shutil.rmtree(profile, ignore_errors=True)
 
 
 @pytest.fixture
@@ -0,0 +1,393 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests for the asyncio API against a fake WebDriver server."""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Generator, Optional
+
+import pytest
+from selenium.common.exceptions import NoSuchWindowException, TimeoutException
+
+from foxpuppet.aio import AsyncFoxPuppet, AsyncWait, AsyncWebDriver
+from foxpuppet.aio.transport import ELEMENT_KEY
+from foxpuppet.expected import WaitStatistics
+from foxpuppet.wait import WaitPolicy
+from foxpuppet.windows.browser.notifications import BaseNotification
+from foxpuppet.windows.browser.notifications.addons import (
+    AddOnInstallBlocked,
+    AddOnInstallComplete,
+)
+from foxpuppet.windows.browser.panel_ui.panel_ui import PanelUI
+
+
+class FakeSession(object):
+    """Browser state of one session of the fake server."""
+
+    def __init__(self) -> None:
+        self.context = "content"
+        self.handles = ["window-1", "window-2"]
+        self.handle = "window-1"
+        self.notification: Optional[str] = None
+        self.show_after: Optional[tuple[float, str]] = None
+        self.listeners = True
+        self.chunked = False
+        self.commands: list[str] = []
+        self.connections: set[int] = set()
+
+    def displayed(self) -> Optional[str]:
+        if self.show_after and time.monotonic() >= self.show_after[0]:
+            self.notification, self.show_after = self.show_after[1], None
+        return self.notification
+
+    def snapshot(self) -> dict:
+        notification = self.displayed()
+        return {
+            "notification": notification
+            and {
+                "id": notification,
+                "label": "Add-on",
+                "origin": "example.com",
+                "element": {ELEMENT_KEY: "notification"},
+            },
+            "panel": {
+                "id": "PanelUI-menu-button",
+                "element": {ELEMENT_KEY: "menu-button"},
+            },
+            "panel_view": None,
+            "starred": False,
+            "tracking_shield": False,
+            "url": "about:blank",
+            "private": self.handle == "window-2",
+        }
+
+
+class FakeWebDriver(BaseHTTPRequestHandler):
+    """Request handler answering a subset of the WebDriver protocol."""
+
+    sessions: dict[str, FakeSession] = {}
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1  # send each reply in one write, flushed after the request
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.dispatch()
+
+    def do_POST(self) -> None:
+        self.dispatch()
+
+    def do_DELETE(self) -> None:
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"null")
+        parts = self.path.strip("/").split("/")
+        if parts == ["session"]:
+            session_id = uuid.uuid4().hex
+            self.sessions[session_id] = FakeSession()
+            return self.reply({"sessionId": session_id, "capabilities": {}})
+        session = self.sessions[parts[1]]
+        command = "{0} /{1}".format(self.command, "/".join(parts[2:]))
+        session.commands.append(command)
+        session.connections.add(self.client_address[1])
+        try:
+            value = self.execute(session, command, body)
+        except KeyError as exc:
+            error = {"error": exc.args[0], "message": command, "stacktrace": ""}
+            return self.reply(error, 404, session.chunked)
+        self.reply(value, chunked=session.chunked)
+
+    def execute(self, session: FakeSession, command: str, body: Any) -> Any:
+        if command == "GET /moz/context":
+            return session.context
+        if command == "POST /moz/context":
+            session.context = body["context"]
+            return None
+        if command == "GET /window/handles":
+            return session.handles
+        if command == "GET /window":
+            return session.handle
+        if command == "POST /window":
+            if body["handle"] not in session.handles:
+                raise KeyError("no such window")
+            session.handle = body["handle"]
+            return None
+        if command == "DELETE /window":
+            session.handles.remove(session.handle)
+            return session.handles
+        if command == "POST /execute/sync":
+            return session.snapshot()
+        if command == "POST /execute/async":
+            if not session.listeners:
+                raise KeyError("javascript error")
+            ids, closed, timeout = body["args"]
+            end_time = time.monotonic() + timeout / 1000
+            while time.monotonic() < end_time:
+                notification = session.displayed()
+                if closed and notification is None:
+                    return {"notification": None}
+                if notification and (ids is None or notification in ids):
+                    return session.snapshot()
+                time.sleep(0.01)
+            return {"timeout": True}
+        if command == "POST /element/notification/element":
+            return {ELEMENT_KEY: body["value"]}
+        if command == "POST /element/popup-notification-closebutton/click":
+            session.notification = None
+            return None
+        if command == "GET /element/notification/attribute/label":
+            return "Add-on"
+        raise KeyError("unknown command")
+
+    def reply(self, value: Any, status: int = 200, chunked: bool = False) -> None:
+        data = json.dumps({"value": value}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if not chunked:
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(0, len(data), 7):
+            chunk = data[start : start + 7]
+            self.wfile.write(b"%x;ext=1\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\nTrailer: x\r\n\r\n")
+
+
+@pytest.fixture
+def server() -> Generator[str, None, None]:
+    """Serve the fake WebDriver protocol on a free local port."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeWebDriver)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:{0}".format(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fake_session(driver: AsyncWebDriver) -> FakeSession:
+    """Return the fake browser state behind a driver."""
+    return FakeWebDriver.sessions[driver.session_id]
+
+
+def test_snapshot_and_regions(server: str) -> None:
+    """Map notifications and panels to the registered blocking classes."""
+
+    async def main() -> None:
+        driver = await AsyncWebDriver.start(server)
+        fake_session(driver).notification = "addon-install-blocked-notification"
+        browser = await AsyncFoxPuppet(driver).browser()
+        notification = await browser.notification()
+        assert notification is not None
+        assert notification.kind is AddOnInstallBlocked
+        assert notification.is_a(BaseNotification)
+        assert await notification.label() == "Add-on"
+        panel = await browser.panel()
+        assert panel is not None and panel.kind is PanelUI
+        assert not await browser.is_private()
+
+    asyncio.run(main())
+
+
+def test_context_and_focus_elision(server: str) -> None:
+    """Skip context and window switches that would not change anything."""
+
+    async def main() -> None:
+        driver = await AsyncWebDriver.start(server)
+        browser = await AsyncFoxPuppet(driver).browser()
+        for _ in range(3):
+            await browser.switch_to()
+            await browser.snapshot()
+        commands = fake_session(driver).commands
+        assert commands.count("POST /window") == 1
+        assert commands.count("GET /moz/context") == 1
+        assert commands.count("POST /execute/sync") == 3
+
+    asyncio.run(main())
+
+
+def test_overlapping_context_blocks(server: str) -> None:
+    """Keep each block in its context while blocks of other coroutines run."""
+
+    async def main() -> None:
+        driver = await AsyncWebDriver.start(server)
+        session = fake_session(driver)
+        seen = []
+
+        async def use(context: str, delay: float) -> None:
+            async with driver.using_context(context):
+                await asyncio.sleep(delay)
+                seen.append((context, session.context))
+                async with driver.using_context(context):
+                    seen.append((context, session.context))
+
+        await asyncio.gather(
+            use(driver.CONTEXT_CHROME, 0.05),
+            use(driver.CONTEXT_CONTENT, 0),
+            use(driver.CONTEXT_CHROME, 0),
+        )
+        assert [context for context, _ in seen] == ["chrome"] * 4 + ["content"] * 2
+        assert all(context == actual for context, actual in seen)
+        assert session.context == "content"
+        async with driver.using_context(driver.CONTEXT_CHROME):
+            async with driver.using_context(driver.CONTEXT_CONTENT):
+                assert session.context == "content"
+            assert session.context == "chrome"
+        assert session.context == "content"
+
+    asyncio.run(main())
+
+
+def test_keep_alive_connection(server: str) -> None:
+    """Send all commands of a session over one connection."""
+
+    async def main() -> None:
+        driver = await AsyncWebDriver.start(server)
+        browser = await AsyncFoxPuppet(driver).browser()
+        for _ in range(3):
+            await browser.snapshot()
+        assert len(fake_session(driver).connections) == 1
+        await driver.close()
+        await browser.snapshot()
+        assert len(fake_session(driver).connections) == 2
+
+    asyncio.run(main())
+
+
+def test_chunked_responses(server: str) -> None:
+    """Read responses sent with chunked transfer encoding."""
+
+    async def main() -> None:
+        driver = await AsyncWebDriver.start(server)
+        fake_session(driver).chunked = True
+        browser = await AsyncFoxPuppet(driver).browser()
+        snapshot = await browser.snapshot()
+        assert snapshot["url"] == "about:blank"
+        with pytest.raises(NoSuchWindowException):
+            await driver.switch_to_window("window-3")
+        assert await browser.is_private() is False
+
+    asyncio.run(main())
+
+
+def test_concurrent_wait_statistics() -> None:
+    """Keep the statistics of concurrent waits apart."""
+
+    def polls_until(count: int) -> Any:
+        polls = itertools.count(1)
+
+        async def condition() -> bool:
+            return next(polls) >= count
+
+        return condition
+
+    async def main() -> None:
+        wait = AsyncWait(WaitPolicy(timeout=2, poll_frequency=0.01))
+        first, second = WaitStatistics(0, 0.0), WaitStatistics(0, 0.0)
+        await asyncio.gather(
+            wait.until(polls_until(2), statistics=first),
+            wait.until(polls_until(5), statistics=second),
+        )
+        assert (first.polls, second.polls) == (2, 5)
+
+    asyncio.run(main())
+
+
+def test_window_manager(server: str) -> None:
+    """Keep one window object per handle and drop closed windows."""
+
+    async def main() -> None:
+        foxpuppet = AsyncFoxPuppet(await AsyncWebDriver.start(server))
+        first, second = await foxpuppet.window_manager.windows()
+        assert (await foxpuppet.window_manager.windows())[0] is first
+        assert await second.is_private()
+        await second.close()
+        assert await foxpuppet.window_manager.windows() == [first]
+        with pytest.raises(NoSuchWindowException):
+            await second.switch_to()
+
+    asyncio.run(main())
+
+
+def test_wait_for_notification(server: str) -> None:
+    """Wait for a notification to be shown and closed."""
+
+    async def main() -> None:
+        driver = await AsyncWebDriver.start(server)
+        session = fake_session(driver)
+        session.show_after = (
+            time.monotonic() + 0.2,
+            "addon-install-complete-notification",
+        )
+        browser = await AsyncFoxPuppet(driver).browser()
+        notification = await browser.wait_for_notification(AddOnInstallComplete)
+        assert notification is not None and notification.kind is AddOnInstallComplete
+        assert browser.last_wait is not None and browser.last_wait.polls == 1
+        await notification.close()
+        assert session.notification is None
+
+    asyncio.run(main())
+
+
+def test_wait_for_notification_polling_fallback(server: str) -> None:
+    """Poll when the chrome listeners cannot be installed."""
+
+    async def main() -> None:
+        driver = await AsyncWebDriver.start(server)
+        session = fake_session(driver)
+        session.listeners = False
+        session.show_after = (
+            time.monotonic() + 0.2,
+            "addon-install-complete-notification",
+        )
+        policy = WaitPolicy(timeout=2, poll_frequency=0.05)
+        browser = await AsyncFoxPuppet(driver, policy).browser()
+        notification = await browser.wait_for_notification()
+        assert notification is not None
+        assert browser.last_wait is not None and browser.last_wait.polls > 1
+
+    asyncio.run(main())
+
+
+def test_wait_for_notification_timeout(server: str) -> None:
+    """Raise the same timeout as the blocking API."""
+
+    async def main() -> None:
+        driver = await AsyncWebDriver.start(server)
+        browser = await AsyncFoxPuppet(driver, WaitPolicy(timeout=0.2)).browser()
+        with pytest.raises(TimeoutException, match="AddOnInstallComplete was not shown"):
+            await browser.wait_for_notification(AddOnInstallComplete)
+
+    asyncio.run(main())
+
+
+def test_concurrent_sessions(server: str) -> None:
+    """Wait in many sessions at once on a single event loop."""
+
+    async def wait_in_session() -> None:
+        driver = await AsyncWebDriver.start(server)
+        session = fake_session(driver)
+        session.show_after = (
+            time.monotonic() + 0.5,
+            "addon-install-complete-notification",
+        )
+        browser = await AsyncFoxPuppet(driver).browser()
+        assert await browser.wait_for_notification() is not None
+
+    async def main() -> None:
+        await asyncio.gather(*(wait_in_session() for _ in range(8)))
+
+    start = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - start < 8 * 0.5
@@ -0,0 +1,123 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests for the URL bar benchmark runner."""
+
+import json
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+import pytest
+
+from foxpuppet.benchmark import (
+    QuerySample,
+    load_corpus,
+    percentile,
+    run_benchmark,
+    summarize,
+    write_report,
+)
+
+
+class FakeUrlBar(object):
+    """URL bar answering every query after its length in milliseconds."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def measure_queries(self, texts: Sequence[str]) -> list[dict]:
+        self.batches.append(list(texts))
+        return [
+            {
+                "text": text,
+                "first_result_ms": float(len(text)),
+                "finished_ms": len(text) + 0.5,
+                "rendered_ms": len(text) + 1.0,
+                "result_count": len(text) % 3,
+            }
+            for text in texts
+        ]
+
+
+def sample(first: Optional[float], final: Optional[float], count: int = 1) -> QuerySample:
+    """Create a benchmark sample."""
+    return {
+        "query": "q",
+        "first_result_ms": first,
+        "final_result_ms": final,
+        "result_count": count,
+    }
+
+
+def test_percentile() -> None:
+    """Interpolate between the closest ranks."""
+    values = [float(value) for value in range(10, 0, -1)]
+    assert percentile(values, 50) == pytest.approx(5.5)
+    assert percentile(values, 95) == pytest.approx(9.55)
+    assert percentile(values, 99) == pytest.approx(9.91)
+    assert percentile(values, 100) == 10
+    assert percentile([3.0], 99) == 3
+    assert percentile([], 50) is None
+
+
+def test_summarize() -> None:
+    """Leave timed out queries out of the percentiles but count them."""
+    samples = [sample(i, i + 1, count=i % 2) for i in range(1, 101)]
+    samples.append(sample(None, None, count=0))
+    summary = summarize(samples)
+    assert summary["queries"] == 101
+    assert summary["timeouts"] == 1
+    assert summary["first_result_ms"] == {
+        "p50": pytest.approx(50.5),
+        "p95": pytest.approx(95.05),
+        "p99": pytest.approx(99.01),
+    }
+    assert summary["final_result_ms"]["p50"] == pytest.approx(51.5)
+    assert summary["result_count"] == {
+        "total": 50,
+        "mean": pytest.approx(50 / 101),
+        "min": 0,
+        "max": 1,
+        "empty": 51,
+    }
+
+
+def test_summarize_empty() -> None:
+    """Summarize a run without queries."""
+    summary = summarize([])
+    assert summary["queries"] == 0
+    assert summary["first_result_ms"] == {"p50": None, "p95": None, "p99": None}
+    assert summary["result_count"]["mean"] is None
+
+
+def test_load_corpus(tmp_path: Path) -> None:
+    """Skip blank lines and comments but keep spaces in queries."""
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("# queries\nmozilla\n\n  \nfire fox \r\n", encoding="utf-8")
+    assert load_corpus(str(corpus)) == ["mozilla", "fire fox "]
+
+
+def test_run_benchmark_in_batches() -> None:
+    """Time queries in batches and keep their order."""
+    url_bar: Any = FakeUrlBar()
+    queries = (query for query in ["a", "bb", "ccc", "dddd", "eeeee"])
+    samples = run_benchmark(url_bar, queries, batch_size=2)
+    assert url_bar.batches == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+    assert [s["query"] for s in samples] == ["a", "bb", "ccc", "dddd", "eeeee"]
+    assert samples[2] == {
+        "query": "ccc",
+        "first_result_ms": 3.0,
+        "final_result_ms": 3.5,
+        "result_count": 0,
+    }
+
+
+def test_write_report(tmp_path: Path) -> None:
+    """Write samples, summary and metadata as JSON."""
+    path = tmp_path / "report.json"
+    samples = [sample(1.0, 2.0), sample(3.0, 4.0)]
+    report = write_report(str(path), samples, firefox="128.0")
+    assert json.loads(path.read_text()) == report
+    assert report["firefox"] == "128.0"
+    assert report["summary"]["final_result_ms"]["p50"] == 3.0
+    assert len(report["samples"]) == 2
@@ -3,13 +3,17 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 """Tests for Bookmarks."""
 
+import sqlite3
+
 import pytest
 from selenium.webdriver.remote.webdriver import WebDriver
+from foxpuppet import FoxPuppet
 from foxpuppet.windows import BrowserWindow
 from foxpuppet.windows.browser.bookmarks.bookmark import (
     Bookmark,
     BookmarkData,
 )
+from foxpuppet.windows.browser.bookmarks.places import BookmarkIndex, glob_match
 
 
 class BookmarkEntry:
@@ -126,3 +130,225 @@ def test_retrieve_deleted_bookmark_menu(bookmark_menu: Bookmark, label: str) ->
     """Test retrieve deleted bookmark (main bookmark menu)."""
     bookmark_menu.delete_bookmark(label, is_detailed=True)
     assert bookmark_menu.bookmark_exists(label) is False
+
+
+def test_add_bookmarks(browser: BrowserWindow, selenium: WebDriver) -> None:
+    """Insert several bookmarks in one call."""
+    bookmark = browser.wait_for_bookmark()
+    bookmarks: list[BookmarkData] = [
+        {
+            "name": "Bookmark {0}".format(i),
+            "url": "https://www.mozilla.org/en-US/?v={0}".format(i),
+            "tags": ["foxpuppet"],
+            "keyword": "fp{0}".format(i),
+        }
+        for i in range(3)
+    ]
+    guids = bookmark.add_bookmarks(bookmarks)
+    assert len(set(guids)) == 3
+    selenium.get(bookmarks[1]["url"])
+    assert browser.wait_for_bookmark().is_bookmarked
+
+
+def test_find_bookmarks(browser: BrowserWindow) -> None:
+    """Query bookmarks by label, URL, tag and folder."""
+    bookmark = browser.wait_for_bookmark()
+    bookmark.add_bookmarks(
+        [
+            {
+                "name": "Firefox",
+                "url": "https://www.mozilla.org/firefox/",
+                "tags": ["browser"],
+                "keyword": None,
+            },
+            {
+                "name": "Thunderbird",
+                "url": "https://www.thunderbird.net/",
+                "tags": None,
+                "keyword": None,
+            },
+        ]
+    )
+    bookmark.add_bookmarks(
+        [
+            {
+                "name": "MDN",
+                "url": "https://developer.mozilla.org/",
+                "tags": None,
+                "keyword": None,
+            }
+        ],
+        folder="toolbar",
+    )
+    assert [r.title for r in bookmark.find_bookmarks(label="fire")] == ["Firefox"]
+    assert [r.title for r in bookmark.find_bookmarks(url="https://*.mozilla.org/*")] == [
+        "Firefox",
+        "MDN",
+    ]
+    assert [r.title for r in bookmark.find_bookmarks(tag="browser")] == ["Firefox"]
+    assert [r.title for r in bookmark.find_bookmarks(folder="toolbar")] == ["MDN"]
+    assert bookmark.find_bookmarks(label="fire", folder="toolbar") == []
+    assert bookmark.bookmark_exists("thunder")
+
+
+def test_bookmark_index(browser: BrowserWindow) -> None:
+    """Keep the index current from the places observer journal."""
+    bookmark = browser.wait_for_bookmark()
+    (guid,) = bookmark.add_bookmarks(
+        [
+            {
+                "name": "Firefox",
+                "url": "https://www.mozilla.org/",
+                "tags": None,
+                "keyword": None,
+            }
+        ]
+    )
+    index = bookmark.index()
+    try:
+        assert index.exists("firefox")
+        assert index.records[guid].parent == "unfiled_____"
+        bookmark.add_bookmarks(
+            [
+                {
+                    "name": "Thunderbird",
+                    "url": "https://www.thunderbird.net/",
+                    "tags": None,
+                    "keyword": None,
+                }
+            ]
+        )
+        assert not index.exists("thunderbird")
+        assert index.sync() == 1
+        assert index.exists("thunderbird")
+        assert index.find(url="https://www.mozilla.org/") == bookmark.find_bookmarks(
+            url="https://www.mozilla.org/"
+        )
+    finally:
+        index.stop()
+
+
+def test_bookmark_index_tags_and_overflow(browser: BrowserWindow) -> None:
+    """Filter the index by tag and reload it after the journal overflowed."""
+    bookmark = browser.wait_for_bookmark()
+    index = BookmarkIndex(browser, journal_limit=1).start()
+    try:
+        bookmark.add_bookmarks(
+            {
+                "name": "Bookmark {0}".format(i),
+                "url": "https://www.mozilla.org/?v={0}".format(i),
+                "tags": ["even"] if i % 2 == 0 else None,
+                "keyword": None,
+            }
+            for i in range(3)
+        )
+        # More changes than the journal keeps reload all bookmarks.
+        assert index.sync() == len(bookmark.find_bookmarks())
+        assert [r.title for r in index.find(tag="even")] == ["Bookmark 0", "Bookmark 2"]
+        assert index.find(tag="even") == bookmark.find_bookmarks(tag="even")
+    finally:
+        index.stop()
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    ["https://*", "HTTPS://*", "*.org/?v=[0-9]", "*[^0-9]", "*[]x]*", "*[a-]*", "*[*"],
+)
+@pytest.mark.parametrize(
+    "url", ["https://www.mozilla.org/?v=1", "https://a.org/?v=x", "http://b.org/]-"]
+)
+def test_glob_match_like_sqlite(pattern: str, url: str) -> None:
+    """Match URLs in memory like the GLOB operator of the database."""
+    with sqlite3.connect(":memory:") as db:
+        (expected,) = db.execute("SELECT ? GLOB ?", (url, pattern)).fetchone()
+    assert glob_match(pattern, url) == bool(expected)
+
+
+def test_delete_bookmarks(browser: BrowserWindow) -> None:
+    """Remove all bookmarks matching the conditions."""
+    bookmark = browser.wait_for_bookmark()
+    bookmark.add_bookmarks(
+        {
+            "name": "Bookmark {0}".format(i),
+            "url": "https://www.mozilla.org/?v={0}".format(i),
+            "tags": None,
+            "keyword": None,
+        }
+        for i in range(5)
+    )
+    bookmark.add_bookmarks(
+        [
+            {
+                "name": "MDN",
+                "url": "https://developer.mozilla.org/",
+                "tags": None,
+                "keyword": None,
+            }
+        ]
+    )
+    assert bookmark.delete_bookmarks(url="https://www.mozilla.org/*") == 5
+    assert [r.title for r in bookmark.find_bookmarks(folder="unfiled")] == ["MDN"]
+    assert bookmark.delete_bookmarks(label="nothing") == 0
+    with pytest.raises(ValueError):
+        bookmark.delete_bookmarks()
+
+
+def test_iter_bookmarks(browser: BrowserWindow) -> None:
+    """Page through bookmarks, including those in subfolders."""
+    bookmark = browser.wait_for_bookmark()
+    guids = bookmark.add_bookmarks(
+        {
+            "name": "Bookmark {0}".format(i),
+            "url": "https://www.mozilla.org/?v={0}".format(i),
+            "tags": None,
+            "keyword": None,
+        }
+        for i in range(7)
+    )
+    bookmark.add_bookmarks(
+        [
+            {
+                "name": "MDN",
+                "url": "https://developer.mozilla.org/",
+                "tags": None,
+                "keyword": None,
+            }
+        ],
+        folder="toolbar",
+    )
+    records = list(bookmark.iter_bookmarks(folder="unfiled", page_size=3))
+    assert [record.guid for record in records] == guids
+    assert [r.title for r in bookmark.iter_bookmarks(page_size=3)][-1] == "MDN"
+
+
+def test_reset_keeps_baseline_bookmarks(
+    foxpuppet: FoxPuppet, browser: BrowserWindow
+) -> None:
+    """Remove only the bookmarks added after the baseline."""
+    bookmark = browser.wait_for_bookmark()
+    bookmark.add_bookmarks(
+        [
+            {
+                "name": "MDN",
+                "url": "https://developer.mozilla.org/",
+                "tags": None,
+                "keyword": None,
+            }
+        ],
+        folder="toolbar",
+    )
+    foxpuppet.save_baseline()
+    bookmark.add_bookmarks(
+        [
+            {
+                "name": "Firefox",
+                "url": "https://www.mozilla.org/firefox/",
+                "tags": None,
+                "keyword": None,
+            }
+        ],
+        folder="toolbar",
+    )
+    foxpuppet.reset()
+    bookmark = foxpuppet.browser.wait_for_bookmark()
+    assert [r.title for r in bookmark.find_bookmarks(folder="toolbar")] == ["MDN"]
@@ -3,10 +3,15 @@
 # You can obtain one at http://mozilla.org/MPL/2.0/.
 """Tests for the browser model API."""
 
+from typing import Any, Optional
+
 import pytest
+from selenium.webdriver.remote.command import Command
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.common.exceptions import TimeoutException
 from foxpuppet import FoxPuppet
+from foxpuppet.wait import WaitPolicy
 
 
 def test_initial_browser_window(foxpuppet: FoxPuppet) -> None:
@@ -39,6 +44,18 @@ def test_close_window(foxpuppet: FoxPuppet) -> None:
     assert len(foxpuppet.window_manager.windows) == 1
 
 
+def test_window_identity_is_stable(foxpuppet: FoxPuppet) -> None:
+    """Tests that the window manager reuses window objects."""
+    new_browser = foxpuppet.browser.open_window()
+    windows = foxpuppet.window_manager.windows
+    assert windows[0] is foxpuppet.browser
+    assert any(window is new_browser for window in windows)
+    assert windows == foxpuppet.window_manager.windows
+    assert all(a is b for a, b in zip(windows, foxpuppet.window_manager.windows))
+    new_browser.close()
+    assert foxpuppet.window_manager.windows == [foxpuppet.browser]
+
+
 def test_switch_to(foxpuppet: FoxPuppet, selenium: WebDriver) -> None:
     """Test Switch to function."""
     foxpuppet.browser.open_window()
@@ -47,6 +64,86 @@ def test_switch_to(foxpuppet: FoxPuppet, selenium: WebDriver) -> None:
     assert foxpuppet.browser.handle == selenium.current_window_handle
 
 
+def test_snapshot(foxpuppet: FoxPuppet) -> None:
+    """Tests reading the initial window state in one script."""
+    snapshot = foxpuppet.browser.snapshot()
+    assert snapshot["notification"] is None
+    assert snapshot["panel"] is not None
+    assert snapshot["panel"]["id"] == "PanelUI-menu-button"
+    assert not snapshot["private"]
+    assert not snapshot["starred"]
+
+
+def test_switch_to_follows_direct_switches(
+    foxpuppet: FoxPuppet, selenium: WebDriver
+) -> None:
+    """Tests that switches through Selenium are followed after invalidating."""
+    new_browser = foxpuppet.browser.open_window()
+    new_browser.switch_to()
+    selenium.switch_to.window(foxpuppet.browser.handle)
+    foxpuppet.session.focus.invalidate()
+    new_browser.switch_to()
+    assert new_browser.handle == selenium.current_window_handle
+
+
+def test_switches_are_elided(
+    foxpuppet: FoxPuppet, selenium: WebDriver, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Tests that alternating switches send one command each and no-ops none."""
+    first = foxpuppet.browser
+    second = first.open_window()
+    first.switch_to()
+    commands = []
+    execute = selenium.execute
+
+    def record_execute(command: str, params: Optional[dict] = None) -> Any:
+        commands.append(command)
+        return execute(command, params)
+
+    monkeypatch.setattr(selenium, "execute", record_execute)
+    for _ in range(3):
+        second.switch_to()
+        second.switch_to()
+        first.switch_to()
+    assert commands == [Command.SWITCH_TO_WINDOW] * 6
+    assert selenium.current_window_handle == first.handle
+
+
+def test_nested_context_switches_are_elided(
+    foxpuppet: FoxPuppet, selenium: WebDriver, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Tests that nested chrome blocks do not switch context again."""
+    calls = []
+    set_context = selenium.set_context
+
+    def record_context(context: str) -> None:
+        calls.append(context)
+        set_context(context)
+
+    monkeypatch.setattr(selenium, "set_context", record_context)
+    browser = foxpuppet.browser
+    with browser.context(selenium.CONTEXT_CHROME):
+        browser.wait_for_bookmark()
+        assert not browser.navbar.is_tracking_shield_displayed
+    assert calls == [selenium.CONTEXT_CHROME, selenium.CONTEXT_CONTENT]
+
+
+def test_direct_context_switches_are_noticed(
+    foxpuppet: FoxPuppet, selenium: WebDriver
+) -> None:
+    """Tests that blocks notice contexts set directly through Selenium."""
+    browser = foxpuppet.browser
+    with browser.context(selenium.CONTEXT_CONTENT):
+        pass
+    with selenium.context(selenium.CONTEXT_CHROME):
+        with browser.context(selenium.CONTEXT_CHROME):
+            assert selenium.execute("GET_CONTEXT")["value"] == "chrome"
+        assert selenium.execute("GET_CONTEXT")["value"] == "chrome"
+        with browser.context(selenium.CONTEXT_CONTENT):
+            assert selenium.execute("GET_CONTEXT")["value"] == "content"
+        assert selenium.execute("GET_CONTEXT")["value"] == "chrome"
+
+
 @pytest.mark.firefox_preferences({"privacy.trackingprotection.enabled": True})
 def test_tracking_protection_shield(foxpuppet: FoxPuppet, selenium: WebDriver) -> None:
     """Tests if the tracking protection icon displays."""
@@ -56,3 +153,37 @@ def test_tracking_protection_shield(foxpuppet: FoxPuppet, selenium: WebDriver) -
     WebDriverWait(selenium, timeout=5).until(
         lambda _: browser.navbar.is_tracking_shield_displayed
     )
+
+
+def test_wait_policy(selenium: WebDriver) -> None:
+    """Tests that the session wait policy is used by window waits."""
+    policy = WaitPolicy(timeout=1, poll_frequency=0.1, backoff=2)
+    foxpuppet = FoxPuppet(selenium, wait_policy=policy)
+    assert foxpuppet.browser.wait.policy is policy
+    assert FoxPuppet(selenium).browser.wait.policy is not policy
+    with pytest.raises(TimeoutException):
+        foxpuppet.browser.wait_for_panel(None)
+    assert foxpuppet.browser.last_wait is not None
+    assert foxpuppet.browser.last_wait.duration < 2
+
+
+def test_reset(foxpuppet: FoxPuppet, selenium: WebDriver) -> None:
+    """Tests restoring the baseline without restarting the browser."""
+    foxpuppet.save_baseline(branches=["foxpuppet.test."])
+    browser = foxpuppet.browser
+    browser.open_window()
+    with selenium.context(selenium.CONTEXT_CHROME):
+        selenium.execute_script(
+            'Services.prefs.setBoolPref("foxpuppet.test.reset", true);'
+            'Services.prefs.setBoolPref("foxpuppet.kept", true);'
+        )
+    foxpuppet.reset()
+    assert foxpuppet.window_manager.windows == [browser]
+    with selenium.context(selenium.CONTEXT_CHROME):
+        assert not selenium.execute_script(
+            'return Services.prefs.prefHasUserValue("foxpuppet.test.reset");'
+        )
+        assert selenium.execute_script(
+            'return Services.prefs.prefHasUserValue("foxpuppet.kept");'
+        )
+        selenium.execute_script('Services.prefs.clearUserPref("foxpuppet.kept");')
@@ -0,0 +1,76 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests keeping the modules loaded by importing FoxPuppet small."""
+
+import subprocess
+import sys
+
+import pytest
+
+# Modules that are only needed once a browser window is used.
+BROWSER_MODULES = [
+    "foxpuppet.windows.browser.window",
+    "foxpuppet.windows.browser.navbar",
+    "foxpuppet.windows.browser.notifications",
+    "foxpuppet.windows.browser.bookmarks.bookmark",
+    "foxpuppet.windows.browser.panel_ui.panel_ui",
+    "selenium.webdriver.firefox.webdriver",
+    "selenium.webdriver.common.action_chains",
+    "selenium.webdriver.support.expected_conditions",
+]
+
+
+def imported_modules(statement: str) -> set[str]:
+    """Run a statement in a fresh interpreter and list the loaded modules.
+
+    Import times are left to ``make importtime``, since wall-clock budgets
+    are unreliable on shared machines.
+
+    Args:
+        statement (str): Python statement to run.
+
+    Returns:
+        set: Names of all modules loaded after the statement ran.
+
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            statement + "\nimport sys\nprint('\\n'.join(sys.modules))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import foxpuppet",
+        "from foxpuppet import FoxPuppet",
+        "from foxpuppet.windows import WindowManager",
+    ],
+)
+def test_browser_modules_are_imported_lazily(statement: str) -> None:
+    """Importing the package must not pull in the browser window model."""
+    modules = imported_modules(statement)
+    assert "foxpuppet" in modules
+    assert [module for module in BROWSER_MODULES if module in modules] == []
+
+
+def test_package_import_is_selenium_free() -> None:
+    """Importing the package alone does not import selenium at all."""
+    modules = imported_modules("import foxpuppet")
+    assert sorted(module for module in modules if module.startswith("selenium")) == []
+
+
+def test_browser_window_is_importable() -> None:
+    """Accessing BrowserWindow still imports the browser window model."""
+    modules = imported_modules(
+        "import foxpuppet.windows; foxpuppet.windows.BrowserWindow"
+    )
+    assert "foxpuppet.windows.browser.window" in modules
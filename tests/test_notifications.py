@@ -206,6 +206,17 @@ def test_allow_blocked_addon(
     browser.wait_for_notification(AddOnInstallConfirmation)
 
 
+def test_wait_for_notification_polling(
+    browser: BrowserWindow,
+    blocked_notification: AddOnInstallBlocked,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Wait for notifications by polling instead of chrome listeners."""
+    monkeypatch.setattr(browser, "notification_events", False)
+    blocked_notification.allow()
+    assert browser.wait_for_notification(AddOnInstallConfirmation) is not None
+
+
 def test_cancel_addon_install(
     browser: BrowserWindow, confirmation_notification: AddOnInstallConfirmation
 ) -> None:
@@ -3,6 +3,8 @@
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 """Tests for Panel UI."""
 
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support.wait import WebDriverWait
@@ -49,6 +51,15 @@ def browser_history(panel_ui: PanelUI, browser: BrowserWindow) -> History | None
     return browser.wait_for_panel(History)
 
 
+def test_wait_for_panel_statistics(browser: BrowserWindow) -> None:
+    """Test that waits return the observed panel and record statistics."""
+    panel = browser.wait_for_panel(PanelUI)
+    assert isinstance(panel, PanelUI)
+    assert browser.last_wait is not None
+    assert browser.last_wait.polls >= 1
+    assert browser.last_wait.duration >= 0
+
+
 def test_open_new_tab(panel_ui: PanelUI, selenium: WebDriver) -> None:
     """Test opening a new tab using the Panel UI."""
     panel_ui.open_new_tab()
@@ -94,6 +105,41 @@ def test_verify_url_bar_suggestions(panel_ui: PanelUI, selenium: WebDriver) -> N
     assert len(matching_suggestions) == 1
 
 
+def test_url_bar_results(panel_ui: PanelUI, browser_history: History) -> None:
+    """Test that URL bar results are read as typed records."""
+    browser_history.insert_visits(
+        [{"url": "https://www.mozilla.org/en-US/?v=a", "title": "Mozilla"}] * 3
+    )
+    results = panel_ui.url_bar.results("mozilla.org/en-US")
+    assert results[0]["heuristic"]
+    assert [result["index"] for result in results] == list(range(len(results)))
+    matching = [r for r in results if r["url"] == "https://www.mozilla.org/en-US/?v=a"]
+    assert len(matching) == 1
+    assert matching[0]["type"] == "url"
+    assert matching[0]["title"] == "Mozilla"
+
+
+def test_url_bar_latency(panel_ui: PanelUI, browser_history: History) -> None:
+    """Test that every keystroke gets a latency record."""
+    browser_history.insert_visits(
+        [{"url": "https://www.mozilla.org/", "title": "Mozilla"}]
+    )
+    records = panel_ui.url_bar.measure_latency("moz")
+    assert [(r["key"], r["text"]) for r in records] == [
+        ("m", "m"),
+        ("o", "mo"),
+        ("z", "moz"),
+    ]
+    for record in records:
+        assert record["first_result_ms"] is not None
+        assert record["finished_ms"] is not None
+        # Only set once the view showed every result of the query.
+        assert record["rendered_ms"] is not None
+        assert 0 <= record["first_result_ms"] <= record["finished_ms"]
+        assert record["finished_ms"] <= record["rendered_ms"]
+        assert record["result_count"] >= 1
+
+
 def test_verify_links_open_in_new_tab_from_history(
     panel_ui: PanelUI, browser_history: History, selenium: WebDriver, links: list
 ) -> None:
@@ -157,3 +203,49 @@ def test_clear_recent_history(
             for item in history_items
         )
         assert not is_present
+
+
+def test_insert_and_query_history(browser_history: History) -> None:
+    """Seed visits in chunks and read them back in pages."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    progress: list[int] = []
+    inserted = browser_history.insert_visits(
+        (
+            {
+                "url": "https://example{0}.test/page".format(i % 10),
+                "title": "Page {0}".format(i % 10),
+                "date": start + timedelta(minutes=i),
+            }
+            for i in range(25)
+        ),
+        chunk_size=10,
+        progress=progress.append,
+    )
+    assert inserted == 25
+    assert progress == [10, 20, 25]
+    records = browser_history.query(host="example3.test")
+    assert [(r.url, r.visit_count) for r in records] == [
+        ("https://example3.test/page", 3)
+    ]
+    assert records[0].last_visit == start + timedelta(minutes=23)
+    assert len(browser_history.query(text="page", limit=4, offset=8)) == 2
+    recent = browser_history.query(since=start + timedelta(minutes=20))
+    assert [r.title for r in recent] == ["Page {0}".format(i) for i in range(4, -1, -1)]
+    pages = list(browser_history.iter_history(text="example", page_size=3))
+    assert len(pages) == 10
+    assert pages[0].title == "Page 4"
+
+
+def test_clear_history_range(browser_history: History) -> None:
+    """Clear only the visits in a range without the dialog."""
+    now = datetime.now(timezone.utc)
+    browser_history.insert_visits(
+        [
+            {"url": "https://old.test/", "title": "Old", "date": now - timedelta(days=2)},
+            {"url": "https://new.test/", "title": "New", "date": now},
+        ]
+    )
+    browser_history.clear_history(timespan=timedelta(hours=1))
+    assert [r.url for r in browser_history.query()] == ["https://old.test/"]
+    browser_history.clear_history(timespan="everything")
+    assert browser_history.query() == []
@@ -0,0 +1,167 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests for the pool of Firefox sessions."""
+
+import threading
+import time
+from typing import Any, Iterator
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from foxpuppet import FoxPuppet
+from foxpuppet.pool import FoxPuppetPool
+
+
+class FakeDriver(object):
+    """WebDriver that only records being quit."""
+
+    CONTEXT_CHROME = "chrome"
+
+    def __init__(self, memory: int = 0) -> None:
+        self.memory = memory
+        self.quit_called = False
+
+    def execute(self, command: str, *args: Any) -> dict:
+        return {"value": "chrome"}
+
+    def execute_async_script(self, script: str, *args: Any) -> int:
+        return self.memory
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+new_driver: Any = FakeDriver
+
+
+def no_reset(foxpuppet: FoxPuppet) -> None:
+    """Leave released sessions as they are."""
+
+
+def test_sessions_are_reused() -> None:
+    """Hand out the same warm session again after a reset."""
+    resets: list[FoxPuppet] = []
+    with FoxPuppetPool(new_driver, reset=resets.append) as pool:
+        with pool.session() as first:
+            pass
+        with pool.session() as second:
+            pass
+    assert first is second
+    assert resets == [first, second]
+    assert first.selenium.quit_called
+
+
+def test_sessions_launch_in_parallel() -> None:
+    """Launch the sessions of the pool concurrently."""
+
+    def slow_factory() -> Any:
+        time.sleep(0.3)
+        return FakeDriver()
+
+    start = time.monotonic()
+    with FoxPuppetPool(slow_factory, size=4, reset=no_reset) as pool:
+        sessions = [pool.acquire(timeout=5) for _ in range(4)]
+        assert len({id(foxpuppet) for foxpuppet in sessions}) == 4
+        for foxpuppet in sessions:
+            pool.release(foxpuppet)
+    assert time.monotonic() - start < 4 * 0.3
+
+
+def test_recycle_after_max_uses() -> None:
+    """Replace a session once it was used max_uses times."""
+    with FoxPuppetPool(new_driver, max_uses=2, reset=no_reset) as pool:
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        pool.release(second)
+        third = pool.acquire()
+        pool.release(third)
+    assert second is first
+    assert third is not second
+    assert second.selenium.quit_called
+
+
+def test_recycle_above_memory_threshold() -> None:
+    """Replace a session whose processes use too much memory."""
+    drivers: Iterator[Any] = iter([FakeDriver(memory=2000), FakeDriver(memory=10)])
+    with FoxPuppetPool(lambda: next(drivers), max_memory=1000, reset=no_reset) as pool:
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        pool.release(second)
+        assert pool.acquire() is second
+    assert first.selenium.quit_called
+    assert second.selenium.quit_called
+
+
+def test_recycle_when_reset_fails() -> None:
+    """Replace a session that cannot be reset."""
+
+    def broken_reset(foxpuppet: FoxPuppet) -> None:
+        raise WebDriverException("Browsing context has been discarded")
+
+    with FoxPuppetPool(new_driver, reset=broken_reset) as pool:
+        first = pool.acquire()
+        pool.release(first)
+        assert pool.acquire() is not first
+    assert first.selenium.quit_called
+
+
+def test_replace_and_raise_unexpected_reset_errors() -> None:
+    """Quit a session whose reset failed unexpectedly, then raise."""
+
+    def broken_reset(foxpuppet: FoxPuppet) -> None:
+        raise KeyError("baseline")
+
+    with FoxPuppetPool(new_driver, reset=broken_reset) as pool:
+        first = pool.acquire()
+        with pytest.raises(KeyError):
+            pool.release(first)
+        assert first.selenium.quit_called
+        assert pool.acquire(timeout=5) is not first
+
+
+def test_release_after_close() -> None:
+    """Ignore sessions released after the pool was closed."""
+    pool = FoxPuppetPool(new_driver, reset=no_reset)
+    with pytest.raises(RuntimeError):
+        with pool.session() as foxpuppet:
+            pool.close()
+            raise RuntimeError("test failed")
+    assert foxpuppet.selenium.quit_called
+
+
+def test_acquire_timeout() -> None:
+    """Give up when no session becomes available."""
+    with FoxPuppetPool(new_driver, reset=no_reset) as pool:
+        pool.acquire()
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.1)
+
+
+def test_workers_share_pool() -> None:
+    """Serve more workers than sessions by handing sessions around."""
+    in_use: set[int] = set()
+    lock = threading.Lock()
+    overlap: list[bool] = []
+
+    def worker(pool: FoxPuppetPool) -> None:
+        for _ in range(5):
+            with pool.session(timeout=5) as foxpuppet:
+                with lock:
+                    overlap.append(id(foxpuppet) in in_use)
+                    in_use.add(id(foxpuppet))
+                time.sleep(0.01)
+                with lock:
+                    in_use.discard(id(foxpuppet))
+
+    with FoxPuppetPool(new_driver, size=2, reset=no_reset) as pool:
+        threads = [threading.Thread(target=worker, args=(pool,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert len(overlap) == 20
+    assert not any(overlap)
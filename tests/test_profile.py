@@ -0,0 +1,91 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests for profile templates."""
+
+import json
+import os
+import shutil
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from foxpuppet.profile import ProfileTemplate, addon_id
+
+
+def make_addon(path: Path, addon: str = "test@foxpuppet") -> str:
+    """Write a minimal WebExtension package."""
+    manifest = {"manifest_version": 2, "name": "Test"}
+    if addon:
+        manifest["browser_specific_settings"] = {"gecko": {"id": addon}}
+    with zipfile.ZipFile(path, "w") as xpi:
+        xpi.writestr("manifest.json", json.dumps(manifest))
+    return str(path)
+
+
+def test_build(tmp_path: Path) -> None:
+    """Write prefs, add-ons and places data into the template."""
+    places = tmp_path / "places.sqlite"
+    places.write_bytes(b"SQLite format 3\x00")
+    template = ProfileTemplate(
+        str(tmp_path / "template"),
+        prefs={"remote.system-access-check.enabled": False, "browser.name": 'a "b"'},
+        addons=[make_addon(tmp_path / "addon.xpi")],
+        places=str(places),
+    )
+    assert template.build()
+    profile = tmp_path / "template"
+    assert (profile / "user.js").read_text().splitlines() == [
+        'user_pref("browser.name", "a \\"b\\"");',
+        'user_pref("remote.system-access-check.enabled", false);',
+    ]
+    assert (profile / "extensions" / "test@foxpuppet.xpi").exists()
+    assert (profile / "places.sqlite").read_bytes() == places.read_bytes()
+
+
+def test_build_is_cached(tmp_path: Path) -> None:
+    """Only build and warm up again when the inputs change."""
+    warmups: list[str] = []
+    template = ProfileTemplate(str(tmp_path / "template"), prefs={"a": 1})
+    assert template.build(warmup=warmups.append)
+    assert not template.build(warmup=warmups.append)
+    template.prefs["a"] = 2
+    assert template.build(warmup=warmups.append)
+    assert warmups == [template.path, template.path]
+
+
+def test_clone(tmp_path: Path) -> None:
+    """Share add-ons, copy mutable files and leave out lock files."""
+    template = ProfileTemplate(
+        str(tmp_path / "template"),
+        prefs={"a": True},
+        addons=[make_addon(tmp_path / "addon.xpi")],
+    )
+    template.build(warmup=lambda path: Path(path, "lock").touch())
+    clone = Path(template.clone(str(tmp_path / "clone")))
+    xpi = os.path.join("extensions", "test@foxpuppet.xpi")
+    assert os.path.samefile(clone / xpi, os.path.join(template.path, xpi))
+    assert not os.path.samefile(clone / "user.js", os.path.join(template.path, "user.js"))
+    assert not (clone / "lock").exists()
+    (clone / "user.js").write_text("")
+    assert Path(template.path, "user.js").read_text() == 'user_pref("a", true);\n'
+
+
+def test_clone_default_location(tmp_path: Path) -> None:
+    """Create a new directory for every clone."""
+    template = ProfileTemplate(str(tmp_path / "template"))
+    template.build()
+    first, second = template.clone(), template.clone()
+    try:
+        assert first != second
+        assert os.path.exists(os.path.join(first, "user.js"))
+    finally:
+        shutil.rmtree(first)
+        shutil.rmtree(second)
+
+
+def test_addon_without_id(tmp_path: Path) -> None:
+    """Reject add-ons that Firefox could not install from the profile."""
+    with pytest.raises(ValueError):
+        addon_id(make_addon(tmp_path / "addon.xpi", addon=""))
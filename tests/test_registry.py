@@ -0,0 +1,53 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests for the notification and panel registries."""
+
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from foxpuppet import registry
+from foxpuppet.registry import Registry
+from foxpuppet.windows.browser.notifications import NOTIFICATIONS, BaseNotification
+from foxpuppet.windows.browser.notifications.addons import (
+    AddOnInstallComplete,
+    AddOnProgress,
+)
+from foxpuppet.windows.browser.panel_ui.panel_ui import PANEL_ITEMS, History
+
+
+class PluginNotification(BaseNotification):
+    """Notification class provided through an entry point."""
+
+
+def test_builtin_classes_are_registered() -> None:
+    """Look up FoxPuppet's own classes by element id."""
+    assert NOTIFICATIONS["addon-progress-notification"] is AddOnProgress
+    assert PANEL_ITEMS["appMenu-history-button"] is History
+    assert set(NOTIFICATIONS.ids_for(AddOnInstallComplete)) == {
+        "addon-install-complete-notification",
+        "appMenu-addon-installed-notification",
+        "addon-installed-notification",
+    }
+
+
+def test_entry_points_are_loaded_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Discover plugin classes without replacing registered ones."""
+    calls = []
+
+    def entry_points(group: str) -> list[EntryPoint]:
+        calls.append(group)
+        value = "tests.test_registry:PluginNotification"
+        return [
+            EntryPoint("plugin-notification", value, group),
+            EntryPoint("addon-progress-notification", value, group),
+        ]
+
+    monkeypatch.setattr(registry, "entry_points", entry_points)
+    notifications = Registry("foxpuppet.test")
+    notifications.register("addon-progress-notification")(AddOnProgress)
+    assert notifications["plugin-notification"] is PluginNotification
+    assert notifications["addon-progress-notification"] is AddOnProgress
+    assert len(notifications) == 2
+    assert calls == ["foxpuppet.test"]
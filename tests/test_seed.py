@@ -0,0 +1,368 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests for writing places databases offline."""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from foxpuppet.seed import (
+    PlacesWriter,
+    hash_string,
+    normalize_url,
+    rev_host,
+    schema_version,
+    url_hash,
+)
+from foxpuppet.windows.browser.bookmarks.bookmark import BookmarkData
+
+#: Places schema version of :py:data:`PLACES_SCHEMA`.
+PLACES_VERSION = 77
+
+#: Tables of a new places database as created by Firefox, standing in for a
+#: profile Firefox started on.
+PLACES_SCHEMA = """
+CREATE TABLE moz_origins (
+    id INTEGER PRIMARY KEY, prefix TEXT NOT NULL, host TEXT NOT NULL,
+    frecency INTEGER NOT NULL, recalc_frecency INTEGER NOT NULL DEFAULT 0,
+    alt_frecency INTEGER, recalc_alt_frecency INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (prefix, host)
+);
+CREATE TABLE moz_places (
+    id INTEGER PRIMARY KEY, url LONGVARCHAR, title LONGVARCHAR,
+    rev_host LONGVARCHAR, visit_count INTEGER DEFAULT 0,
+    hidden INTEGER DEFAULT 0 NOT NULL, typed INTEGER DEFAULT 0 NOT NULL,
+    frecency INTEGER DEFAULT -1 NOT NULL, last_visit_date INTEGER,
+    guid TEXT, foreign_count INTEGER DEFAULT 0 NOT NULL,
+    url_hash INTEGER DEFAULT 0 NOT NULL, description TEXT,
+    preview_image_url TEXT, site_name TEXT,
+    origin_id INTEGER REFERENCES moz_origins(id),
+    recalc_frecency INTEGER NOT NULL DEFAULT 0, alt_frecency INTEGER,
+    recalc_alt_frecency INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE moz_places_extra (
+    place_id INTEGER PRIMARY KEY NOT NULL, sync_json TEXT,
+    FOREIGN KEY (place_id) REFERENCES moz_places(id) ON DELETE CASCADE
+);
+CREATE TABLE moz_historyvisits (
+    id INTEGER PRIMARY KEY, from_visit INTEGER, place_id INTEGER,
+    visit_date INTEGER, visit_type INTEGER, session INTEGER,
+    source INTEGER DEFAULT 0 NOT NULL, triggeringPlaceId INTEGER
+);
+CREATE TABLE moz_historyvisits_extra (
+    visit_id INTEGER PRIMARY KEY NOT NULL, sync_json TEXT,
+    FOREIGN KEY (visit_id) REFERENCES moz_historyvisits(id) ON DELETE CASCADE
+);
+CREATE TABLE moz_inputhistory (
+    place_id INTEGER NOT NULL, input LONGVARCHAR NOT NULL,
+    use_count INTEGER, PRIMARY KEY (place_id, input)
+);
+CREATE TABLE moz_bookmarks (
+    id INTEGER PRIMARY KEY, type INTEGER, fk INTEGER DEFAULT NULL,
+    parent INTEGER, position INTEGER, title LONGVARCHAR, keyword_id INTEGER,
+    folder_type TEXT, dateAdded INTEGER, lastModified INTEGER, guid TEXT,
+    syncStatus INTEGER NOT NULL DEFAULT 0,
+    syncChangeCounter INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE moz_bookmarks_deleted (
+    guid TEXT PRIMARY KEY, dateRemoved INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE moz_keywords (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, keyword TEXT UNIQUE,
+    place_id INTEGER, post_data TEXT
+);
+CREATE TABLE moz_anno_attributes (
+    id INTEGER PRIMARY KEY, name VARCHAR(32) UNIQUE NOT NULL
+);
+CREATE TABLE moz_annos (
+    id INTEGER PRIMARY KEY, place_id INTEGER NOT NULL,
+    anno_attribute_id INTEGER, content LONGVARCHAR, flags INTEGER DEFAULT 0,
+    expiration INTEGER DEFAULT 0, type INTEGER DEFAULT 0,
+    dateAdded INTEGER DEFAULT 0, lastModified INTEGER DEFAULT 0
+);
+CREATE TABLE moz_items_annos (
+    id INTEGER PRIMARY KEY, item_id INTEGER NOT NULL,
+    anno_attribute_id INTEGER, content LONGVARCHAR, flags INTEGER DEFAULT 0,
+    expiration INTEGER DEFAULT 0, type INTEGER DEFAULT 0,
+    dateAdded INTEGER DEFAULT 0, lastModified INTEGER DEFAULT 0
+);
+CREATE TABLE moz_meta (key TEXT PRIMARY KEY, value NOT NULL) WITHOUT ROWID;
+CREATE TABLE moz_places_metadata (
+    id INTEGER PRIMARY KEY, place_id INTEGER NOT NULL,
+    referrer_place_id INTEGER, created_at INTEGER NOT NULL DEFAULT 0,
+    updated_at INTEGER NOT NULL DEFAULT 0,
+    total_view_time INTEGER NOT NULL DEFAULT 0,
+    typing_time INTEGER NOT NULL DEFAULT 0, key_presses INTEGER NOT NULL DEFAULT 0,
+    scrolling_time INTEGER NOT NULL DEFAULT 0,
+    scrolling_distance INTEGER NOT NULL DEFAULT 0,
+    document_type INTEGER NOT NULL DEFAULT 0,
+    search_query_id INTEGER,
+    FOREIGN KEY (place_id) REFERENCES moz_places(id) ON DELETE CASCADE,
+    FOREIGN KEY (referrer_place_id) REFERENCES moz_places(id) ON DELETE CASCADE,
+    FOREIGN KEY (search_query_id) REFERENCES moz_places_metadata_search_queries(id)
+        ON DELETE CASCADE
+    CHECK(place_id != referrer_place_id)
+);
+CREATE TABLE moz_places_metadata_search_queries (
+    id INTEGER PRIMARY KEY, terms TEXT NOT NULL UNIQUE
+);
+CREATE TABLE moz_previews_tombstones (
+    hash TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX moz_places_url_uniqueindex ON moz_places (url_hash, url);
+CREATE INDEX moz_places_hostindex ON moz_places (rev_host);
+CREATE INDEX moz_places_visitcount ON moz_places (visit_count);
+CREATE INDEX moz_places_frecencyindex ON moz_places (frecency);
+CREATE INDEX moz_places_lastvisitdateindex ON moz_places (last_visit_date);
+CREATE UNIQUE INDEX moz_places_guid_uniqueindex ON moz_places (guid);
+CREATE INDEX moz_places_originidindex ON moz_places (origin_id);
+CREATE INDEX moz_historyvisits_placedateindex
+    ON moz_historyvisits (place_id, visit_date);
+CREATE INDEX moz_historyvisits_fromindex ON moz_historyvisits (from_visit);
+CREATE INDEX moz_historyvisits_dateindex ON moz_historyvisits (visit_date);
+CREATE INDEX moz_bookmarks_itemindex ON moz_bookmarks (fk, type);
+CREATE INDEX moz_bookmarks_parentindex ON moz_bookmarks (parent, position);
+CREATE INDEX moz_bookmarks_itemlastmodifiedindex ON moz_bookmarks (fk, lastModified);
+CREATE INDEX moz_bookmarks_dateaddedindex ON moz_bookmarks (dateAdded);
+CREATE UNIQUE INDEX moz_bookmarks_guid_uniqueindex ON moz_bookmarks (guid);
+CREATE UNIQUE INDEX moz_keywords_placepostdata_uniqueindex
+    ON moz_keywords (place_id, post_data);
+CREATE UNIQUE INDEX moz_annos_placeattributeindex
+    ON moz_annos (place_id, anno_attribute_id);
+CREATE UNIQUE INDEX moz_items_annos_itemattributeindex
+    ON moz_items_annos (item_id, anno_attribute_id);
+CREATE UNIQUE INDEX moz_places_metadata_placecreated_uniqueindex
+    ON moz_places_metadata (place_id, created_at);
+CREATE INDEX moz_places_metadata_referrerindex
+    ON moz_places_metadata (referrer_place_id);
+"""
+
+
+@pytest.fixture
+def template(tmp_path: Path) -> str:
+    """Create a profile with an empty places database."""
+    profile = tmp_path / "template"
+    profile.mkdir()
+    db = sqlite3.connect(str(profile / "places.sqlite"), isolation_level=None)
+    db.executescript(PLACES_SCHEMA)
+    db.execute(
+        "INSERT INTO moz_bookmarks (type, parent, position, guid) "
+        "VALUES (2, 0, 0, 'root________')"
+    )
+    roots = ["menu________", "toolbar_____", "tags________", "unfiled_____"]
+    for position, guid in enumerate(roots + ["mobile______"]):
+        db.execute(
+            "INSERT INTO moz_bookmarks (type, parent, position, guid) "
+            "VALUES (2, 1, ?, ?)",
+            (position, guid),
+        )
+    db.execute("PRAGMA user_version = {0}".format(PLACES_VERSION))
+    db.close()
+    return str(profile)
+
+
+@pytest.fixture
+def places(tmp_path: Path, template: str) -> Iterator[PlacesWriter]:
+    """Create a new places database."""
+    with PlacesWriter(str(tmp_path / "places.sqlite"), template) as writer:
+        yield writer
+
+
+def test_hashes() -> None:
+    """Hash URLs with the scheme hash in the upper bits."""
+    assert hash_string("") == 0
+    assert hash_string("a") == (0x9E3779B9 * ord("a")) & 0xFFFFFFFF
+    hashed = url_hash("https://www.mozilla.org/")
+    assert hashed >> 32 == hash_string("https") & 0xFFFF
+    assert hashed & 0xFFFFFFFF == hash_string("https://www.mozilla.org/")
+    assert url_hash("no scheme") == hash_string("no scheme")
+    assert rev_host("https://WWW.Mozilla.org:8080/a") == "gro.allizom.www."
+    assert rev_host("about:blank") == "."
+
+
+def test_normalize_url() -> None:
+    """Store URLs the way Firefox writes them."""
+    assert normalize_url("HTTPS://WWW.Mozilla.org") == "https://www.mozilla.org/"
+    assert normalize_url("http://a.test:80/b c?d e#f") == "http://a.test/b%20c?d%20e#f"
+    assert normalize_url("https://a.test:8443") == "https://a.test:8443/"
+    assert normalize_url("https://bücher.test/") == "https://xn--bcher-kva.test/"
+    assert normalize_url("about:blank") == "about:blank"
+
+
+def test_copy_from_template(places: PlacesWriter) -> None:
+    """Copy a missing database with its bookmark roots from the template."""
+    db = places.connection
+    assert db.execute("PRAGMA user_version").fetchone()[0] == PLACES_VERSION
+    assert places.schema_version == PLACES_VERSION
+    roots = db.execute(
+        "SELECT b.guid, p.guid, b.position FROM moz_bookmarks b "
+        "LEFT JOIN moz_bookmarks p ON p.id = b.parent ORDER BY b.id"
+    ).fetchall()
+    assert roots == [
+        ("root________", None, 0),
+        ("menu________", "root________", 0),
+        ("toolbar_____", "root________", 1),
+        ("tags________", "root________", 2),
+        ("unfiled_____", "root________", 3),
+        ("mobile______", "root________", 4),
+    ]
+
+
+def test_add_bookmarks(places: PlacesWriter) -> None:
+    """Write bookmarks with tags and keywords, counting references."""
+    added = places.add_bookmarks(
+        [
+            {
+                "name": "Firefox",
+                "url": "https://www.mozilla.org/firefox/",
+                "tags": ["browser", "mozilla"],
+                "keyword": "ff",
+            },
+            {
+                "name": "MDN",
+                "url": "https://developer.mozilla.org/",
+                "tags": ["mozilla"],
+                "keyword": None,
+            },
+        ],
+        folder="toolbar",
+    )
+    assert added == 2
+    db = places.connection
+    assert db.execute(
+        "SELECT b.title, b.position, h.url, h.foreign_count, h.url_hash, h.rev_host "
+        "FROM moz_bookmarks b JOIN moz_places h ON h.id = b.fk "
+        "JOIN moz_bookmarks p ON p.id = b.parent WHERE p.guid = 'toolbar_____' "
+        "ORDER BY b.position"
+    ).fetchall() == [
+        (
+            "Firefox",
+            0,
+            "https://www.mozilla.org/firefox/",
+            4,
+            url_hash("https://www.mozilla.org/firefox/"),
+            "gro.allizom.www.",
+        ),
+        (
+            "MDN",
+            1,
+            "https://developer.mozilla.org/",
+            2,
+            url_hash("https://developer.mozilla.org/"),
+            "gro.allizom.repoleved.",
+        ),
+    ]
+    tags = db.execute(
+        "SELECT f.title, COUNT(*) FROM moz_bookmarks t "
+        "JOIN moz_bookmarks f ON f.id = t.parent "
+        "JOIN moz_bookmarks r ON r.id = f.parent WHERE r.guid = 'tags________' "
+        "GROUP BY f.title ORDER BY f.title"
+    ).fetchall()
+    assert tags == [("browser", 1), ("mozilla", 2)]
+    assert db.execute(
+        "SELECT k.keyword, h.url FROM moz_keywords k "
+        "JOIN moz_places h ON h.id = k.place_id"
+    ).fetchall() == [("ff", "https://www.mozilla.org/firefox/")]
+    assert db.execute(
+        "SELECT prefix, host FROM moz_origins ORDER BY host"
+    ).fetchall() == [
+        ("https://", "developer.mozilla.org"),
+        ("https://", "www.mozilla.org"),
+    ]
+    guids = [row[0] for row in db.execute("SELECT guid FROM moz_bookmarks")]
+    assert len(set(guids)) == len(guids)
+    assert all(len(guid) == 12 for guid in guids)
+
+
+def test_add_visits(places: PlacesWriter) -> None:
+    """Write visits and keep the page statistics in step."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    added = places.add_visits(
+        {
+            "url": "https://example{0}.test/".format(i % 3),
+            "title": "Example",
+            "date": start + timedelta(minutes=i),
+        }
+        for i in range(10)
+    )
+    places.add_visits([{"url": "https://example0.test/", "date": start, "transition": 9}])
+    assert added == 10
+    db = places.connection
+    assert db.execute(
+        "SELECT url, visit_count, last_visit_date, frecency > 0 "
+        "FROM moz_places ORDER BY url"
+    ).fetchall() == [
+        ("https://example0.test/", 4, places_time(start + timedelta(minutes=9)), 1),
+        ("https://example1.test/", 3, places_time(start + timedelta(minutes=7)), 1),
+        ("https://example2.test/", 3, places_time(start + timedelta(minutes=8)), 1),
+    ]
+    assert db.execute("SELECT COUNT(*) FROM moz_historyvisits").fetchone() == (11,)
+
+
+def test_refuse_other_schema(tmp_path: Path, template: str) -> None:
+    """Refuse databases of another Firefox version than the template."""
+    path = str(tmp_path / "places.sqlite")
+    with PlacesWriter(path, template):
+        pass
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA user_version = {0}".format(PLACES_VERSION + 1))
+    db.close()
+    with pytest.raises(ValueError, match="schema"):
+        PlacesWriter(path, template)
+    with pytest.raises(ValueError, match="start Firefox"):
+        schema_version(str(tmp_path / "missing"))
+
+
+def test_normalized_urls_are_shared(places: PlacesWriter) -> None:
+    """Hash and look up the normalised URL."""
+    places.add_visits([{"url": "HTTPS://A.test"}, {"url": "https://a.test/"}])
+    assert places.connection.execute(
+        "SELECT url, url_hash, visit_count FROM moz_places"
+    ).fetchall() == [("https://a.test/", url_hash("https://a.test/"), 2)]
+
+
+def test_reopen_existing(tmp_path: Path, template: str) -> None:
+    """Add to a database written before instead of recreating it."""
+    path = str(tmp_path / "places.sqlite")
+    bookmark: BookmarkData = {
+        "name": "A",
+        "url": "https://a.test/",
+        "tags": None,
+        "keyword": None,
+    }
+    with PlacesWriter(path, template) as places:
+        places.add_bookmarks([bookmark])
+    with PlacesWriter(path, template) as places:
+        places.add_bookmarks([bookmark])
+        places.add_visits([{"url": "https://a.test/"}])
+    db = sqlite3.connect(path)
+    assert db.execute(
+        "SELECT url, foreign_count, visit_count FROM moz_places"
+    ).fetchall() == [("https://a.test/", 2, 1)]
+    assert [
+        row[0] for row in db.execute("SELECT position FROM moz_bookmarks WHERE fk")
+    ] == [
+        0,
+        1,
+    ]
+
+
+def test_failed_write_is_rolled_back(places: PlacesWriter) -> None:
+    """Leave the database unchanged when a record is invalid."""
+    with pytest.raises(ValueError):
+        places.add_bookmarks(
+            [{"name": "A", "url": "https://a.test/", "tags": None, "keyword": None}],
+            folder="missing_____",
+        )
+    with pytest.raises(KeyError):
+        places.add_visits([{"url": "https://a.test/"}, {"title": "No URL"}])
+    assert places.connection.execute("SELECT COUNT(*) FROM moz_places").fetchone() == (0,)
+
+
+def places_time(value: datetime) -> int:
+    """Convert a datetime to microseconds since the epoch."""
+    return round(value.timestamp() * 1000000)
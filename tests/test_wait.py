@@ -0,0 +1,83 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests for the wait policy."""
+
+import itertools
+import time
+from typing import Any
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+from foxpuppet.wait import Deadlines, Wait, WaitPolicy
+
+DRIVER: Any = object()  # conditions in these tests never use the driver
+
+
+def test_fixed_intervals() -> None:
+    """Poll at a fixed interval by default."""
+    intervals = WaitPolicy(poll_frequency=0.2).intervals()
+    assert list(itertools.islice(intervals, 3)) == [0.2, 0.2, 0.2]
+
+
+def test_exponential_backoff() -> None:
+    """Grow the interval until it reaches the upper bound."""
+    policy = WaitPolicy(poll_frequency=0.1, backoff=2, max_poll_frequency=0.5)
+    intervals = list(itertools.islice(policy.intervals(), 5))
+    assert intervals == pytest.approx([0.1, 0.2, 0.4, 0.5, 0.5])
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"timeout": -1}, {"poll_frequency": 0}, {"backoff": 0.5}]
+)
+def test_invalid_policy(kwargs: dict) -> None:
+    """Reject policies that cannot be used for waiting."""
+    with pytest.raises(ValueError):
+        WaitPolicy(**kwargs)
+
+
+def test_until_returns_value() -> None:
+    """Return the first truthy value and ignore lookup errors."""
+    results = iter([NoSuchElementException(), None, "found"])
+
+    def condition(_):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    wait = Wait(DRIVER, WaitPolicy(timeout=1, poll_frequency=0.01))
+    assert wait.until(condition) == "found"
+
+
+def test_until_times_out() -> None:
+    """Raise a timeout with the given message."""
+    wait = Wait(DRIVER, WaitPolicy(timeout=0.05, poll_frequency=0.01, backoff=2))
+    with pytest.raises(TimeoutException, match="never"):
+        wait.until(lambda _: False, message="never")
+
+
+def test_deadline_shortens_waits() -> None:
+    """Stop waiting when the shared deadline runs out."""
+    deadlines = Deadlines()
+    wait = Wait(DRIVER, WaitPolicy(timeout=10, poll_frequency=0.01), deadlines)
+    assert wait.timeout == 10
+    with deadlines(0.05):
+        assert wait.timeout <= 0.05
+        start = time.monotonic()
+        with pytest.raises(TimeoutException):
+            wait.until(lambda _: False)
+        with pytest.raises(TimeoutException):
+            wait.until(lambda _: False)
+        assert time.monotonic() - start < 1
+    assert deadlines.remaining() is None
+
+
+def test_nested_deadline_cannot_extend() -> None:
+    """Keep the outer deadline when an inner one is longer."""
+    deadlines = Deadlines()
+    with deadlines(1):
+        with deadlines(100):
+            remaining = deadlines.remaining()
+            assert remaining is not None and remaining <= 1
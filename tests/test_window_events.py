@@ -0,0 +1,107 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at http://mozilla.org/MPL/2.0/.
+"""Tests for window lifecycle events received over WebDriver BiDi."""
+
+import threading
+from typing import Any, Callable
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from foxpuppet.windows import BaseWindow
+from foxpuppet.windows.events import WindowEvents
+
+
+class FakeBrowsingContext(object):
+    """Keeps the event handlers added by the code under test."""
+
+    def __init__(self) -> None:
+        self.handlers: dict[str, Callable[[Any], None]] = {}
+
+    def add_event_handler(self, event: str, callback: Callable[[Any], None]) -> int:
+        self.handlers[event] = callback
+        return len(self.handlers)
+
+    def remove_event_handler(self, event: str, callback_id: int) -> None:
+        del self.handlers[event]
+
+
+class FakeDriver(object):
+    """WebDriver with just enough behaviour for window lifecycle events."""
+
+    def __init__(self, bidi: bool = True) -> None:
+        self.caps = {"webSocketUrl": "ws://localhost/session"} if bidi else {}
+        self.browsing_context = FakeBrowsingContext()
+        self.handles = ["first"]
+
+    @property
+    def window_handles(self) -> list[str]:
+        return list(self.handles)
+
+    def open(self, handle: str, parent: Any = None) -> None:
+        self.handles.append(handle)
+        handler = self.browsing_context.handlers.get("context_created")
+        if handler:
+            handler({"context": handle, "parent": parent, "clientWindow": "w"})
+
+
+def test_events_need_bidi() -> None:
+    """Stay disabled when the session has no BiDi connection."""
+    driver: Any = FakeDriver(bidi=False)
+    events = WindowEvents(driver)
+    assert not events.start()
+    assert not events.enabled
+
+
+def test_opened_and_closed() -> None:
+    """Record top-level contexts with timestamps and skip frames."""
+    driver: Any = FakeDriver()
+    events = WindowEvents(driver)
+    assert events.start()
+    driver.open("frame", parent="first")
+    driver.open("second")
+    driver.browsing_context.handlers["context_destroyed"]({"context": "second"})
+    assert [event["handle"] for event in events.opened] == ["second"]
+    assert [event["handle"] for event in events.closed] == ["second"]
+    assert events.opened[0]["monotonic"] <= events.closed[0]["monotonic"]
+    events.stop()
+    assert driver.browsing_context.handlers == {}
+
+
+def test_wait_for_open() -> None:
+    """Wake up as soon as the event arrives from another thread."""
+    driver: Any = FakeDriver()
+    events = WindowEvents(driver)
+    events.start()
+    mark = events.mark()
+    threading.Timer(0.1, driver.open, ["second"]).start()
+    assert events.wait_for_open(mark, 5)["handle"] == "second"
+    with pytest.raises(TimeoutException, match="nothing"):
+        events.wait_for_open(events.mark(), 0.1, "nothing")
+
+
+@pytest.mark.parametrize("bidi", [True, False])
+def test_open_window(bidi: bool) -> None:
+    """Return the opened handle with and without BiDi."""
+    driver: Any = FakeDriver(bidi)
+    window = BaseWindow(driver, "first")
+    assert window._open_window(lambda: driver.open("second")) == "second"
+    assert window.last_wait is not None
+    assert window.last_wait.polls == 1
+
+
+def test_events_are_bounded() -> None:
+    """Keep the last events and still find those opened after a mark."""
+    driver: Any = FakeDriver()
+    events = WindowEvents(driver, max_events=3)
+    events.start()
+    for i in range(5):
+        driver.open("window{0}".format(i))
+    assert [event["handle"] for event in events.opened] == [
+        "window2",
+        "window3",
+        "window4",
+    ]
+    assert events.wait_for_open(3, 0)["handle"] == "window3"
+    assert events.wait_for_open(0, 0)["handle"] == "window2"